@@ -6,10 +6,25 @@
 # ============================================
 
 import os, re
-import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from fare_ingest import ingest
+from fare_signals import add_signals
+from fare_index import POLICY, index_for
+from fare_cache import FareCache
+from fare_compact import compact_frame, memory_report, readable_frame
+from fare_alerts import AlertEngine
+from deal_index import DealIndex
+from fare_backtest import Replay, policy_grid, sweep
+from fare_log import FareLog
+from fare_tail import FareTail
+from heavy_hitters import SpaceSaving
+from route_quantiles import RouteQuantiles
+from observation_dedup import ObservationDedup
+from ingest_checkpoint import IngestCheckpoint
+from ingest_metrics import IngestMetrics
+
 # -------------------------------
 # 1) Find itineraries.csv
 # -------------------------------
@@ -53,6 +68,7 @@ c_dest   = pick_col([r"destinationairport", r"destairport", r"\bdestination\b",
 c_price  = pick_col([r"totalfare", r"basefare", r"\bprice\b", r"\bfare\b", r"total_amount", r"totalamount"])
 c_airline= pick_col([r"airline", r"carrier", r"marketingcarrier", r"operatingcarrier"])
 c_dep_dt = pick_col([r"departure.*date", r"start.*date", r"flight.*date", r"leg.*departure.*date"])
+c_leg    = pick_col([r"^legid$", r"itinerary.*id", r"^leg.*id"])
 
 print("Detected:")
 print(" time   =", c_time)
@@ -61,6 +77,7 @@ print(" dest   =", c_dest)
 print(" price  =", c_price)
 print(" airline=", c_airline)
 print(" dep_dt =", c_dep_dt)
+print(" leg    =", c_leg)
 
 # Brutal truth: without a real time column, you cannot do real-time insights from this dataset.
 if c_time is None:
@@ -76,201 +93,168 @@ for name, col in [("origin", c_origin), ("dest", c_dest), ("price", c_price)]:
 # -------------------------------
 # 3) Stream in chunks & build compact time-series
 # -------------------------------
-USE_COLS = [c_time, c_origin, c_dest, c_price]
-if c_airline: USE_COLS.append(c_airline)
-if c_dep_dt:  USE_COLS.append(c_dep_dt)
-
 # Tune these to your kernel limits
-CHUNK_ROWS = 250_000          # if kernel still dies, drop to 100_000
+CHUNK_ROWS = 250_000          # if kernel still dies, drop to 100_000 (a rerun resumes from the last checkpoint)
 MAX_ROUTES = 5000             # keep top routes only (demand proxy)
 KEEP_LAST_N_PER_ROUTE = 60    # compact time-series per route (per airline optional)
 
-# We do a quick first pass (small sample) to find frequent routes (so we don't keep everything).
-sample = pd.read_csv(it_path, usecols=USE_COLS, nrows=400_000, low_memory=False)
-sample = sample.rename(columns={c_origin:"origin", c_dest:"dest", c_time:"observed_at", c_price:"price"})
-sample["origin"] = sample["origin"].astype(str).str.upper().str.strip()
-sample["dest"]   = sample["dest"].astype(str).str.upper().str.strip()
-sample["route"]  = sample["origin"] + "-" + sample["dest"]
-
-top_routes = sample["route"].value_counts().head(MAX_ROUTES).index.tolist()
-top_routes = set(top_routes)
-
-del sample
-
-print(f"✅ Keeping only top {len(top_routes)} routes to stay memory-safe.")
-
-def clean_chunk(chunk):
-    chunk = chunk.rename(columns={
-        c_origin: "origin",
-        c_dest: "dest",
-        c_time: "observed_at",
-        c_price: "price"
-    })
-    if c_airline and c_airline in chunk.columns:
-        chunk = chunk.rename(columns={c_airline: "airline"})
-    if c_dep_dt and c_dep_dt in chunk.columns:
-        chunk = chunk.rename(columns={c_dep_dt: "departure_date"})
-
-    chunk["origin"] = chunk["origin"].astype(str).str.upper().str.strip()
-    chunk["dest"]   = chunk["dest"].astype(str).str.upper().str.strip()
-    chunk["route"]  = chunk["origin"] + "-" + chunk["dest"]
-
-    # keep only top routes
-    chunk = chunk[chunk["route"].isin(top_routes)]
-
-    # parse time
-    chunk["observed_at"] = pd.to_datetime(chunk["observed_at"], errors="coerce")
-
-    # price numeric
-    chunk["price"] = (chunk["price"].astype(str).str.replace(r"[^0-9.]", "", regex=True))
-    chunk["price"] = pd.to_numeric(chunk["price"], errors="coerce")
-
-    # optional departure date
-    if "departure_date" in chunk.columns:
-        chunk["departure_date"] = pd.to_datetime(chunk["departure_date"], errors="coerce").dt.date
-    else:
-        chunk["departure_date"] = pd.NaT
-
-    # drop junk
-    chunk = chunk.dropna(subset=["observed_at", "price", "origin", "dest"])
-    chunk = chunk[chunk["price"] > 0]
-
-    return chunk
-
-# We'll store only the last N observations per group (route + dep_date + airline)
-store = {}  # key -> DataFrame (small)
-
-def store_update(key, df_new):
-    if key not in store:
-        store[key] = df_new
-    else:
-        store[key] = pd.concat([store[key], df_new], ignore_index=True)
-
-    # keep only last N by observed_at
-    store[key] = store[key].sort_values("observed_at").tail(KEEP_LAST_N_PER_ROUTE)
-
-# Stream
-reader = pd.read_csv(it_path, usecols=USE_COLS, chunksize=CHUNK_ROWS, low_memory=False)
-
-for i, ch in enumerate(reader, start=1):
-    ch = clean_chunk(ch)
-
-    # If airline missing, fill stable value so grouping works
-    if "airline" not in ch.columns:
-        ch["airline"] = "ALL"
-
-    # We keep groups small
-    group_cols = ["route", "departure_date", "airline"]
-    for key, g in ch.groupby(group_cols):
-        store_update(key, g[["observed_at","route","departure_date","airline","price"]])
-
-    if i % 5 == 0:
-        print(f"  processed chunks: {i} | groups stored: {len(store)}")
-
-print("✅ Finished streaming. Groups stored:", len(store))
-
-# Flatten to a single compact dataframe
-fare_sig = pd.concat(store.values(), ignore_index=True)
-fare_sig = fare_sig.sort_values(["route","departure_date","airline","observed_at"])
-
-# Outlier trim (still real data, just removing garbage)
-lo, hi = fare_sig["price"].quantile([0.005, 0.995])
-fare_sig = fare_sig[(fare_sig["price"] >= lo) & (fare_sig["price"] <= hi)]
+HH_CAPACITY = 2 * MAX_ROUTES  # routes tracked by the streaming heavy-hitter summary (>= MAX_ROUTES)
+INGEST_WORKERS = 1            # >1 = parse byte ranges of the CSV in a process pool
+INGEST_MEM_CAP_MB = 2048      # parallel mode: cap on raw CSV bytes in flight across workers
+FAST_PARSE = True             # typed reader (categoricals, float32 fares, fixed date formats); False = legacy parsing
+INGEST_METRICS_PATH = None    # e.g. "/kaggle/working/ingest_metrics.jsonl" (one line per chunk) or ".prom"
+CHECKPOINT_PATH = "/kaggle/working/ingest_checkpoint.pkl"  # ingest state for resuming after a crash (None = off)
+CHECKPOINT_EVERY = 20         # chunks (serial) / byte ranges (parallel) between checkpoints
+ROUTE_TRIM = (0.005, 0.995)   # per-route price quantiles; rows outside are dropped at ingest (None = keep all)
+DEDUP_FP_RATE = 0.001         # drop repeated (leg id, search time, fare) rows; Bloom false-positive rate (None = keep); needs INGEST_WORKERS = 1
+
+COLSPEC = {"time": c_time, "origin": c_origin, "dest": c_dest, "price": c_price,
+           "airline": c_airline, "dep_dt": c_dep_dt, "leg": c_leg if DEDUP_FP_RATE else None}
+
+SIGNAL_K = 12                 # rolling window for trend/volatility signals
+FARE_CACHE_DIR = "/kaggle/working/fare_cache"  # compact table + signals, partitioned by route
+MEMORY_REPORT_ROWS = None     # e.g. 50_000_000 -> memory_report also projects fare_sig size at that row count
+FARE_LOG_DIR = None           # e.g. "/kaggle/working/fare_log": every stored row on disk (fare_log.py); needs INGEST_WORKERS = 1
+TAIL_DIR = None               # e.g. "/kaggle/working/fare_drops": keep folding new fare CSVs in after the batch (fare_tail.py)
+BACKTEST_WORKERS = os.cpu_count() or 1   # processes for the BOOK_NOW/WAIT/HOLD threshold sweep (fare_backtest.py)
+
+ingest_ckpt = IngestCheckpoint(CHECKPOINT_PATH, every=CHECKPOINT_EVERY) if CHECKPOINT_PATH else None
+
+def build_fare_sig():
+    # Frequent routes are found inside the main stream (Space-Saving, bounded memory),
+    # so there is no separate sample pass and no bias toward the head of the file.
+    # We store only the last N observations per group (route + dep_date + airline)
+    # in a bounded, preallocated NumPy store (see fare_store.py / fare_ingest.py).
+    # FARE_LOG_DIR additionally appends every row the store takes (tracked routes,
+    # after the trim) to a memory-mapped log, so full histories (beyond the last N)
+    # stay readable without the CSV.
+    # route_q sketches each route's prices in the same pass (route_quantiles.py);
+    # outliers are trimmed per route there, not against one global price range.
+    # Repeated itineraries (same leg id, search time, fare) are dropped before anything
+    # else sees them (observation_dedup.py, fixed-size filter sized from the file).
+    # With ingest_ckpt, the loop state is saved every CHECKPOINT_EVERY chunks and a
+    # rerun after a crash resumes there (ingest_checkpoint.py); the fare log is
+    # rolled back to the same point.
+    metrics = IngestMetrics.to_path(INGEST_METRICS_PATH)
+    route_q = RouteQuantiles(trim=ROUTE_TRIM)
+    dedup = ObservationDedup.for_file(it_path, DEDUP_FP_RATE) if COLSPEC["leg"] else None
+    fare_log = None
+    if FARE_LOG_DIR and ingest_ckpt is not None:
+        fare_log = FareLog(FARE_LOG_DIR)
+        ingest_ckpt.attach("fare_log_records", lambda: len(fare_log), fare_log.truncate)
+    elif FARE_LOG_DIR:
+        fare_log = FareLog.create(FARE_LOG_DIR)
+    store, route_hh = ingest(
+        it_path, COLSPEC,
+        workers=INGEST_WORKERS,
+        mem_cap_mb=INGEST_MEM_CAP_MB,
+        chunk_rows=CHUNK_ROWS,
+        keep_n=KEEP_LAST_N_PER_ROUTE,
+        hh_capacity=HH_CAPACITY,
+        fast=FAST_PARSE,
+        on_stored=fare_log.append if fare_log is not None else None,
+        metrics=metrics,
+        quantiles=route_q,
+        dedup=dedup,
+        checkpoint=ingest_ckpt,
+    )
 
-print("✅ Compact fare table shape:", fare_sig.shape)
-print("Example rows (small):")
-display(fare_sig.head(5))
+    print("✅ Finished streaming. Groups stored:", len(store))
+    if dedup is not None:
+        st = dedup.summary()
+        print(f"✅ Duplicates dropped: {st['dropped']:,} of {st['rows_in']:,} rows ({st['dropped_pct']}%) "
+              f"| filter {st['filter_mb']} MB")
+    if ingest_ckpt is not None:
+        st = ingest_ckpt.summary()
+        resumed = f" | resumed after chunk {st['resumed_at_unit']}" if st["resumed_at_unit"] is not None else ""
+        print(f"✅ Checkpoints: {st['saves']} written in {st['save_s']}s ({st['last_mb']} MB each){resumed}")
+    if fare_log is not None:
+        fare_log.compact()
+        print(f"✅ Fare log: {len(fare_log):,} rows | {fare_log.nbytes_on_disk() / 1024**2:,.0f} MB at {FARE_LOG_DIR}")
+    if metrics.enabled:
+        print("✅ Ingest stages (exported to", INGEST_METRICS_PATH + ")")
+        display(metrics.summary())
+
+    # Final route set = top MAX_ROUTES by estimated count; drop groups of the extra tracked routes
+    top_routes = set(route_hh.top(MAX_ROUTES))
+    store.evict_routes(set(route_hh.tracked()) - top_routes)
+    route_q.evict(set(route_hh.tracked()) - top_routes)
+    hh_stats = route_hh.summary(MAX_ROUTES)
+    print(f"✅ Keeping top {len(top_routes)} routes | guaranteed in true top: {int(hh_stats['guaranteed'].sum())} "
+          f"| max count error: {int(hh_stats['error'].max() if len(hh_stats) else 0)} of {route_hh.total:,} rows")
+
+    # Flatten to a single compact dataframe
+    fare_sig = store.to_frame()
+    fare_sig = fare_sig.sort_values(["route","departure_date","airline","observed_at"])
+
+    # Outlier trim (still real data, just removing garbage): rows stored while a
+    # route was below route_q.min_count prices go through its final bounds here
+    if ROUTE_TRIM:
+        fare_sig = fare_sig[route_q.keep_mask(fare_sig["route"], fare_sig["price"])]
+    return fare_sig, route_q, route_hh
 
 # -------------------------------
-# 4) Add trend/volatility signals (compact + fast)
+# 4) Add trend/volatility signals (compact + fast) + on-disk cache
 # -------------------------------
-def add_signals(df, k=12):
-    df = df.copy()
-    grp = ["route","departure_date","airline"]
-
-    df["price_prev"] = df.groupby(grp)["price"].shift(1)
-    df["pct_change_prev"] = (df["price"] - df["price_prev"]) / df["price_prev"]
-
-    # Rolling stats inside each group
-    df["volatility_recent"] = (
-        df.groupby(grp)["price"]
-          .rolling(k, min_periods=4).std()
-          .reset_index(level=grp, drop=True)
-        /
-        df.groupby(grp)["price"]
-          .rolling(k, min_periods=4).mean()
-          .reset_index(level=grp, drop=True)
-    )
-
-    # Trend: last price vs first in rolling window
-    def first_of_window(x):
-        return x.iloc[0]
-    first = (df.groupby(grp)["price"]
-               .rolling(k, min_periods=4)
-               .apply(lambda x: first_of_window(pd.Series(x)), raw=False)
-               .reset_index(level=grp, drop=True))
-    df["trend_recent_pct"] = (df["price"] - first) / first
-
-    df["obs_count_in_group"] = df.groupby(grp)["price"].transform("size")
-    return df
-
-fare_sig = add_signals(fare_sig, k=12)
-print("✅ Signals added.")
+# add_signals (fare_signals.py) computes every rolling feature in one vectorized
+# pass; IncrementalSignals there refreshes only groups touched by a new chunk.
+# The finished table is cached per route (fare_cache.py). The cache key covers the
+# source file (size/mtime/hash) and the ingest parameters, so warm starts skip the
+# CSV entirely and a changed file or setting rebuilds automatically.
+fare_cache = FareCache(FARE_CACHE_DIR, it_path, params={
+    "columns": COLSPEC,
+    "MAX_ROUTES": MAX_ROUTES,
+    "KEEP_LAST_N_PER_ROUTE": KEEP_LAST_N_PER_ROUTE,
+    "HH_CAPACITY": HH_CAPACITY,
+    "FAST_PARSE": FAST_PARSE,
+    "ROUTE_TRIM": ROUTE_TRIM,
+    "DEDUP_FP_RATE": DEDUP_FP_RATE,
+    "SIGNAL_K": SIGNAL_K,
+})
+
+if fare_cache.exists():
+    fare_sig = fare_cache.load()   # fare_cache.load(routes=[...]) reads only those partitions
+    print("✅ Warm start from cache:", fare_cache.path)
+    q_path = os.path.join(fare_cache.path, "route_quantiles.npz")
+    if os.path.exists(q_path):
+        route_q = RouteQuantiles.load(q_path)
+    else:  # entry written without its sketch: rebuild it from the stored rows only
+        route_q = RouteQuantiles(trim=ROUTE_TRIM)
+        route_q.update(fare_sig["route"], fare_sig["price"])
+    hh_path = os.path.join(fare_cache.path, "route_counts.npz")
+    route_hh = SpaceSaving.load(hh_path) if os.path.exists(hh_path) else None
+else:
+    fare_sig, route_q, route_hh = build_fare_sig()
+    fare_sig = compact_frame(add_signals(fare_sig, k=SIGNAL_K))
+    print("✅ Signals added.")
+    fare_cache.save(fare_sig)
+    route_q.save(os.path.join(fare_cache.path, "route_quantiles.npz"))
+    route_hh.save(os.path.join(fare_cache.path, "route_counts.npz"))
+    print("✅ Cached compact table:", fare_cache.path)
+    if ingest_ckpt is not None:
+        ingest_ckpt.clear()   # the cache now holds the result
+
+# Dictionary-coded route/airline, int32 day numbers, int64 epoch ns, float32 prices
+# (fare_compact.py). Queries below still answer with readable values.
+fare_sig = compact_frame(fare_sig)
+print("✅ Compact fare table shape:", fare_sig.shape)
+display(memory_report(fare_sig, rows=MEMORY_REPORT_ROWS))
+print("Example rows (small):")
+display(readable_frame(fare_sig.head(5)))
 
 # -------------------------------
 # 5) Live-like query (NO ML, explainable)
 # -------------------------------
-def get_live_fare(route, now=None, departure_date=None, airline=None, df=fare_sig):
-    if now is None:
-        now = pd.Timestamp.now()
-
-    d = df[df["route"] == route].copy()
-    if departure_date is not None:
-        dd = pd.to_datetime(departure_date, errors="coerce").date()
-        d = d[d["departure_date"] == dd]
-    if airline is not None:
-        d = d[d["airline"].astype(str).str.lower() == str(airline).lower()]
-
-    d = d[d["observed_at"] <= pd.to_datetime(now)]
-    if len(d) == 0:
-        return {"ok": False, "reason": "No observations for that route/time filter."}
-
-    row = d.sort_values("observed_at").iloc[-1]
-
-    trend = row.get("trend_recent_pct", np.nan)
-    vol   = row.get("volatility_recent", np.nan)
-
-    decision = "HOLD"
-    why = []
+# Built once: route -> departure_date -> airline, timestamp-sorted (fare_index.py).
+# "Latest observation at or before now" is a binary search, not a table scan.
+index_for(fare_sig)
 
-    if pd.notna(trend):
-        if trend > 0.05:
-            decision = "BOOK_NOW"
-            why.append(f"Price trending up (~{trend*100:.1f}% recent).")
-        elif trend < -0.05:
-            decision = "WAIT"
-            why.append(f"Price trending down (~{trend*100:.1f}% recent).")
-
-    if pd.notna(vol) and vol > 0.10:
-        decision = "BOOK_NOW"
-        why.append("High volatility (big swings).")
-
-    if not why:
-        why.append("Limited recent signal; showing latest observed price.")
+def get_live_fare(route, now=None, departure_date=None, airline=None, df=fare_sig):
+    return index_for(df).get_live_fare(route, now, departure_date, airline)
 
-    return {
-        "ok": True,
-        "route": row["route"],
-        "departure_date": row["departure_date"],
-        "airline": row["airline"],
-        "observed_at": row["observed_at"],
-        "current_price": float(row["price"]),
-        "trend_recent_pct": None if pd.isna(trend) else float(trend),
-        "volatility_recent": None if pd.isna(vol) else float(vol),
-        "decision": decision,
-        "explanation": " ".join(why),
-        "obs_count": int(row.get("obs_count_in_group", 0))
-    }
+def get_live_fares(queries, df=fare_sig):
+    # many (route, now, departure_date, airline) queries in one vectorized call
+    return index_for(df).get_live_fares(queries)
 
 # pick a route that has enough data
 best_route = fare_sig["route"].value_counts().index[0]
@@ -281,14 +265,7 @@ print(get_live_fare(best_route))
 # 6) Alert simulation (REAL data; triggers when historically seen)
 # -------------------------------
 def simulate_price_alert(route, target_price, df=fare_sig, departure_date=None, airline=None):
-    d = df[df["route"] == route].copy()
-    if departure_date is not None:
-        dd = pd.to_datetime(departure_date, errors="coerce").date()
-        d = d[d["departure_date"] == dd]
-    if airline is not None:
-        d = d[d["airline"].astype(str).str.lower() == str(airline).lower()]
-
-    d = d.sort_values("observed_at")
+    d = index_for(df).rows(route, departure_date, airline)  # already time-sorted
     hit = d[d["price"] <= target_price]
     if len(hit) == 0:
         return None
@@ -303,22 +280,34 @@ def simulate_price_alert(route, target_price, df=fare_sig, departure_date=None,
         "airline": r["airline"]
     }
 
-# Example alert using 25th percentile as target
-target = fare_sig[fare_sig["route"]==best_route]["price"].quantile(0.25)
+# Example alert using 25th percentile as target (from the route's sketch, no table scan)
+target = route_q.quantiles(best_route, 0.25)
 print("✅ Example alert:", simulate_price_alert(best_route, target))
 
+# Many subscriptions at once (fare_alerts.py): indexed per route in threshold order,
+# each fires once. Register before a cold start and pass
+# ingest(..., on_chunk=alerts.process) to match while the CSV streams; here we replay fare_sig.
+alerts = AlertEngine()
+alert_routes = fare_sig["route"].value_counts().index[:20]
+alerts.register([{"route": r, "target_price": t}
+                 for r, t in zip(alert_routes, route_q.quantiles(alert_routes, 0.25))])
+fired = alerts.process(fare_sig)
+print(f"✅ Alert engine: {len(fired)} of {len(alert_routes)} subscriptions fired")
+display(fired.head())
+
 # -------------------------------
 # 7) Plot route timeline (compact, won’t kill kernel)
 # -------------------------------
-def plot_route_timeline(route, df=fare_sig, departure_date=None, airline=None):
-    d = df[df["route"] == route].copy()
-    if departure_date is not None:
-        dd = pd.to_datetime(departure_date, errors="coerce").date()
-        d = d[d["departure_date"] == dd]
-    if airline is not None:
-        d = d[d["airline"].astype(str).str.lower() == str(airline).lower()]
-
-    d = d.sort_values("observed_at")
+# With FARE_LOG_DIR the timeline is the route's full history from the log,
+# otherwise the last KEEP_LAST_N_PER_ROUTE observations per group in fare_sig.
+fare_log = FareLog(FARE_LOG_DIR) if FARE_LOG_DIR and FareLog.exists(FARE_LOG_DIR) else None
+
+def plot_route_timeline(route, df=fare_sig, departure_date=None, airline=None, log=fare_log):
+    if log is not None:   # same final trim as fare_sig (rows logged before the route's sketch filled)
+        d = log.rows(route, departure_date, airline)
+        d = d[route_q.keep_mask(d["route"], d["price"])] if ROUTE_TRIM else d
+    else:
+        d = index_for(df).rows(route, departure_date, airline)
     if len(d) == 0:
         print("No data to plot for filters.")
         return
@@ -331,3 +320,69 @@ def plot_route_timeline(route, df=fare_sig, departure_date=None, airline=None):
     plt.show()
 
 plot_route_timeline(best_route)
+
+# -------------------------------
+# 8) Deal finder: cheapest destinations from an origin / cheapest airline on a route
+# -------------------------------
+# One record per (route, departure_date, airline) with its latest and lowest-recent
+# price, sorted by (origin, departure day) (deal_index.py): a top-k query reads only
+# that origin's groups in the date range, not fare_sig.
+deals = DealIndex.from_frame(fare_sig, recent=SIGNAL_K)
+
+def cheapest_destinations(origin, k=20, date_from=None, date_to=None, by="latest", airline=None):
+    # by="min_recent": rank on the lowest of each group's last SIGNAL_K prices
+    return deals.cheapest_destinations(origin, k, date_from, date_to, by, airline)
+
+def cheapest_airlines(route, k=None, date_from=None, date_to=None, by="latest"):
+    return deals.cheapest_airlines(route, k, date_from, date_to, by)
+
+best_origin = best_route.split("-")[0]
+print(f"✅ Deal index: {len(deals):,} groups | cheapest from {best_origin}:")
+display(cheapest_destinations(best_origin, k=10))
+display(cheapest_airlines(best_route))
+
+# -------------------------------
+# 9) Backtest the BOOK_NOW / WAIT / HOLD thresholds
+# -------------------------------
+# Every observation is replayed as "someone asked get_live_fare here" and scored
+# against the prices that came later in its group (fare_backtest.py): savings vs.
+# booking right away, regret vs. the lowest later price. With FARE_LOG_DIR the
+# replay covers the full history instead of the last KEEP_LAST_N_PER_ROUTE per group,
+# restricted to fare_sig's routes and route_q's bounds like the table get_live_fare serves.
+replay = (Replay.from_log(fare_log, k=SIGNAL_K, routes=fare_sig["route"].unique(),
+                          quantiles=route_q if ROUTE_TRIM else None)
+          if fare_log is not None else Replay.from_frame(fare_sig))
+print(f"✅ Backtest: {len(replay):,} observations in {replay.n_groups:,} groups | current policy:")
+print(replay.totals(POLICY))
+display(replay.by_route(POLICY).head(10))
+
+backtest_grid = policy_grid(trend_up=[0.02, 0.05, 0.10], trend_down=[-0.02, -0.05, -0.10],
+                            vol_max=[0.05, 0.10, 0.20], hold=["wait", "book"])
+policy_sweep = sweep(replay, backtest_grid, workers=BACKTEST_WORKERS)
+print(f"✅ Policy sweep: {len(policy_sweep)} threshold sets, lowest mean regret first")
+display(policy_sweep.head(5))
+# POLICY.update(policy_sweep.iloc[0][list(POLICY)].to_dict()) makes get_live_fare use the best set
+
+# -------------------------------
+# 10) Live tail (optional): new fare CSV drops update the answers above
+# -------------------------------
+# Only the new bytes of each file are parsed (same cleaning and last-N store as
+# the batch: route_q's per-route trim, repeat drop, top MAX_ROUTES by the batch's
+# route counts), signals are recomputed for the groups they touch and `alerts`
+# keeps matching. Queries read tail.snapshot, one consistent state per call.
+if TAIL_DIR:
+    tail = FareTail.from_frame(fare_sig, COLSPEC, route_hh=route_hh, max_routes=MAX_ROUTES,
+                               keep_n=KEEP_LAST_N_PER_ROUTE, hh_capacity=HH_CAPACITY, signal_k=SIGNAL_K,
+                               quantiles=route_q,
+                               dedup=ObservationDedup.for_file(it_path, DEDUP_FP_RATE) if COLSPEC["leg"] else None,
+                               alerts=alerts, on_alert=display, deals=True)
+    tail.watch(TAIL_DIR).start()
+    print("✅ Tailing", TAIL_DIR, "| get_live_fare now answers from the live snapshot")
+
+    def get_live_fare(route, now=None, departure_date=None, airline=None):
+        return tail.snapshot.get_live_fare(route, now, departure_date, airline)
+
+    def get_live_fares(queries):
+        return tail.snapshot.get_live_fares(queries)
+
+    deals = tail.deals   # cheapest_destinations / cheapest_airlines follow the tail too
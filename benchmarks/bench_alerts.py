@@ -0,0 +1,86 @@
+# ============================================
+# BENCH: AlertEngine match cost per observation vs. subscription count
+# Baseline = the old simulate_price_alert (filter + sort fare_sig per subscription).
+# Usage: python benchmarks/bench_alerts.py --rows 500000 --subs 1000 10000 100000
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_alerts import AlertEngine
+
+from bench_fare_store import synthetic_chunks
+
+
+def legacy_simulate_price_alert(route, target_price, df, departure_date=None, airline=None):
+    d = df[df["route"] == route].copy()
+    if departure_date is not None:
+        d = d[d["departure_date"] == departure_date]
+    if airline is not None:
+        d = d[d["airline"].astype(str).str.lower() == str(airline).lower()]
+    d = d.sort_values("observed_at", kind="stable")
+    hit = d[d["price"] <= target_price]
+    if len(hit) == 0:
+        return None
+    return hit.iloc[0]["observed_at"], float(hit.iloc[0]["price"])
+
+
+def random_subs(df, n, seed=0):
+    # mostly low targets -> most subscriptions stay armed for the whole stream
+    rng = np.random.default_rng(seed)
+    pick = df.iloc[rng.integers(0, len(df), n)]
+    subs = pd.DataFrame({"route": pick["route"].to_numpy(),
+                         "target_price": rng.uniform(10, 150, n).round(2)})
+    subs["departure_date"] = np.where(rng.random(n) < 0.5, pick["departure_date"].to_numpy(), None)
+    subs["airline"] = np.where(rng.random(n) < 0.3, pick["airline"].to_numpy(), None)
+    return subs
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=500_000)
+    ap.add_argument("--groups", type=int, default=20_000)
+    ap.add_argument("--chunk-rows", type=int, default=100_000)
+    ap.add_argument("--subs", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = ap.parse_args()
+
+    chunks = list(synthetic_chunks(args.rows, args.groups, args.chunk_rows))
+    full = pd.concat(chunks, ignore_index=True)
+    print(f"stream: {args.rows:,} observations in {len(chunks)} chunks")
+
+    for n_subs in args.subs:
+        subs = random_subs(full, n_subs)
+        eng = AlertEngine()
+        t = time.perf_counter()
+        eng.register(subs)
+        t_reg = time.perf_counter() - t
+
+        fired = []
+        t = time.perf_counter()
+        for ch in chunks:
+            fired.append(eng.process(ch))
+        secs = time.perf_counter() - t
+        fired = pd.concat(fired, ignore_index=True).set_index("sub_id")
+        print(f"subs={n_subs:>8,}: register {t_reg:6.3f}s | match {secs:6.2f}s | "
+              f"{secs / args.rows * 1e6:6.2f} us/observation | fired {len(fired):,}")
+
+    # correctness + baseline on a small set (one chunk = whole stream, so "first hit" is global)
+    subs = random_subs(full, 300, seed=7)
+    eng = AlertEngine()
+    eng.register(subs)
+    got = eng.process(full).set_index("sub_id")
+    t = time.perf_counter()
+    ref = [legacy_simulate_price_alert(df=full, **{k: (None if pd.isna(v) else v) for k, v in r.items()})
+           for r in subs.to_dict("records")]
+    per_sub = (time.perf_counter() - t) / len(subs)
+    same = all((i not in got.index and r is None) or
+               (r is not None and i in got.index and (got.loc[i, "triggered_at"], got.loc[i, "trigger_price"]) == r)
+               for i, r in enumerate(ref))
+    print(f"legacy simulate_price_alert: {per_sub * 1e3:.1f} ms/subscription "
+          f"(~{per_sub * 100_000:,.0f}s for 100k subscriptions) | engine matches legacy: {same}")
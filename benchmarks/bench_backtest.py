@@ -0,0 +1,85 @@
+# ============================================
+# BENCH: BOOK_NOW / WAIT / HOLD backtest, vectorized Replay vs. replaying each
+# observation through fare_decision one row at a time (timed on a slice of the
+# groups and extrapolated per million rows; the scores of that slice are
+# checked against the vectorized ones). Then a threshold sweep at 1..N workers.
+# Usage: python benchmarks/bench_backtest.py --rows 2000000 --groups 100000 --workers 1 4
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_backtest import DECISIONS, Replay, policy_grid, sweep
+from fare_index import fare_decision
+from fare_signals import add_signals
+
+from bench_fare_store import synthetic_chunks
+
+
+def loop_backtest(fare_sig):
+    # per group, per observation: ask fare_decision, walk forward to the first BOOK_NOW (or the last row)
+    savings = []
+    for _, g in fare_sig.groupby(["route", "departure_date", "airline"], sort=True):
+        p = g["price"].to_numpy()
+        dec = [fare_decision(t, v)[0] for t, v in zip(g["trend_recent_pct"], g["volatility_recent"])]
+        for i in range(len(p) - 1):
+            j = next(j for j in range(i, len(p)) if dec[j] == "BOOK_NOW" or j == len(p) - 1)
+            savings.append(p[i] - p[j])
+    return np.array(savings)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--groups", type=int, default=100_000)
+    ap.add_argument("--loop-groups", type=int, default=2_000, help="groups replayed by the per-row loop")
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    args = ap.parse_args()
+
+    df = pd.concat(synthetic_chunks(args.rows, args.groups, 500_000), ignore_index=True)
+    df = add_signals(df.sort_values(["route", "departure_date", "airline", "observed_at"], ignore_index=True))
+
+    t = time.perf_counter()
+    replay = Replay.from_frame(df)
+    t_build = time.perf_counter() - t
+    t = time.perf_counter()
+    tot = replay.totals()
+    t_score = time.perf_counter() - t
+    print(f"rows={len(replay):,} groups={replay.n_groups:,} | replay build {t_build:.2f}s | "
+          f"one policy {t_score * 1e3:.0f} ms ({t_score / len(replay) * 1e9:.1f} ns/row) | "
+          f"mean savings {tot['mean_savings']:.2f} | mean regret {tot['mean_regret']:.2f}")
+
+    keys = df[["route", "departure_date", "airline"]].drop_duplicates().sort_values(["route", "departure_date",
+                                                                                      "airline"])
+    part = df.merge(keys.head(args.loop_groups), on=["route", "departure_date", "airline"])
+    t = time.perf_counter()
+    ref = loop_backtest(part)
+    t_loop = time.perf_counter() - t
+    sub = Replay.from_frame(part)
+    got = sub.score()[2][~sub.last]
+    assert np.allclose(got, ref), "vectorized savings differ from the per-row replay"
+    print(f"per-row loop: {len(part):,} rows in {t_loop:.2f}s -> {t_loop / len(part) * 1e6:.0f} s per million rows "
+          f"(vectorized: {t_score / len(replay) * 1e6:.2f} s per million rows)")
+
+    # decide() must agree with fare_decision row by row, also for overlapping thresholds
+    sample = np.random.default_rng(0).integers(0, len(replay), 5_000)
+    for policy in ({"trend_up": 0.05, "trend_down": -0.05, "vol_max": 0.10},
+                   {"trend_up": -0.10, "trend_down": 0.10, "vol_max": 0.30}):
+        got = DECISIONS[replay.decide(policy)[sample]]
+        ref = [fare_decision(t, v, policy)[0] for t, v in zip(replay.trend[sample], replay.vol[sample])]
+        assert list(got) == ref, f"decide() differs from fare_decision for {policy}"
+
+    grid = policy_grid(trend_up=[0.02, 0.05, 0.10, 0.15], trend_down=[-0.02, -0.05, -0.10],
+                       vol_max=[0.05, 0.10, 0.20, 0.30], hold=["wait", "book"])
+    for w in args.workers:
+        t = time.perf_counter()
+        res = sweep(replay, grid, workers=w)
+        secs = time.perf_counter() - t
+        print(f"sweep {len(grid)} policies, workers={w}: {secs:6.2f}s ({secs / len(grid) * 1e3:.0f} ms/policy)")
+    print(res.head(3).to_string())
@@ -0,0 +1,75 @@
+# ============================================
+# BENCH: legacy clean_chunk vs typed parsing (pandas dtypes / pyarrow reader)
+# Read + clean throughput in rows/s, and a check that all paths give the same rows.
+# Usage: python benchmarks/bench_clean_chunk.py --rows 1000000
+# ============================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_ingest import (PYARROW_AVAILABLE, clean_chunk, clean_chunk_typed, iter_typed_chunks,
+                         sniff_schema, use_cols)
+
+from bench_parallel_ingest import SPEC
+from synth_data import write_itineraries
+
+OUT_COLS = ["route", "origin", "dest", "observed_at", "departure_date", "airline", "price"]
+
+
+def canonical(parts):
+    df = pd.concat(parts, ignore_index=True)[OUT_COLS]
+    for c in ["route", "origin", "dest", "airline"]:
+        df[c] = df[c].astype(str)
+    df["observed_at"] = df["observed_at"].astype("datetime64[ns]")
+    return df.reset_index(drop=True)
+
+
+def run_legacy(path, chunk_rows):
+    reader = pd.read_csv(path, usecols=use_cols(SPEC), chunksize=chunk_rows, low_memory=False)
+    return [clean_chunk(ch, SPEC) for ch in reader]
+
+
+def run_typed(path, chunk_rows, engine):
+    schema = sniff_schema(path, SPEC)
+    return [clean_chunk_typed(ch, SPEC, schema) for ch in iter_typed_chunks(path, SPEC, schema, chunk_rows, engine)]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--chunk-rows", type=int, default=250_000)
+    ap.add_argument("--csv", default=None, help="reuse an existing itineraries.csv")
+    args = ap.parse_args()
+
+    path = args.csv or os.path.join(tempfile.gettempdir(), f"itineraries_{args.rows}.csv")
+    if not os.path.exists(path):
+        write_itineraries(path, args.rows)
+    print(f"csv={path} ({os.path.getsize(path) / 1024**2:,.0f} MB)")
+
+    runs = [("legacy", lambda: run_legacy(path, args.chunk_rows)),
+            ("typed/pandas", lambda: run_typed(path, args.chunk_rows, "pandas"))]
+    if PYARROW_AVAILABLE:
+        runs.append(("typed/pyarrow", lambda: run_typed(path, args.chunk_rows, "pyarrow")))
+
+    ref = None
+    for name, fn in runs:
+        t = time.perf_counter()
+        parts = fn()
+        secs = time.perf_counter() - t
+        rows = sum(len(p) for p in parts)
+        out = canonical(parts)
+        if ref is None:
+            ref, t_ref, note = out, secs, ""
+        else:
+            same = (len(out) == len(ref)
+                    and out.drop(columns="price").equals(ref.drop(columns="price"))
+                    and np.allclose(out["price"], ref["price"], rtol=0, atol=0.005))
+            note = f" | speedup x{t_ref / secs:4.2f} | same rows as legacy: {same}"
+        print(f"{name:>14}: {secs:7.2f}s | {rows / secs:12,.0f} rows/s{note}")
@@ -0,0 +1,80 @@
+# ============================================
+# BENCH: "cheapest k destinations from ORIGIN departing in [X, Y]" per query,
+# DealIndex vs. the groupby over fare_sig it replaces, as the table grows.
+# Also reports the index build and the update() cost after one 2,000-row chunk
+# lands in a FareStore (the live tail path). Answers are checked against the
+# groupby for every size.
+# Usage: python benchmarks/bench_deals.py --rows 100000 1000000 5000000 --queries 200
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from deal_index import DealIndex
+from fare_store import FareStore
+
+from bench_fare_store import synthetic_chunks
+
+
+def groupby_cheapest(df, origin, k, date_from, date_to):
+    d = df[df["route"].str.startswith(origin + "-")
+           & (df["departure_date"] >= date_from) & (df["departure_date"] <= date_to)]
+    latest = d.sort_values("observed_at", kind="stable").groupby(["route", "departure_date", "airline"]).tail(1)
+    return latest.groupby("route")["price"].min().nsmallest(k, keep="first")
+
+
+def pct(x, q):
+    return float(np.percentile(x, q)) * 1e3
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    ap.add_argument("--rows-per-group", type=int, default=10)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--baseline-queries", type=int, default=5)
+    ap.add_argument("-k", type=int, default=20)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    for rows in args.rows:
+        df = pd.concat(synthetic_chunks(rows, max(rows // args.rows_per_group, 1), 500_000), ignore_index=True)
+        dates = np.sort(df["departure_date"].unique())
+        origins = df["route"].str.split("-").str[0].unique()
+        qs = [(rng.choice(origins), *sorted(rng.choice(dates, 2))) for _ in range(args.queries)]
+
+        t = time.perf_counter()
+        idx = DealIndex.from_frame(df)
+        build = time.perf_counter() - t
+
+        lat = []
+        for o, lo, hi in qs:
+            t = time.perf_counter()
+            got = idx.cheapest_destinations(o, args.k, lo, hi)
+            lat.append(time.perf_counter() - t)
+        base = []
+        for o, lo, hi in qs[:args.baseline_queries]:
+            t = time.perf_counter()
+            ref = groupby_cheapest(df, o, args.k, lo, hi)
+            base.append(time.perf_counter() - t)
+            got = idx.cheapest_destinations(o, args.k, lo, hi)
+            assert np.allclose(got["latest_price"].to_numpy(), ref.to_numpy()), (o, lo, hi)
+
+        store = FareStore(keep_last_n=60)
+        store.insert_frame(df)
+        live = DealIndex.from_store(store)
+        chunk = df.sample(2_000, random_state=1).assign(observed_at=df["observed_at"].max() + pd.Timedelta(hours=1))
+        touched = store.insert_frame(chunk)
+        t = time.perf_counter()
+        live.update(touched)
+        upd = time.perf_counter() - t
+
+        print(f"rows={rows:>10,} groups={len(idx):>9,} | build {build:6.2f}s | "
+              f"index p50 {pct(lat, 50):6.2f} ms p95 {pct(lat, 95):6.2f} ms | "
+              f"groupby p50 {pct(base, 50):8.1f} ms | update(2k rows) {upd * 1e3:6.1f} ms")
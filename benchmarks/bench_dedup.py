@@ -0,0 +1,69 @@
+# ============================================
+# BENCH: serial ingest with / without ObservationDedup on an itineraries file
+# with repeated (legId, searchDate, totalFare) rows. Each mode runs in a fresh
+# process; reports seconds and peak RSS per million rows, filter size, rows
+# dropped vs the exact duplicate count, and real rows lost to false positives.
+# Usage: python benchmarks/bench_dedup.py --rows 2000000 --dup-rate 0.3
+# ============================================
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset_loader import peak_rss_mb
+from fare_ingest import ingest_serial
+from observation_dedup import ObservationDedup
+
+from bench_parallel_ingest import SPEC
+from synth_data import write_itineraries
+
+SPEC_LEG = {**SPEC, "leg": "legId"}
+
+
+def run_mode(path, fp_rate, fast):
+    dedup = ObservationDedup.for_file(path, fp_rate) if fp_rate else None
+    t = time.perf_counter()
+    ingest_serial(path, SPEC_LEG if fp_rate else SPEC, progress_every=0, fast=fast, dedup=dedup)
+    secs = time.perf_counter() - t
+    return {"seconds": secs, "peak_rss_mb": peak_rss_mb(),
+            **(dedup.summary() if dedup else {})}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--dup-rate", type=float, default=0.3)
+    ap.add_argument("--legacy", action="store_true", help="legacy parser instead of the typed fast path")
+    ap.add_argument("--data", default=None, help="itineraries CSV (default: generated)")
+    args = ap.parse_args()
+
+    path = args.data or os.path.join(tempfile.mkdtemp(), "itineraries.csv")
+    if not args.data:
+        write_itineraries(path, args.rows, dup_rate=args.dup_rate)
+    keys = pd.read_csv(path, usecols=["legId", "searchDate", "totalFare"], dtype=str)
+    rows, dups = len(keys), int(keys.duplicated().sum())
+    del keys
+    per_m = 1e6 / rows
+    print(f"{path}: {os.path.getsize(path) / 1024**2:,.0f} MB, {rows:,} rows, exact duplicates {dups:,}")
+
+    ctx = multiprocessing.get_context("spawn")
+    base = None
+    for name, fp in [("no dedup", None), ("fp 0.01", 0.01), ("fp 0.001", 0.001)]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            res = ex.submit(run_mode, path, fp, not args.legacy).result()
+        base = base or res
+        line = (f"{name:<9} {res['seconds'] * per_m:6.2f} s/M rows "
+                f"(+{(res['seconds'] - base['seconds']) * per_m:5.2f}) | peak RSS {res['peak_rss_mb']:7.1f} MB "
+                f"(+{res['peak_rss_mb'] - base['peak_rss_mb']:6.1f})")
+        if fp:
+            line += (f" | filter {res['filter_mb'] / rows * 1e6:5.2f} MB/M rows | dropped {res['dropped']:,} "
+                     f"| real rows lost {res['dropped'] - dups:,}")
+        print(line)
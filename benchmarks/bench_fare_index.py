@@ -0,0 +1,110 @@
+# ============================================
+# BENCH: scan-based get_live_fare vs FareIndex (single + batch)
+# Usage: python benchmarks/bench_fare_index.py --rows 300000 --queries 2000
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_index import FareIndex, fare_decision
+from fare_signals import add_signals
+from fare_store import FareStore
+
+from bench_fare_store import synthetic_chunks
+
+
+def legacy_get_live_fare(route, now=None, departure_date=None, airline=None, df=None):
+    if now is None:
+        now = pd.Timestamp.now()
+    d = df[df["route"] == route].copy()
+    if departure_date is not None:
+        dd = pd.to_datetime(departure_date, errors="coerce").date()
+        d = d[d["departure_date"] == dd]
+    if airline is not None:
+        d = d[d["airline"].astype(str).str.lower() == str(airline).lower()]
+    d = d[d["observed_at"] <= pd.to_datetime(now)]
+    if len(d) == 0:
+        return {"ok": False, "reason": "No observations for that route/time filter."}
+    row = d.sort_values("observed_at").iloc[-1]
+    trend, vol = row.get("trend_recent_pct", np.nan), row.get("volatility_recent", np.nan)
+    decision, explanation = fare_decision(trend, vol)
+    return {"ok": True, "route": row["route"], "departure_date": row["departure_date"],
+            "airline": row["airline"], "observed_at": row["observed_at"],
+            "current_price": float(row["price"]), "decision": decision}
+
+
+def random_queries(fare_sig, n, seed=1):
+    rng = np.random.default_rng(seed)
+    pick = fare_sig.iloc[rng.integers(0, len(fare_sig), n)]
+    t0, t1 = fare_sig["observed_at"].min(), fare_sig["observed_at"].max()
+    now = t0 + (t1 - t0) * rng.random(n)
+    q = pd.DataFrame({"route": pick["route"].to_numpy(), "now": now})
+    q["departure_date"] = np.where(rng.random(n) < 0.5, pick["departure_date"].to_numpy(), None)
+    q["airline"] = np.where(rng.random(n) < 0.5, pick["airline"].str.upper().to_numpy(), None)
+    return q
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=300_000)
+    ap.add_argument("--groups", type=int, default=10_000)
+    ap.add_argument("--queries", type=int, default=2_000)
+    args = ap.parse_args()
+
+    store = FareStore(keep_last_n=60)
+    for ch in synthetic_chunks(args.rows, args.groups, 250_000):
+        store.insert_frame(ch)
+    fare_sig = add_signals(store.to_frame().sort_values(["route", "departure_date", "airline", "observed_at"]))
+    q = random_queries(fare_sig, args.queries)
+    recs = [{k: (None if v is None or (not isinstance(v, str) and pd.isna(v)) else v) for k, v in r.items()}
+            for r in q.to_dict("records")]
+
+    t = time.perf_counter()
+    idx = FareIndex(fare_sig)
+    for lvl in [(False, False), (True, False), (False, True), (True, True)]:
+        idx._level(lvl)
+    t_build = time.perf_counter() - t
+
+    n_legacy = min(len(recs), 300)
+    t = time.perf_counter()
+    legacy = [legacy_get_live_fare(df=fare_sig, **r) for r in recs[:n_legacy]]
+    t_legacy = (time.perf_counter() - t) / n_legacy
+
+    t = time.perf_counter()
+    single = [idx.get_live_fare(**r) for r in recs]
+    t_single = (time.perf_counter() - t) / len(recs)
+
+    t = time.perf_counter()
+    batch = idx.get_live_fares(q)
+    t_batch = (time.perf_counter() - t) / len(recs)
+
+    print(f"fare_sig rows={len(fare_sig):,} | index build {t_build:.3f}s")
+    print(f"{'legacy scan':>14}: {t_legacy * 1e6:10.1f} us/query  ({1 / t_legacy:12,.0f} q/s)")
+    print(f"{'index single':>14}: {t_single * 1e6:10.1f} us/query  ({1 / t_single:12,.0f} q/s)")
+    print(f"{'index batch':>14}: {t_batch * 1e6:10.1f} us/query  ({1 / t_batch:12,.0f} q/s)")
+
+    keys = ["ok", "route", "departure_date", "airline", "current_price"]
+    same = all({k: a.get(k) for k in keys} == {k: b.get(k) for k in keys}
+               for a, b in zip(legacy, single))
+    print("single matches legacy:", same, "| batch matches single:", batch == single)
+
+    # batch parsing must match the scalar path when one batch mixes date formats
+    mixed = q.copy()
+    now = pd.to_datetime(mixed["now"])
+    mixed["now"] = [t.strftime("%Y-%m-%d") if i % 3 == 0 else t.strftime("%Y-%m-%d %H:%M:%S") if i % 3 == 1
+                    else t.strftime("%m/%d/%Y %H:%M") for i, t in enumerate(now)]
+    mixed["departure_date"] = [None if d is None else pd.Timestamp(d).strftime("%m/%d/%Y" if i % 2 else "%Y-%m-%d")
+                               for i, d in enumerate(mixed["departure_date"])]
+    mixed_recs = [{k: (None if v is None or (not isinstance(v, str) and pd.isna(v)) else v) for k, v in r.items()}
+                  for r in mixed.to_dict("records")]
+    mixed_batch = idx.get_live_fares(mixed)
+    mixed_single = [idx.get_live_fare(**r) for r in mixed_recs]
+    assert mixed_batch == mixed_single, "batch answers differ from scalar ones on mixed date formats"
+    print("mixed date formats: batch matches single:", mixed_batch == mixed_single,
+          f"| found {sum(a['ok'] for a in mixed_batch):,}/{len(mixed_batch):,}")
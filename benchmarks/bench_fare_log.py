@@ -0,0 +1,70 @@
+# ============================================
+# BENCH: full route history from an in-memory DataFrame (boolean filter + sort)
+#        vs FareLog (append-only records on disk, memory-mapped reads)
+# Synthetic cleaned chunks (bench_fare_store.synthetic_chunks), so it runs offline.
+# Usage: python benchmarks/bench_fare_log.py --rows 2000000 --groups 20000 --queries 200
+# ============================================
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_log import FareLog
+
+from bench_fare_store import synthetic_chunks
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--groups", type=int, default=20_000)
+    ap.add_argument("--chunk-rows", type=int, default=250_000)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    chunks = list(synthetic_chunks(args.rows, args.groups, args.chunk_rows))
+    root = tempfile.mkdtemp()
+    try:
+        log = FareLog.create(root)
+        t = time.perf_counter()
+        for ch in chunks:
+            log.append(ch)
+        t_append = time.perf_counter() - t
+        t = time.perf_counter()
+        log.compact()
+        t_compact = time.perf_counter() - t
+        print(f"append  {t_append:7.2f}s ({args.rows / t_append:,.0f} rows/s) | compact {t_compact:6.2f}s "
+              f"| {log.nbytes_on_disk() / 1024**2:,.1f} MB on disk, {log.meta['groups']:,} groups")
+
+        full = pd.concat(chunks, ignore_index=True)
+        print(f"in-memory frame {full.memory_usage(deep=True).sum() / 1024**2:,.1f} MB")
+        routes = np.random.default_rng(1).choice(full["route"].unique(), args.queries)
+
+        t = time.perf_counter()
+        for r in routes:
+            d = full[full["route"] == r].sort_values("observed_at", kind="stable")
+        t_frame = (time.perf_counter() - t) / len(routes)
+
+        log = FareLog(root)   # cold open: meta + group table only
+        t = time.perf_counter()
+        for r in routes:
+            d = log.rows(r)
+        t_log = (time.perf_counter() - t) / len(routes)
+
+        groups = log.group_codes(routes[0])
+        t = time.perf_counter()
+        for g in groups.tolist():
+            h = log.history(g)
+        t_hist = (time.perf_counter() - t) / max(len(groups), 1)
+
+        print(f"route history: frame filter {t_frame * 1e3:8.2f} ms | FareLog.rows {t_log * 1e3:8.2f} ms "
+              f"| FareLog.history (view) {t_hist * 1e6:6.1f} us per group")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
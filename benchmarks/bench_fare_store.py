@@ -0,0 +1,110 @@
+# ============================================
+# BENCH: dict-of-DataFrames store vs FareStore
+# Synthetic cleaned chunks (same columns clean_chunk returns), so it runs offline.
+# Usage: python benchmarks/bench_fare_store.py --rows 200000 --groups 5000
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_store import FareStore
+
+
+def synthetic_chunks(rows, groups, chunk_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    airports = np.array(["ATL", "BOS", "CLT", "DEN", "DFW", "DTW", "EWR", "IAD",
+                         "JFK", "LAX", "LGA", "MIA", "OAK", "ORD", "PHL", "SFO"])
+    airlines = np.array(["Delta", "United", "American Airlines", "JetBlue Airways", "Spirit Airlines"])
+    dates = pd.date_range("2022-05-01", periods=60, freq="D").date
+
+    g_route = np.char.add(np.char.add(rng.choice(airports, groups), "-"), rng.choice(airports, groups))
+    g_dep = rng.choice(np.array(dates, dtype=object), groups)
+    g_air = rng.choice(airlines, groups)
+
+    t0 = pd.Timestamp("2022-04-16").value
+    done = 0
+    while done < rows:
+        n = min(chunk_rows, rows - done)
+        g = rng.integers(0, groups, n)
+        # unique timestamps -> the unstable legacy sort has no ties to disagree on
+        ts = t0 + (done + rng.permutation(n)) * 1_000_000_000
+        yield pd.DataFrame({
+            "observed_at": pd.to_datetime(ts),
+            "route": g_route[g],
+            "departure_date": g_dep[g],
+            "airline": g_air[g],
+            "price": rng.gamma(4.0, 90.0, n).round(2),
+        })
+        done += n
+
+
+def run_legacy(chunks, keep_n):
+    store = {}
+
+    def store_update(key, df_new):
+        if key not in store:
+            store[key] = df_new
+        else:
+            store[key] = pd.concat([store[key], df_new], ignore_index=True)
+        store[key] = store[key].sort_values("observed_at").tail(keep_n)
+
+    for ch in chunks:
+        for key, g in ch.groupby(["route", "departure_date", "airline"]):
+            store_update(key, g[["observed_at", "route", "departure_date", "airline", "price"]])
+    retained = sum(int(v.memory_usage(deep=True).sum()) for v in store.values())
+    return pd.concat(store.values(), ignore_index=True), retained
+
+
+def run_fare_store(chunks, keep_n):
+    store = FareStore(keep_last_n=keep_n)
+    for ch in chunks:
+        store.insert_frame(ch)
+    retained = store.nbytes()
+    return store.to_frame(), retained
+
+
+def measure(fn, chunks, keep_n):
+    # timed run untraced (tracemalloc slows allocation-heavy code a lot), then a traced run for peak
+    t = time.perf_counter()
+    out, retained = fn(chunks, keep_n)
+    secs = time.perf_counter() - t
+    tracemalloc.start()
+    fn(chunks, keep_n)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, secs, peak, retained
+
+
+def canonical(df):
+    df = df.copy()
+    df["observed_at"] = df["observed_at"].astype("datetime64[ns]")
+    return df.sort_values(["route", "departure_date", "airline", "observed_at"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--groups", type=int, default=5_000)
+    ap.add_argument("--chunk-rows", type=int, default=250_000)
+    ap.add_argument("--keep-n", type=int, default=60)
+    args = ap.parse_args()
+
+    chunks = list(synthetic_chunks(args.rows, args.groups, args.chunk_rows))
+    print(f"rows={args.rows:,} groups={args.groups:,} chunk_rows={args.chunk_rows:,} keep_n={args.keep_n}")
+
+    results = {}
+    for name, fn in [("dict_of_dataframes", run_legacy), ("fare_store", run_fare_store)]:
+        out, secs, peak, retained = measure(fn, chunks, args.keep_n)
+        results[name] = out
+        print(f"{name:>20}: {secs:8.2f}s | {args.rows / secs:12,.0f} rows/s | "
+              f"peak {peak / 1024**2:8.1f} MB | retained {retained / 1024**2:8.1f} MB | rows out {len(out):,}")
+
+    same = canonical(results["dict_of_dataframes"]).equals(canonical(results["fare_store"]))
+    print("identical fare_sig:", same)
@@ -0,0 +1,55 @@
+# ============================================
+# BENCH: serial vs multi-process ingest (throughput scaling 1..N workers)
+# Usage: python benchmarks/bench_parallel_ingest.py --rows 2000000 --max-workers 8
+# ============================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_ingest import ingest_parallel, ingest_serial
+
+from synth_data import write_itineraries
+
+SPEC = {"time": "searchDate", "origin": "startingAirport", "dest": "destinationAirport",
+        "price": "totalFare", "airline": "segmentsAirlineName", "dep_dt": "flightDate"}
+
+
+def fare_table(store):
+    return (store.to_frame()
+                 .sort_values(["route", "departure_date", "airline", "observed_at", "price"])
+                 .reset_index(drop=True))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--mem-cap-mb", type=int, default=1024)
+    ap.add_argument("--csv", default=None, help="reuse an existing itineraries.csv")
+    args = ap.parse_args()
+
+    path = args.csv or os.path.join(tempfile.gettempdir(), f"itineraries_{args.rows}.csv")
+    if not os.path.exists(path):
+        write_itineraries(path, args.rows)
+    mb = os.path.getsize(path) / 1024**2
+    print(f"csv={path} ({mb:,.0f} MB, {args.rows:,} rows)")
+
+    t = time.perf_counter()
+    ref_store, _ = ingest_serial(path, SPEC, progress_every=0)
+    t_serial = time.perf_counter() - t
+    ref = fare_table(ref_store)
+    print(f"{'serial':>10}: {t_serial:7.2f}s | {args.rows / t_serial:12,.0f} rows/s | {mb / t_serial:7.1f} MB/s")
+
+    w = 1
+    while w <= args.max_workers:
+        t = time.perf_counter()
+        store, _ = ingest_parallel(path, SPEC, workers=w, mem_cap_mb=args.mem_cap_mb, progress_every=0)
+        secs = time.perf_counter() - t
+        same = fare_table(store).equals(ref)
+        print(f"{'workers=' + str(w):>10}: {secs:7.2f}s | {args.rows / secs:12,.0f} rows/s | "
+              f"speedup x{t_serial / secs:4.2f} | identical to serial: {same}")
+        w *= 2
@@ -0,0 +1,125 @@
+# ============================================
+# BENCH: notebook-style per-row predict_price vs FarePredictor.predict_fares
+# Trains a small HistGradientBoosting + ColumnTransformer artifact (the notebook's
+# sklearn layout) on synthetic itineraries, then scores horizon-sweep requests:
+# every (route, flight date) asked at several search dates, as forecast_booking_horizon does.
+# Reports CPU seconds per 100k predictions and checks both paths agree.
+# Usage: python benchmarks/bench_predict.py --train-rows 200000 --requests 200000
+# ============================================
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_model import (BOOLEAN_FEATURES, CATEGORICAL_FEATURES, FEATURE_COLUMNS, NUMERICAL_FEATURES,
+                        FarePredictor, build_route_profiles, engineer_features, fill_values_from, valid_rows)
+
+from synth_data import itineraries_frame
+
+
+def train_artifact(rows, seed=0):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import HistGradientBoostingRegressor
+    from sklearn.preprocessing import OneHotEncoder
+
+    feat = engineer_features(itineraries_frame(rows, seed=seed))
+    feat = feat[valid_rows(feat)]
+    pre = ColumnTransformer([
+        ("cat", OneHotEncoder(drop="first", sparse_output=False, handle_unknown="ignore"), CATEGORICAL_FEATURES),
+        ("num", "passthrough", NUMERICAL_FEATURES + BOOLEAN_FEATURES),
+    ])
+    X = pre.fit_transform(feat[FEATURE_COLUMNS])
+    model = HistGradientBoostingRegressor(max_iter=100, random_state=seed).fit(X, np.log1p(feat["totalFare"]))
+    return {"model": model, "model_name": "HistGradientBoosting", "preprocessor": pre,
+            "feature_columns": FEATURE_COLUMNS, "log_transform": True,
+            "fill_values": fill_values_from(feat), "route_profiles": build_route_profiles(feat)}
+
+
+def horizon_requests(profiles, n, seed=1, searches=(0, 7, 14, 21, 30)):
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp("2022-06-01")
+    m = n // len(searches)
+    o, d = np.array([r.split("_") for r in profiles.index[rng.integers(0, len(profiles), m)]]).T
+    flight = base + pd.to_timedelta(rng.integers(30, 90, m), unit="D")
+    req = pd.concat([pd.DataFrame({"origin": o, "destination": d, "flight_date": flight,
+                                   "search_date": flight - pd.Timedelta(days=30 - s)}) for s in searches])
+    return req.reset_index(drop=True)
+
+
+def notebook_predict_price(artifact, row):
+    # cell 16: input dict built by hand, one DataFrame per request, transform, predict
+    # (route medians from the profiles rather than cell 16's df_clean scan, so this is a lower bound)
+    o, d = row["origin"], row["destination"]
+    prof = artifact["route_profiles"].loc[f"{o}_{d}"]
+    flight, search = pd.Timestamp(row["flight_date"]), pd.Timestamp(row["search_date"])
+    days = (flight - search).days
+    dur, dist = prof["duration_minutes"], prof["totalTravelDistance"]
+    window = ("last_minute" if days <= 3 else "one_week" if days <= 7 else "two_weeks" if days <= 14
+              else "one_month" if days <= 30 else "advance")
+    input_data = {
+        "startingAirport": o, "destinationAirport": d, "route": f"{o}_{d}",
+        "segmentsAirlineName": prof["segmentsAirlineName"], "segmentsCabinCode": "coach",
+        "booking_window_category": window, "days_to_departure": days, "duration_minutes": dur,
+        "search_month": search.month, "search_day_of_week": search.dayofweek,
+        "flight_month": flight.month, "flight_day_of_week": flight.dayofweek,
+        "elapsedDays": 0, "seatsRemaining": 7, "totalTravelDistance": dist,
+        "booking_urgency": np.exp(-days / 10), "duration_efficiency": dist / (dur + 1),
+        "isBasicEconomy": False, "isRefundable": False, "isNonStop": True,
+        "search_is_weekend": int(search.dayofweek >= 5), "flight_is_weekend": int(flight.dayofweek >= 5),
+        "is_peak_season": int(flight.month in [6, 7, 8, 12]), "has_connection": 0, "seats_scarcity": 0,
+    }
+    X = pd.DataFrame([input_data])[artifact["feature_columns"]]
+    return float(np.expm1(artifact["model"].predict(artifact["preprocessor"].transform(X))[0]))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--train-rows", type=int, default=200_000)
+    ap.add_argument("--requests", type=int, default=200_000)
+    ap.add_argument("--legacy-requests", type=int, default=500)
+    args = ap.parse_args()
+
+    try:
+        import joblib
+    except ImportError:
+        sys.exit("bench_predict needs scikit-learn (joblib)")
+
+    artifact = train_artifact(args.train_rows)
+    path = os.path.join(tempfile.mkdtemp(), "fare_model.pkl")
+    joblib.dump(artifact, path)
+    t = time.process_time()
+    predictor = FarePredictor.load(path)
+    print(f"artifact load: {time.process_time() - t:.3f}s CPU")
+
+    req = horizon_requests(predictor.profiles, args.requests)
+    print(f"{len(req):,} requests, {len(req.drop_duplicates()):,} distinct")
+
+    rows = req.head(args.legacy_requests).to_dict("records")
+    t = time.process_time()
+    legacy = np.array([notebook_predict_price(artifact, r) for r in rows])
+    per_100k = (time.process_time() - t) / len(rows) * 100_000
+    print(f"per-row predict_price  {per_100k:9.2f}s CPU / 100k (extrapolated from {len(rows):,})")
+
+    cold = FarePredictor.load(path, cache_size=0)
+    t = time.process_time()
+    batch = cold.predict_fares(req)
+    print(f"predict_fares (no LRU) {(time.process_time() - t) / len(req) * 100_000:9.2f}s CPU / 100k")
+
+    t = time.process_time()
+    predictor.predict_fares(req)
+    print(f"predict_fares (cold)   {(time.process_time() - t) / len(req) * 100_000:9.2f}s CPU / 100k")
+    predictor.hits = predictor.misses = 0
+    t = time.process_time()
+    warm = predictor.predict_fares(req)
+    print(f"predict_fares (warm)   {(time.process_time() - t) / len(req) * 100_000:9.2f}s CPU / 100k "
+          f"(LRU hits {predictor.hits:,} / misses {predictor.misses:,})")
+
+    assert np.allclose(legacy, batch[:len(rows)], rtol=1e-9), "batch scoring disagrees with per-row path"
+    assert np.array_equal(batch, warm)
+    print("per-row and batch predictions agree")
@@ -0,0 +1,78 @@
+# ============================================
+# BENCH: legacy groupby-rolling add_signals vs vectorized / incremental signals
+# Usage: python benchmarks/bench_signals.py --rows 200000 --groups 5000
+# ============================================
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_signals import SIGNAL_COLS, IncrementalSignals, add_signals
+from fare_store import FareStore
+
+from bench_fare_store import synthetic_chunks
+
+
+def legacy_add_signals(df, k=12):
+    df = df.copy()
+    grp = ["route", "departure_date", "airline"]
+
+    df["price_prev"] = df.groupby(grp)["price"].shift(1)
+    df["pct_change_prev"] = (df["price"] - df["price_prev"]) / df["price_prev"]
+    df["volatility_recent"] = (
+        df.groupby(grp)["price"].rolling(k, min_periods=4).std().reset_index(level=grp, drop=True)
+        /
+        df.groupby(grp)["price"].rolling(k, min_periods=4).mean().reset_index(level=grp, drop=True)
+    )
+    first = (df.groupby(grp)["price"]
+               .rolling(k, min_periods=4)
+               .apply(lambda x: pd.Series(x).iloc[0], raw=False)
+               .reset_index(level=grp, drop=True))
+    df["trend_recent_pct"] = (df["price"] - first) / first
+    df["obs_count_in_group"] = df.groupby(grp)["price"].transform("size")
+    return df
+
+
+def timed(fn, *a, **kw):
+    t = time.perf_counter()
+    out = fn(*a, **kw)
+    return out, time.perf_counter() - t
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--groups", type=int, default=5_000)
+    ap.add_argument("--chunk-rows", type=int, default=50_000)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+
+    chunks = list(synthetic_chunks(args.rows, args.groups, args.chunk_rows))
+    store = FareStore(keep_last_n=60)
+    inc = IncrementalSignals(store, k=12)
+    t_inc = 0.0
+    for ch in chunks:
+        touched = store.insert_frame(ch)
+        _, dt = timed(inc.update, touched)
+        t_inc += dt
+    fare_sig = store.to_frame().sort_values(["route", "departure_date", "airline", "observed_at"])
+    print(f"fare_sig rows={len(fare_sig):,} groups={len(store):,}")
+
+    new, t_new = timed(add_signals, fare_sig, k=12)
+    print(f"{'vectorized add_signals':>28}: {t_new:8.3f}s")
+    print(f"{'incremental (per chunk)':>28}: {t_inc / len(chunks):8.3f}s avg over {len(chunks)} chunks")
+
+    inc_df = inc.to_frame().sort_values(["route", "departure_date", "airline", "observed_at"])
+    print("incremental == full recompute:",
+          np.allclose(inc_df[SIGNAL_COLS].to_numpy(float), new[SIGNAL_COLS].to_numpy(float), equal_nan=True))
+
+    if not args.skip_legacy:
+        old, t_old = timed(legacy_add_signals, fare_sig, k=12)
+        print(f"{'legacy groupby-rolling':>28}: {t_old:8.3f}s  ({t_old / t_new:,.0f}x slower)")
+        print("matches legacy:",
+              np.allclose(old[SIGNAL_COLS].to_numpy(float), new[SIGNAL_COLS].to_numpy(float), equal_nan=True))
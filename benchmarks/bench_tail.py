@@ -0,0 +1,178 @@
+# ============================================
+# BENCH: live tail, end-to-end latency from a new CSV drop to the updated
+# get_live_fare answer. A FareTail seeded from a synthetic itineraries file
+# (cleaned as in 1.py: per-route trim, repeat drop, top MAX_ROUTES routes)
+# polls a drop directory on its own thread; every drop carries repeated rows,
+# a few garbage fares and one marker row (fixed route, a later search date, a
+# fresh in-range fare), and a reader thread keeps asking get_live_fare(route)
+# until the marker's fare comes back. Reports drop -> snapshot published
+# (FareTail.wait_for) and drop -> answer p50/p95/max, reader QPS meanwhile and
+# the per-poll stage times. Afterwards the snapshot's get_live_fares answers
+# are checked against a FareIndex over a batch re-ingest of the seed plus every
+# drop with the same cleaning, once as left by the run and once after a forced
+# rebase.
+# Usage: python benchmarks/bench_tail.py --seed-rows 1000000 --appends 50 --batch-rows 2000
+# ============================================
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fare_compact import compact_frame, readable_frame
+from fare_index import FareIndex
+from fare_ingest import consume_chunk, ingest_serial, use_cols
+from fare_signals import add_signals
+from fare_store import FareStore
+from fare_tail import FareTail
+from observation_dedup import ObservationDedup
+from route_quantiles import RouteQuantiles
+
+from bench_parallel_ingest import SPEC
+from synth_data import itineraries_frame, write_itineraries
+
+MARKER = ("ATL", "BOS")
+TAIL_SPEC = {**SPEC, "leg": "legId"}
+ROUTE_TRIM, DEDUP_FP_RATE, MAX_ROUTES = (0.005, 0.995), 0.001, 5000   # 1.py's settings
+
+
+def fare_table(store):
+    return store.to_frame().sort_values(["route", "departure_date", "airline", "observed_at"])
+
+
+def seed_batch(path, max_routes):
+    # 1.py's build_fare_sig: ingest with trim + dedup, keep the top routes, final trim
+    route_q = RouteQuantiles(trim=ROUTE_TRIM)
+    dedup = ObservationDedup.for_file(path, DEDUP_FP_RATE)
+    store, route_hh = ingest_serial(path, TAIL_SPEC, progress_every=0, fast=True, quantiles=route_q, dedup=dedup)
+    extra = set(route_hh.tracked()) - set(route_hh.top(max_routes))
+    store.evict_routes(extra)
+    route_q.evict(extra)
+    fare_sig = fare_table(store)
+    return fare_sig[route_q.keep_mask(fare_sig["route"], fare_sig["price"])], route_hh, route_q, dedup
+
+
+def rebuilt_index(seed_path, drops, max_routes):
+    # batch path over the same rows: the seed again, then every drop as one chunk in
+    # drop order through consume_chunk with the batch's counts / sketch / filter
+    fare_sig, route_hh, route_q, dedup = seed_batch(seed_path, max_routes)
+    store = FareStore()
+    store.insert_frame(fare_sig)
+    for p in drops:
+        consume_chunk(pd.read_csv(p, usecols=use_cols(TAIL_SPEC), low_memory=False), TAIL_SPEC, store, route_hh,
+                      quantiles=route_q, dedup=dedup)
+    store.evict_routes(set(route_hh.tracked()) - set(route_hh.top(max_routes)))
+    return FareIndex(compact_frame(add_signals(fare_table(store))))
+
+
+def check_queries(rebuilt, n, seed=2):
+    rng = np.random.default_rng(seed)
+    d = readable_frame(rebuilt.df.iloc[rng.integers(0, len(rebuilt), n)])
+    q = pd.DataFrame({"route": d["route"].to_numpy(dtype=object),
+                      "now": d["observed_at"] + pd.to_timedelta(rng.integers(-2, 3, n), unit="D")})
+    q["departure_date"] = np.where(rng.random(n) < 0.5, d["departure_date"].to_numpy(dtype=object), None)
+    q["airline"] = np.where(rng.random(n) < 0.5, d["airline"].to_numpy(dtype=object), None)
+    return pd.concat([q, pd.DataFrame({"route": ["-".join(MARKER)], "now": [pd.Timestamp("2100-01-01")]})],
+                     ignore_index=True)
+
+
+def pct(x, q):
+    return float(np.percentile(x, q)) * 1e3 if len(x) else float("nan")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed-rows", type=int, default=1_000_000)
+    ap.add_argument("--appends", type=int, default=50)
+    ap.add_argument("--batch-rows", type=int, default=2_000)
+    ap.add_argument("--interval-ms", type=float, default=10.0, help="tail idle poll interval")
+    ap.add_argument("--gap-ms", type=float, default=100.0, help="pause between drops")
+    ap.add_argument("--max-routes", type=int, default=MAX_ROUTES)
+    ap.add_argument("--dup-rate", type=float, default=0.05, help="share of repeated rows in seed and drops")
+    ap.add_argument("--garbage-rate", type=float, default=0.002, help="share of drop rows with a 40x fare")
+    args = ap.parse_args()
+
+    root = tempfile.mkdtemp()
+    seed_path, drop_dir = os.path.join(root, "seed.csv"), os.path.join(root, "drops")
+    os.makedirs(drop_dir)
+    write_itineraries(seed_path, args.seed_rows, dup_rate=args.dup_rate)
+    t = time.perf_counter()
+    fare_sig, route_hh, route_q, dedup = seed_batch(seed_path, args.max_routes)
+    tail = FareTail.from_frame(compact_frame(add_signals(fare_sig)), TAIL_SPEC, route_hh=route_hh,
+                               max_routes=args.max_routes, quantiles=route_q, dedup=dedup)
+    print(f"seed: {args.seed_rows:,} rows -> {len(tail.snapshot):,} stored in {time.perf_counter() - t:.2f}s")
+
+    batches = itineraries_frame(args.appends * args.batch_rows, seed=1, dup_rate=args.dup_rate)
+    junk = np.random.default_rng(3).random(len(batches)) < args.garbage_rate
+    batches.loc[junk, "totalFare"] = (batches.loc[junk, "totalFare"] * 40).round(2)
+    last_day = pd.Timestamp(pd.read_csv(seed_path, usecols=["searchDate"])["searchDate"].max())
+    tail.watch(drop_dir).start(interval=args.interval_ms / 1e3)
+
+    route = "-".join(MARKER)
+    want = {"price": None, "written": 0.0}
+    seen, queries, stop = [], [0], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            ans = tail.snapshot.get_live_fare(route, now=pd.Timestamp("2100-01-01"))
+            queries[0] += 1
+            if want["price"] is not None and ans.get("current_price") == want["price"]:
+                seen.append(time.perf_counter() - want["written"])
+                want["price"] = None
+
+    th = threading.Thread(target=reader, daemon=True)
+    th.start()
+    published, drops = [], []
+    t_run = time.perf_counter()
+    for k in range(args.appends):
+        b = batches.iloc[k * args.batch_rows:(k + 1) * args.batch_rows].copy()
+        fare = 250 + k % 400 + 0.25   # inside the route's trim bounds, never the previous answer
+        b.iloc[-1, b.columns.get_indexer(["startingAirport", "destinationAirport", "searchDate", "totalFare"])] = \
+            [*MARKER, (last_day + pd.Timedelta(days=k + 1)).strftime("%Y-%m-%d"), fare]
+        path = os.path.join(drop_dir, f"drop_{k:05d}.csv")
+        b.to_csv(path + ".tmp", index=False)
+        while want["price"] is not None and time.perf_counter() - want["written"] < 10:
+            time.sleep(0.001)   # previous marker still in flight
+        os.replace(path + ".tmp", path)   # a drop appears whole, as one chunk
+        drops.append(path)
+        want["written"], want["price"] = time.perf_counter(), fare
+        t = time.perf_counter()
+        if tail.wait_for(path, os.path.getsize(path), timeout=10) is not None:
+            published.append(time.perf_counter() - t)
+        time.sleep(args.gap_ms / 1e3)
+    while want["price"] is not None and time.perf_counter() - want["written"] < 10:
+        time.sleep(0.001)
+    run_s = time.perf_counter() - t_run
+    stop.set()
+    th.join()
+    tail.stop()
+
+    rebuilt = rebuilt_index(seed_path, drops, args.max_routes)
+    checks = check_queries(rebuilt, 5_000)
+    want_answers = rebuilt.get_live_fares(checks)
+    snap = tail.snapshot
+    assert snap.get_live_fares(checks) == want_answers, "live snapshot differs from a batch rebuild"
+    with tail._lock:   # fold the delta into the base, then check again
+        tail._rebase(snap.version + 1)
+    assert tail.snapshot.delta is None and tail.snapshot.get_live_fares(checks) == want_answers, \
+        "rebased snapshot differs from a batch rebuild"
+    print(f"answers match a batch rebuild: {len(checks):,} queries, before (delta rows "
+          f"{len(snap.delta) if snap.delta is not None else 0:,}) and after a rebase")
+
+    st = tail.summary()
+    polls = max(st["polls"], 1)
+    print(f"drops: {args.appends} x {args.batch_rows:,} rows | polls {st['polls']} | rebases {st['rebases']} "
+          f"| delta rows {st['delta_rows']:,} | errors {st['last_error']}")
+    print(f"drop -> snapshot published: p50 {pct(published, 50):7.1f} ms | p95 {pct(published, 95):7.1f} ms "
+          f"| max {pct(published, 100):7.1f} ms")
+    print(f"drop -> get_live_fare answer: p50 {pct(seen, 50):7.1f} ms | p95 {pct(seen, 95):7.1f} ms "
+          f"| max {pct(seen, 100):7.1f} ms ({len(seen)}/{args.appends} seen)")
+    print(f"reader meanwhile: {queries[0] / run_s:,.0f} get_live_fare/s")
+    print("per poll ms: " + " | ".join(f"{k[:-2]} {st[k] / polls * 1e3:.1f}"
+                                       for k in ("read_s", "ingest_s", "signals_s", "publish_s")))
@@ -0,0 +1,65 @@
+# ============================================
+# BENCH: track_demo startup time + peak RSS, each mode in a fresh process
+#   legacy = cold, but reading every column and both ticket CSVs up front (the old import)
+#   cold   = import track_demo with no usable cube (pruned BTS read + cube build)
+#   warm   = import track_demo with the saved cube (no CSV read at all)
+# Usage: python benchmarks/bench_tracker_startup.py [--repeat 3]
+# ============================================
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    "legacy": """
+from cause_cube import CauseCube
+CauseCube.load = classmethod(lambda cls, *a, **k: None)
+CauseCube.save = lambda self, *a, **k: None
+import dataset_loader, pandas as pd
+def read_everything(path, columns, categorical=(), header=None, engine="auto"):
+    df = pd.read_csv(path)
+    df.columns = [dataset_loader.standard_name(c) for c in df.columns]
+    return df
+dataset_loader.read_pruned = read_everything
+import track_demo
+track_demo.tickets_economy, track_demo.tickets_business   # were read eagerly
+print(json.dumps(dataset_loader.startup_report(track_demo._T0)))
+""",
+    "cold": """
+from cause_cube import CauseCube
+CauseCube.load = classmethod(lambda cls, *a, **k: None)   # force the CSV path
+CauseCube.save = lambda self, *a, **k: None                # and leave the saved cube alone
+import track_demo
+print(json.dumps(track_demo.STARTUP))
+""",
+    "warm": """
+import track_demo
+print(json.dumps(track_demo.STARTUP))
+""",
+}
+
+
+def run(mode, paths):
+    code = "import json, sys\nsys.path.insert(0, %r)\n" % ROOT + MODES[mode].format(paths=paths)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import track_demo  # builds the saved cube if needed so "warm" is warm
+    paths = [track_demo.ECONOMY_PATH, track_demo.BUSINESS_PATH, track_demo.DELAY_PATH]
+
+    for mode in MODES:
+        res = [run(mode, paths) for _ in range(args.repeat)]
+        best = min(res, key=lambda r: r["startup_s"])
+        print(f"{mode:<7} startup {best['startup_s']:6.2f}s | peak RSS {best['peak_rss_mb']:7.1f} MB "
+              f"(best of {args.repeat})")
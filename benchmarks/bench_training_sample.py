@@ -0,0 +1,88 @@
+# ============================================
+# BENCH: notebook STEP 2 + STEP 4 (first valid rows, then copy + parse dates)
+#        vs training_sample.build_training_set (uniform / per-route, serial / pool)
+# Each mode runs in a fresh process; reports seconds, peak RSS and how much of
+# the file's searchDate range the sample covers (the head sample covers little).
+# Usage: python benchmarks/bench_training_sample.py --rows 2000000 --size 100000 --workers 4
+# ============================================
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset_loader import peak_rss_mb
+from training_sample import SAMPLE_COLUMNS, build_training_set
+
+from synth_data import write_itineraries
+
+
+def notebook_sample(path, out_path, size, chunk_rows=50_000, seed=42):
+    collected, valid = [], 0
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=SAMPLE_COLUMNS):
+        v = chunk[chunk["totalFare"].notna() & (chunk["totalFare"] > 0)
+                  & chunk["searchDate"].notna() & chunk["flightDate"].notna()].copy()
+        collected.append(v)
+        valid += len(v)
+        if valid >= size:
+            break
+    df = pd.concat(collected, ignore_index=True)
+    if len(df) > size:
+        df = df.sample(n=size, random_state=seed).reset_index(drop=True)
+    df.to_parquet(out_path, index=False)
+    # STEP 4
+    f = pd.read_parquet(out_path).copy()
+    f["searchDate"] = pd.to_datetime(f["searchDate"], errors="coerce")
+    f["flightDate"] = pd.to_datetime(f["flightDate"], errors="coerce")
+    f = f.dropna(subset=["searchDate", "flightDate"])
+    f["days_to_departure"] = (f["flightDate"] - f["searchDate"]).dt.days
+    f = f[(f["days_to_departure"] >= 0) & (f["days_to_departure"] <= 365)]
+    return {"rows_sampled": len(f)}
+
+
+def run_mode(mode, path, out_path, size, workers, per_route):
+    t = time.perf_counter()
+    if mode == "notebook":
+        st = notebook_sample(path, out_path, size)
+    elif mode == "uniform":
+        st = build_training_set(path, out_path, size=size)
+    elif mode == "uniform_pool":
+        st = build_training_set(path, out_path, size=size, workers=workers)
+    else:
+        st = build_training_set(path, out_path, strata="route", per_route=per_route, workers=workers)
+    secs = time.perf_counter() - t
+    search = pd.read_parquet(out_path, columns=["searchDate"])["searchDate"]
+    days = pd.to_datetime(search).dt.normalize().nunique()
+    return {"seconds": round(secs, 2), "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rows": st["rows_sampled"], "search_days_covered": int(days), "considered": st.get("rows_considered")}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--size", type=int, default=100_000)
+    ap.add_argument("--per-route", type=int, default=400)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--data", default=None, help="itineraries CSV (default: generated)")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    path = args.data or os.path.join(tmp, "itineraries.csv")
+    if not args.data:
+        write_itineraries(path, args.rows)
+    print(f"{path}: {os.path.getsize(path) / 1024**2:,.0f} MB, sample size {args.size:,}, workers {args.workers}")
+
+    ctx = multiprocessing.get_context("spawn")
+    for mode in ["notebook", "uniform", "uniform_pool", "route_pool"]:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as ex:
+            res = ex.submit(run_mode, mode, path, os.path.join(tmp, f"{mode}.parquet"),
+                            args.size, args.workers, args.per_route).result()
+        print(f"{mode:<13} {res['seconds']:7.2f}s | peak RSS {res['peak_rss_mb']:7.1f} MB | rows {res['rows']:>9,} "
+              f"| searchDate days covered {res['search_days_covered']:>3} | rows parsed {res['considered']}")
@@ -0,0 +1,100 @@
+# ============================================
+# LOAD GENERATOR for serve.py (offline, keep-alive connections)
+# Reports QPS and p50/p90/p99 latency per endpoint.
+# Usage: python serve.py --port 8080 &
+#        python benchmarks/load_serve.py --port 8080 --concurrency 64 --requests 20000
+# ============================================
+
+import argparse
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+
+async def http_get(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        if k.strip().lower() == "content-length":
+            length = int(v)
+    return status, await reader.readexactly(length)
+
+
+def make_paths(health, endpoint, n, seed=0):
+    rng = np.random.default_rng(seed)
+    paths = []
+    kinds = [k for k in ("fare", "track") if f"/{k}" in health["endpoints"] and endpoint in (k, "mix")]
+    if not kinds:
+        raise SystemExit(f"server has no endpoint for --endpoint {endpoint}")
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        if kind == "fare":
+            q = {"route": rng.choice(health["sample_routes"])}
+        else:
+            q = {"airport": rng.choice(health["sample_airports"]),
+                 "airline": rng.choice(health["sample_airlines"]), "month": int(rng.integers(1, 13))}
+        paths.append((kind, f"/{kind}?{urlencode(q)}"))
+    return paths
+
+
+async def run(host, port, paths, concurrency):
+    lat = {k: [] for k, _ in paths}
+    errors = 0
+    it = iter(paths)
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        for kind, path in it:
+            t = time.perf_counter()
+            status, _ = await http_get(reader, writer, host, path)
+            lat[kind].append(time.perf_counter() - t)
+            errors += status != 200
+        writer.close()
+
+    t = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - t, lat, errors
+
+
+async def main(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, body = await http_get(reader, writer, args.host, "/health")
+    writer.close()
+    health = json.loads(body)
+
+    paths = make_paths(health, args.endpoint, args.requests)
+    await run(args.host, args.port, paths[:min(500, len(paths))], args.concurrency)  # warm-up
+    secs, lat, errors = await run(args.host, args.port, paths, args.concurrency)
+
+    print(f"{len(paths):,} requests | concurrency {args.concurrency} | {secs:.2f}s | "
+          f"{len(paths) / secs:,.0f} QPS | errors {errors}")
+    for kind, xs in lat.items():
+        ms = np.array(xs) * 1e3
+        print(f"  /{kind:<6} n={len(ms):>7,} | p50 {np.percentile(ms, 50):7.2f} ms | "
+              f"p90 {np.percentile(ms, 90):7.2f} ms | p99 {np.percentile(ms, 99):7.2f} ms")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, body = await http_get(reader, writer, args.host, "/health")
+    writer.close()
+    stats = {k: v for k, v in json.loads(body).items() if "batch" in k}
+    print("  server batching:", stats)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--endpoint", choices=["fare", "track", "mix"], default="mix")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=20_000)
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,252 @@
+# ============================================
+# BENCHMARK SUITE (synthetic data, fully offline)
+# Generates itineraries.csv + Airline_Delay_Cause.csv at the requested scale
+# (synth_data.py; kept in --data-dir, by default outside the repo under the
+# system temp dir, and reused when already present) and measures, each stage
+# in a fresh process so peak RSS is per stage:
+#   ingest_legacy / ingest_fast  rows/s, MB/s, peak RSS (with the per-route outlier sketches, as 1.py)
+#   fare                         add_signals, FareIndex build, get_live_fare latency, alert throughput
+#   tracker                      cold start, track_flight_card latency (single + batched)
+# Results are written as JSON; --compare prints the change against an earlier run.
+# Usage: python benchmarks/run_suite.py --rows 1000000 --bts-rows 400000 --out results/main.json
+#        python benchmarks/run_suite.py --rows 1000000 --compare results/main.json
+# ============================================
+
+import argparse
+import contextlib
+import datetime as dt
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from dataset_loader import peak_rss_mb
+
+from bench_alerts import random_subs
+from bench_parallel_ingest import SPEC
+from synth_data import write_delay_causes, write_itineraries
+
+MAX_ROUTES = 5000
+KEEP_N = 60
+SIGNAL_K = 12
+ROUTE_TRIM = (0.005, 0.995)
+
+
+def latency_stats(secs):
+    us = np.asarray(secs) * 1e6
+    return {"p50_us": round(float(np.percentile(us, 50)), 1), "p99_us": round(float(np.percentile(us, 99)), 1)}
+
+
+# -------------------------------
+# Stages (each runs in its own process)
+# -------------------------------
+def stage_ingest(path, rows, fast, sig_out=None):
+    from fare_ingest import ingest_serial
+    from route_quantiles import RouteQuantiles
+
+    # per-route quantile sketches trim outliers during the pass, as in 1.py (ROUTE_TRIM)
+    route_q = RouteQuantiles(trim=ROUTE_TRIM)
+    t = time.perf_counter()
+    store, route_hh = ingest_serial(path, SPEC, keep_n=KEEP_N, hh_capacity=2 * MAX_ROUTES,
+                                    progress_every=0, fast=fast, quantiles=route_q)
+    secs = time.perf_counter() - t
+    mb = os.path.getsize(path) / 1024**2
+    res = {"seconds": round(secs, 3), "rows_per_s": round(rows / secs), "mb_per_s": round(mb / secs, 1),
+           "groups": len(store), "peak_rss_mb": round(peak_rss_mb(), 1)}
+
+    if sig_out:   # same post-processing as build_fare_sig in 1.py
+        top_routes = set(route_hh.top(MAX_ROUTES))
+        store.evict_routes(set(route_hh.tracked()) - top_routes)
+        route_q.evict(set(route_hh.tracked()) - top_routes)
+        sig = store.to_frame().sort_values(["route", "departure_date", "airline", "observed_at"])
+        sig[route_q.keep_mask(sig["route"], sig["price"])].reset_index(drop=True).to_pickle(sig_out)
+    return res
+
+
+def stage_fare(sig_path, n_queries, n_subs, seed=0):
+    from fare_alerts import AlertEngine
+    from fare_compact import compact_frame
+    from fare_index import FareIndex
+    from fare_signals import add_signals
+
+    sig = pd.read_pickle(sig_path)
+    res = {"fare_sig_rows": len(sig)}
+
+    t = time.perf_counter()
+    sig = add_signals(sig, k=SIGNAL_K)
+    res["add_signals_s"] = round(time.perf_counter() - t, 3)
+
+    compact = compact_frame(sig)
+    t = time.perf_counter()
+    index = FareIndex(compact)
+    res["index_build_s"] = round(time.perf_counter() - t, 3)
+
+    rng = np.random.default_rng(seed)
+    routes = index.routes[rng.integers(0, len(index.routes), n_queries)].tolist()
+    lat = []
+    for r in routes:
+        t = time.perf_counter()
+        index.get_live_fare(r)
+        lat.append(time.perf_counter() - t)
+    res["get_live_fare"] = latency_stats(lat)
+    queries = [{"route": r} for r in routes]
+    t = time.perf_counter()
+    index.get_live_fares(queries)
+    res["get_live_fares_us_per_query"] = round((time.perf_counter() - t) / n_queries * 1e6, 2)
+
+    eng = AlertEngine()
+    eng.register(random_subs(sig, n_subs, seed=seed))
+    t = time.perf_counter()
+    for start in range(0, len(sig), 100_000):
+        eng.process(sig.iloc[start:start + 100_000])
+    secs = time.perf_counter() - t
+    res["alerts"] = {"subscriptions": n_subs, "observations_per_s": round(len(sig) / secs)}
+    res["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return res
+
+
+def stage_tracker(delay_path, cube_path, n_queries, seed=0):
+    os.environ["TRACKER_DELAY_PATH"] = delay_path
+    os.environ["TRACKER_CUBE_PATH"] = cube_path
+    for p in (cube_path, cube_path + ".json"):
+        if os.path.exists(p):
+            os.remove(p)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import track_demo
+    res = {"cold_start_s": track_demo.STARTUP["startup_s"]}
+
+    rng = np.random.default_rng(seed)
+    req = pd.DataFrame({
+        "airport": rng.choice(track_demo.airport_risk["airport"].to_numpy(), n_queries),
+        "airline": rng.choice(track_demo.airline_risk["carrier"].to_numpy(), n_queries),
+        "month": rng.integers(1, 13, n_queries),
+    })
+    lat = []
+    for a, c, m in req.itertuples(index=False):
+        t = time.perf_counter()
+        track_demo.track_flight_card(a, c, m)
+        lat.append(time.perf_counter() - t)
+    res["track_flight_card"] = latency_stats(lat)
+    t = time.perf_counter()
+    track_demo.track_flight_cards(req)
+    res["track_flight_cards_us_per_card"] = round((time.perf_counter() - t) / n_queries * 1e6, 2)
+    res["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return res
+
+
+def run_stage(fn, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as ex:
+        return ex.submit(fn, *args).result()
+
+
+# -------------------------------
+# Results
+# -------------------------------
+def environment():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    try:
+        import pyarrow
+        pa_version = pyarrow.__version__
+    except ImportError:
+        pa_version = None
+    return {"git_rev": rev, "python": platform.python_version(), "numpy": np.__version__,
+            "pandas": pd.__version__, "pyarrow": pa_version, "cpus": os.cpu_count(),
+            "platform": platform.platform(), "utc": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")}
+
+
+def flatten(d, prefix=""):
+    out = {}
+    for k, v in d.items():
+        if isinstance(v, dict):
+            out.update(flatten(v, f"{prefix}{k}."))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[prefix + k] = v
+    return out
+
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def compare(old, new, tolerance):
+    """Print every metric present in both runs; returns the names that got worse by > tolerance."""
+    a, b = flatten(old["results"]), flatten(new["results"])
+    worse = []
+    print(f"\nvs {old['env'].get('git_rev')} ({old['env'].get('utc')}):")
+    for k in sorted(set(a) & set(b)):
+        if not a[k]:
+            continue
+        change = b[k] / a[k] - 1
+        regressed = (-change if higher_is_better(k) else change) > tolerance
+        if k.endswith(("rows", "groups", "subscriptions")):
+            regressed = False   # sizes, not timings
+        worse += [k] if regressed else []
+        print(f"  {k:<45} {a[k]:>12,} -> {b[k]:>12,}  {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return worse
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000, help="itineraries.csv rows (1M-100M)")
+    ap.add_argument("--bts-rows", type=int, default=400_000, help="Airline_Delay_Cause.csv rows")
+    ap.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "fare_bench_data"),
+                    help="synthetic CSVs, intermediate tables and results (multi-GB at scale)")
+    ap.add_argument("--queries", type=int, default=5_000)
+    ap.add_argument("--subs", type=int, default=10_000)
+    ap.add_argument("--stages", nargs="+", default=["ingest_legacy", "ingest_fast", "fare", "tracker"])
+    ap.add_argument("--out", default=None, help="results JSON (default: <data-dir>/results_<rev>_<rows>.json)")
+    ap.add_argument("--compare", default=None, help="earlier results JSON to diff against")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="relative change counted as a regression")
+    args = ap.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    it_path = os.path.join(args.data_dir, f"itineraries_{args.rows}.csv")
+    bts_path = os.path.join(args.data_dir, f"Airline_Delay_Cause_{args.bts_rows}.csv")
+    for path, writer, rows in [(it_path, write_itineraries, args.rows), (bts_path, write_delay_causes, args.bts_rows)]:
+        if not os.path.exists(path):
+            t = time.perf_counter()
+            writer(path, rows)
+            print(f"generated {path} ({os.path.getsize(path) / 1024**2:,.0f} MB) in {time.perf_counter() - t:.1f}s")
+    sig_path = os.path.join(args.data_dir, f"fare_sig_{args.rows}.pkl")
+
+    report = {"env": environment(),
+              "params": {"rows": args.rows, "bts_rows": args.bts_rows, "queries": args.queries, "subs": args.subs},
+              "results": {}}
+    stages = {
+        "ingest_legacy": (stage_ingest, it_path, args.rows, False),
+        "ingest_fast":   (stage_ingest, it_path, args.rows, True, sig_path),
+        "fare":          (stage_fare, sig_path, args.queries, args.subs),
+        "tracker":       (stage_tracker, bts_path, os.path.join(args.data_dir, "delay_cube.parquet"), args.queries),
+    }
+    for name in args.stages:
+        if name == "fare" and not os.path.exists(sig_path):
+            run_stage(*stages["ingest_fast"])   # fare needs the ingested table
+        res = run_stage(*stages[name])
+        report["results"][name] = res
+        print(f"{name:<14} " + " | ".join(f"{k} {v}" for k, v in flatten(res).items()))
+
+    out = args.out or os.path.join(args.data_dir, f"results_{report['env']['git_rev']}_{args.rows}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=1)
+    print("wrote", out)
+
+    if args.compare:
+        with open(args.compare) as f:
+            worse = compare(json.load(f), report, args.tolerance)
+        print(f"{len(worse)} metric(s) regressed by more than {args.tolerance:.0%}")
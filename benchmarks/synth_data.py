@@ -0,0 +1,122 @@
+# ============================================
+# SYNTHETIC itineraries.csv / Airline_Delay_Cause.csv (offline stand-ins for /kaggle/input)
+# Same column names as dilwong/flightprices and the BTS delay-cause export,
+# so pick_col (1.py) and pick_first_existing_col (track_demo.py) detect them.
+# Usage: python benchmarks/synth_data.py itineraries --rows 1000000 --out /tmp/itineraries.csv
+#        python benchmarks/synth_data.py delay --rows 400000 --out /tmp/Airline_Delay_Cause.csv
+# ============================================
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+AIRPORTS = np.array(["ATL", "BOS", "CLT", "DEN", "DFW", "DTW", "EWR", "IAD",
+                     "JFK", "LAX", "LGA", "MIA", "OAK", "ORD", "PHL", "SFO"])
+AIRLINES = np.array(["Delta", "United", "American Airlines", "JetBlue Airways",
+                     "Spirit Airlines", "Delta||Delta", "United||United"])
+
+
+def itineraries_frame(rows, seed=0, start="2022-04-16", search_days=60, dup_rate=0.0):
+    if dup_rate:
+        # dup_rate of the rows repeat an earlier (legId, searchDate, fare) row, placed next to it
+        base = max(int(round(rows * (1 - dup_rate))), 1)
+        df = itineraries_frame(base, seed, start, search_days)
+        extra = np.random.default_rng([seed, 1]).integers(0, base, rows - base)
+        return df.iloc[np.sort(np.concatenate([np.arange(base), extra]))].reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    o = rng.choice(AIRPORTS, rows)
+    d = rng.choice(AIRPORTS[::-1], rows)
+    search = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, search_days, rows)), unit="D")
+    flight = search + pd.to_timedelta(rng.integers(1, 60, rows), unit="D")
+    base = rng.gamma(4.0, 70.0, rows).round(2)
+    return pd.DataFrame({
+        "legId": [f"{x:032x}" for x in rng.integers(0, 2**62, rows)],
+        "searchDate": search.strftime("%Y-%m-%d"),
+        "flightDate": flight.strftime("%Y-%m-%d"),
+        "startingAirport": o,
+        "destinationAirport": d,
+        "fareBasisCode": "KAA0OKEN",
+        "travelDuration": "PT2H29M",
+        "elapsedDays": 0,
+        "isBasicEconomy": rng.random(rows) < 0.15,
+        "isRefundable": False,
+        "isNonStop": rng.random(rows) < 0.3,
+        "baseFare": base,
+        "totalFare": (base * 1.12 + 20).round(2),
+        "seatsRemaining": rng.integers(0, 10, rows),
+        "totalTravelDistance": rng.integers(100, 3000, rows).astype(float),
+        "segmentsAirlineName": rng.choice(AIRLINES, rows),
+        "segmentsAirlineCode": "DL",
+        "segmentsCabinCode": "coach",
+        "segmentsDurationInSeconds": "8940",
+    })
+
+
+def write_itineraries(path, rows, seed=0, chunk_rows=1_000_000, dup_rate=0.0):
+    # written in slices so 100M-row files never sit in memory at once
+    done, k = 0, 0
+    while done < rows:
+        n = min(chunk_rows, rows - done)
+        df = itineraries_frame(n, seed=seed + k, search_days=60, dup_rate=dup_rate)
+        df.to_csv(path, mode="w" if k == 0 else "a", header=(k == 0), index=False)
+        done += n
+        k += 1
+    return path
+
+
+BTS_CARRIERS = np.array(["AA", "DL", "UA", "WN", "B6", "AS", "NK", "F9", "HA", "G4",
+                         "OO", "YX", "MQ", "9E", "OH", "QX", "EV"])
+BTS_AIRPORTS = np.concatenate([AIRPORTS, [f"X{i:02d}" for i in range(284)]])   # ~300 airports
+CAUSES = ["carrier", "weather", "nas", "security", "late_aircraft"]
+
+
+def delay_causes_frame(rows, seed=0, first_year=2013, months=(0, 12 * 11)):
+    # one row per (year, month, carrier, airport) report, months in file order like the BTS export
+    rng = np.random.default_rng(seed)
+    ym = np.sort(rng.integers(months[0], max(months[1], months[0] + 1), rows))
+    carrier = rng.choice(BTS_CARRIERS, rows)
+    airport = rng.choice(BTS_AIRPORTS, rows)
+    flights = rng.integers(10, 5000, rows).astype(float)
+    df = pd.DataFrame({
+        "year": first_year + ym // 12, "month": ym % 12 + 1,
+        "carrier": carrier, "carrier_name": np.char.add(carrier, " Inc."),
+        "airport": airport, "airport_name": np.char.add(airport, " Intl"),
+        "arr_flights": flights,
+        "arr_del15": (flights * rng.uniform(0.1, 0.3, rows)).round(),
+    })
+    for k in CAUSES:
+        df[f"{k}_ct"] = (flights * rng.uniform(0, 0.08, rows)).round(2)
+    df["arr_cancelled"] = (flights * rng.uniform(0, 0.03, rows)).round()
+    df["arr_diverted"] = (flights * rng.uniform(0, 0.005, rows)).round()
+    df["arr_delay"] = (flights * rng.uniform(5, 20, rows)).round()
+    for k in CAUSES:
+        df[f"{k}_delay"] = (df["arr_delay"] * rng.uniform(0, 0.3, rows)).round()
+    return df
+
+
+def write_delay_causes(path, rows, seed=0, chunk_rows=1_000_000, n_months=12 * 11):
+    done, k = 0, 0
+    while done < rows:
+        n = min(chunk_rows, rows - done)
+        # each slice covers its share of the months, so the whole file stays in month order
+        span = (done * n_months // rows, (done + n) * n_months // rows)
+        df = delay_causes_frame(n, seed=seed + k, months=span)
+        df.to_csv(path, mode="w" if k == 0 else "a", header=(k == 0), index=False)
+        done += n
+        k += 1
+    return path
+
+
+WRITERS = {"itineraries": write_itineraries, "delay": write_delay_causes}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("kind", choices=sorted(WRITERS))
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    WRITERS[args.kind](args.out, args.rows, seed=args.seed)
+    print("wrote", args.out)
@@ -0,0 +1,153 @@
+# ============================================
+# DELAY-CAUSE CUBE (airport x carrier x month, built once at load)
+# cells: summed cause counts per (airport, carrier, month) plus the raw
+# sufficient statistics the tracker's risk tables are derived from (flights,
+# delay minutes, cancellations, ...; see track_demo.py). Everything is a sum,
+# so a new BTS drop is folded in with merge() without touching old rows.
+# Roll-ups: any subset of the three dims (airport-only, carrier-only,
+# month-only, all, ...) is one groupby over the cells, cached; every lookup is
+# then a dict hit. Saved as one parquet (pickle without pyarrow) + a JSON
+# sidecar holding the source fingerprint and the detected BTS schema, so a
+# warm tracker start never reads Airline_Delay_Cause.csv.
+# ============================================
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from fare_cache import PYARROW_AVAILABLE, source_fingerprint
+
+DIMS = ("airport", "carrier", "month")
+CUBE_VERSION = 2   # 2: raw sums instead of per-row averages
+
+
+class CauseCube:
+    def __init__(self, cells, causes, fallback_mix, meta=None):
+        """cells: DataFrame indexed by (airport, carrier, month) with float measure columns,
+        cause counts in `cause_<name>` columns."""
+        self.cells = cells
+        self.causes = list(causes)
+        self.cause_cols = [f"cause_{c}" for c in self.causes]
+        self.fallback = np.array([fallback_mix[c] for c in self.causes], dtype=np.float64)
+        self.meta = meta or {}
+        self._rollups = {}
+
+    @classmethod
+    def from_frame(cls, airport, carrier, month, measures, causes, fallback_mix, meta=None):
+        keys = [pd.Series(airport, name="airport", index=measures.index),
+                pd.Series(carrier, name="carrier", index=measures.index),
+                pd.Series(month, name="month", index=measures.index)]
+        cells = measures.astype(np.float64).groupby(keys, dropna=False).sum()
+        return cls(cells, causes, fallback_mix, meta)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def merge(self, other):
+        """Add another cube's cells (same measures) into this one; roll-ups rebuild on next use."""
+        if list(other.cells.columns) != list(self.cells.columns):
+            raise ValueError("cubes have different measures")
+        self.cells = self.cells.add(other.cells, fill_value=0)
+        self._rollups = {}
+        return self
+
+    # -------------------------------
+    # Roll-ups
+    # -------------------------------
+    def rollup(self, dims=()):
+        """Measures summed over every dim not in `dims` (dims=() -> one 'all' row)."""
+        dims = tuple(d for d in DIMS if d in dims)
+        if dims not in self._rollups:
+            if dims == DIMS:
+                table = self.cells
+            elif dims:
+                table = self.cells.groupby(level=list(dims), dropna=False).sum()
+            else:
+                table = self.cells.sum().to_frame().T
+            pos = {k: i for i, k in enumerate(table.index.tolist())} if dims else {(): 0}
+            self._rollups[dims] = (table, pos, table[self.cause_cols].to_numpy(dtype=np.float64))
+        return self._rollups[dims][0]
+
+    def _level(self, dims):
+        self.rollup(dims)
+        return self._rollups[dims]
+
+    # -------------------------------
+    # Cause mix (O(1) per query, partial keys allowed)
+    # -------------------------------
+    def _mix(self, totals):
+        s = totals.sum(axis=-1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(s > 0, totals / s, self.fallback)
+
+    def cause_totals(self, airport=None, carrier=None, month=None):
+        dims = tuple(d for d, v in zip(DIMS, (airport, carrier, month)) if v is not None)
+        key = tuple(v for v in (airport, carrier, month) if v is not None)
+        _, pos, totals = self._level(dims)
+        i = pos.get(key[0] if len(key) == 1 else key, -1)
+        return totals[i] if i >= 0 else np.zeros(len(self.causes))
+
+    def cause_mix(self, airport=None, carrier=None, month=None):
+        """{cause: share}; None = any. Falls back to the default mix when nothing was counted."""
+        return dict(zip(self.causes, self._mix(self.cause_totals(airport, carrier, month)).tolist()))
+
+    def cause_mixes(self, airports, carriers, months):
+        """(n, n_causes) shares for many queries; None entries roll that dim up."""
+        cols = [list(airports), list(carriers), list(months)]
+        n = len(cols[0])
+        given = np.array([[v is not None for v in c] for c in cols], dtype=bool).T.reshape(n, 3)
+        totals = np.zeros((n, len(self.causes)))
+        pattern = given @ np.array([4, 2, 1])
+        for p in np.unique(pattern).tolist():
+            rows = np.flatnonzero(pattern == p)
+            dims = tuple(d for j, d in enumerate(DIMS) if p & (4 >> j))
+            _, pos, tot = self._level(dims)
+            idx = [j for j, d in enumerate(DIMS) if d in dims]
+            keys = ([cols[idx[0]][r] for r in rows] if len(idx) == 1 else
+                    [tuple(cols[j][r] for j in idx) for r in rows])
+            at = np.fromiter((pos.get(k, -1) for k in keys), dtype=np.int64, count=len(rows))
+            hit = at >= 0
+            totals[rows[hit]] = tot[at[hit]]
+        return self._mix(totals)
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path, source_path=None):
+        meta = dict(self.meta, version=CUBE_VERSION, causes=self.causes,
+                    fallback=dict(zip(self.causes, self.fallback.tolist())),
+                    format="parquet" if PYARROW_AVAILABLE else "pickle")
+        if source_path is not None:
+            meta["source"] = source_fingerprint(source_path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        flat = self.cells.reset_index()
+        tmp = path + ".tmp"
+        if PYARROW_AVAILABLE:
+            flat.to_parquet(tmp, index=False)
+        else:
+            flat.to_pickle(tmp)
+        with open(path + ".json", "w") as f:
+            json.dump(meta, f, indent=1, default=str)
+        os.replace(tmp, path)
+        self.meta = meta
+        return path
+
+    @classmethod
+    def load(cls, path, source_path=None):
+        """The saved cube, or None if missing, unreadable here, or built from a different source file."""
+        if not (os.path.exists(path) and os.path.exists(path + ".json")):
+            return None
+        with open(path + ".json") as f:
+            meta = json.load(f)
+        if meta.get("version") != CUBE_VERSION or (meta.get("format") == "parquet" and not PYARROW_AVAILABLE):
+            return None
+        if source_path is not None:
+            if not os.path.exists(source_path):
+                return None
+            now, then = source_fingerprint(source_path), meta.get("source", {})
+            if any(now[k] != then.get(k) for k in ("size", "mtime_ns", "sha1")):
+                return None
+        flat = pd.read_parquet(path) if meta["format"] == "parquet" else pd.read_pickle(path)
+        return cls(flat.set_index(list(DIMS)), meta["causes"], meta["fallback"], meta)
@@ -0,0 +1,54 @@
+# ============================================
+# COLUMN-PRUNED CSV LOADING (tracker startup)
+# sniff_header reads only the header line; read_pruned then parses just the
+# columns a caller names (matched on standardized names), with the key
+# string columns as categoricals. The C reader is the default: the pyarrow
+# engine is no faster here and holds the whole file in Arrow buffers at once
+# (peak RSS ~+90 MB on a 30 MB BTS file).
+# startup_report gives wall time + peak RSS for the "ready" line.
+# ============================================
+
+import resource
+import sys
+import time
+
+import pandas as pd
+
+
+def standard_name(c):
+    return str(c).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def sniff_header(path):
+    """{standardized name: raw header name}, first occurrence wins; reads no data rows."""
+    out = {}
+    for raw in pd.read_csv(path, nrows=0).columns:
+        out.setdefault(standard_name(raw), raw)
+    return out
+
+
+def read_pruned(path, columns, categorical=(), header=None, engine="c"):
+    """Only `columns` (standardized names; absent ones skipped), returned under the standardized names."""
+    header = sniff_header(path) if header is None else header
+    keep = [c for c in dict.fromkeys(columns) if c is not None and c in header]
+    raw = [header[c] for c in keep]
+    dtype = {header[c]: "category" for c in categorical if c in keep}
+    df = pd.read_csv(path, usecols=raw, dtype=dtype or None, engine=engine)
+    return df.rename(columns=dict(zip(raw, keep)))[keep]
+
+
+def peak_rss_mb():
+    # VmHWM is this process's own high-water mark; ru_maxrss can carry over from the parent
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / 1024**2 if sys.platform == "darwin" else kb / 1024   # bytes on macOS, KB on Linux
+
+
+def startup_report(t0):
+    return {"startup_s": round(time.perf_counter() - t0, 3), "peak_rss_mb": round(peak_rss_mb(), 1)}
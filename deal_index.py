@@ -0,0 +1,254 @@
+# ============================================
+# DEAL INDEX (origin -> destinations ranked by price, departure-date ranges)
+# One record per group (route, departure_date, airline): its latest price,
+# the lowest of its last `recent` prices, when it was seen and how often.
+# Record ids are kept in two orders, (origin, departure day) and
+# (route, departure day), so "cheapest destinations from ATL departing
+# between X and Y" is two searchsorted calls for the slice plus a
+# min-per-destination over that slice only: the cost follows the origin's
+# groups in the date range, never the whole table.
+# Built from a fare_sig frame (from_frame) or kept in step with a FareStore
+# (from_store + update(touched groups), as fare_tail.py does). update() only
+# re-sorts when groups appear or go; price changes are written in place into
+# a copy, and the copy is published by swapping one reference, so a reader
+# never sees half an update.
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+from fare_compact import NO_DAY, compact_frame, dates_to_days, days_to_dates, decode_price
+from fare_store import _ragged_arange
+
+RANK_COLS = {"latest": "latest", "min_recent": "low"}
+DAY_SHIFT = np.int64(2**31)   # int32 day -> non-negative low 32 bits of the sort key
+REC_COLS = {"route": np.int64, "day": np.int32, "airline": np.int64, "ts": np.int64,
+            "latest": np.float64, "low": np.float64, "obs": np.int32}
+
+
+def _live(rec):
+    return (rec["route"] >= 0) & (rec["obs"] > 0)
+
+
+def _split_route(route):
+    origin, _, dest = str(route).partition("-")
+    return origin, dest
+
+
+class DealIndex:
+    def __init__(self, recent=12):
+        """`recent`: how many of a group's latest observations min_recent looks at."""
+        self.recent = int(recent)
+        self.store = None
+        self._routes = {}           # route -> code
+        self._route_labels = []
+        self._origins = {}          # airport -> code (origins and destinations share one dictionary)
+        self._airport_labels = []
+        self._route_origin = np.zeros(0, dtype=np.int64)
+        self._route_dest = np.zeros(0, dtype=np.int64)
+        self._airlines = {}         # airline (lower-case) -> code
+        self._airline_labels = []
+        self._gkey = []             # store group code -> key its record was encoded for
+        self._t = self._views({c: np.zeros(0, dtype=t) for c, t in REC_COLS.items()})
+
+    @classmethod
+    def from_frame(cls, fare_sig, recent=12):
+        """Index over a fare_sig frame (readable or compact); later rows win ties on observed_at."""
+        self = cls(recent)
+        d = compact_frame(fare_sig)
+        route, airline = d["route"].astype("category"), d["airline"].astype("category")
+        rc = self._route_codes(route.cat.categories)[route.cat.codes.to_numpy()]
+        ac = self._airline_codes(airline.cat.categories)[airline.cat.codes.to_numpy()]
+        day = d["departure_date"].to_numpy(dtype=np.int32)
+        ts = d["observed_at"].to_numpy(dtype=np.int64)
+        price = decode_price(d["price"])
+
+        order = np.lexsort((np.arange(len(d)), ts, ac, day, rc))
+        rc, day, ac, ts, price = rc[order], day[order], ac[order], ts[order], price[order]
+        start = np.flatnonzero(np.r_[True, (rc[1:] != rc[:-1]) | (day[1:] != day[:-1]) | (ac[1:] != ac[:-1])])
+        sizes = np.diff(np.r_[start, len(rc)])
+        last = start + sizes - 1
+        from_end = np.repeat(sizes, sizes) - 1 - _ragged_arange(sizes)
+        low = np.minimum.reduceat(np.where(from_end < self.recent, price, np.inf), start) if len(start) else price[:0]
+        self._t = self._views({"route": rc[start], "day": day[start], "airline": ac[start], "ts": ts[last],
+                               "latest": price[last], "low": low, "obs": sizes.astype(np.int32)})
+        return self
+
+    @classmethod
+    def from_store(cls, store, recent=12):
+        """Index over a FareStore's groups; call update(groups) after each insert."""
+        self = cls(recent)
+        self.store = store
+        self.update()
+        return self
+
+    def __len__(self):
+        return len(self._t["by_origin"][0])
+
+    # -------------------------------
+    # Dictionaries
+    # -------------------------------
+    def _airport(self, code):
+        c = self._origins.get(code)
+        if c is None:
+            c = self._origins[code] = len(self._airport_labels)
+            self._airport_labels.append(code)
+        return c
+
+    def _route_codes(self, routes):
+        lut = np.empty(len(routes), dtype=np.int64)
+        new = []
+        for j, r in enumerate(map(str, routes)):
+            c = self._routes.get(r)
+            if c is None:
+                c = self._routes[r] = len(self._route_labels)
+                self._route_labels.append(r)
+                new.append([self._airport(a) for a in _split_route(r)])
+            lut[j] = c
+        if new:
+            new = np.array(new, dtype=np.int64)
+            self._route_origin = np.append(self._route_origin, new[:, 0])
+            self._route_dest = np.append(self._route_dest, new[:, 1])
+        return lut
+
+    def _airline_codes(self, airlines):
+        lut = np.empty(len(airlines), dtype=np.int64)
+        for j, a in enumerate(map(str, airlines)):
+            c = self._airlines.get(a.lower())
+            if c is None:
+                c = self._airlines[a.lower()] = len(self._airline_labels)
+                self._airline_labels.append(a)
+            lut[j] = c
+        return lut
+
+    # -------------------------------
+    # Sorted views (rebuilt only when the set of groups changes)
+    # -------------------------------
+    def _views(self, rec, by_origin=None, by_route=None):
+        if by_origin is None:
+            ids = np.flatnonzero(_live(rec))
+            day = rec["day"][ids].astype(np.int64) + DAY_SHIFT
+            views = []
+            for owner in (self._route_origin[rec["route"][ids]], rec["route"][ids]):
+                key = (owner << 32) + day
+                order = np.argsort(key, kind="stable")
+                views.append((ids[order], key[order]))
+            by_origin, by_route = views
+        return {**rec, "by_origin": by_origin, "by_route": by_route}
+
+    def update(self, groups=None):
+        """Refresh the records of these store groups (None: all of them) and publish."""
+        st = self.store
+        n = len(st.keys)
+        groups = np.arange(n) if groups is None else np.asarray(groups, dtype=np.int64)
+        t = self._t
+        rec = {}
+        for c, dtype in REC_COLS.items():   # copy: the published table is never written to
+            rec[c] = np.full(max(n, len(t[c])), -1, dtype=dtype)
+            rec[c][:len(t[c])] = t[c]
+        self._gkey.extend([None] * (n - len(self._gkey)))
+
+        cnt = st.count[groups]
+        keys = [st.keys[g] for g in groups.tolist()]
+        changed = [j for j, (g, k) in enumerate(zip(groups.tolist(), keys)) if self._gkey[g] is not k]
+        if changed:
+            ch = groups[changed]
+            live = [j for j in changed if keys[j] is not None]
+            lg = groups[live]
+            rec["route"][ch] = -1
+            if live:
+                ks = [keys[j] for j in live]
+                rec["route"][lg] = self._route_codes([k[0] for k in ks])
+                rec["day"][lg] = dates_to_days([k[1] for k in ks])
+                rec["airline"][lg] = self._airline_codes([k[2] for k in ks])
+            for g, k in zip(ch.tolist(), (keys[j] for j in changed)):
+                self._gkey[g] = k
+
+        has = cnt > 0
+        g, c = groups[has], cnt[has].astype(np.int64)
+        rec["obs"][groups] = 0
+        rec["ts"][g] = st.ts[g, c - 1]
+        rec["latest"][g] = st.price[g, c - 1]
+        window = np.arange(st.n)
+        keep = (window >= (c - self.recent)[:, None]) & (window < c[:, None])
+        rec["low"][g] = np.where(keep, st.price[g], np.inf).min(axis=1)
+        rec["obs"][g] = c
+
+        was = np.zeros(len(rec["route"]), dtype=bool)
+        was[:len(t["route"])] = _live(t)
+        resort = bool(changed) or bool((was[groups] != _live(rec)[groups]).any())
+        self._t = self._views(rec) if resort else self._views(rec, t["by_origin"], t["by_route"])
+        return len(groups)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    @staticmethod
+    def _day_bound(value, default):
+        if value is None:
+            return default
+        day = dates_to_days([value])[0]
+        if day == NO_DAY:
+            raise ValueError(f"not a date: {value!r}")
+        return int(day)
+
+    def _slice(self, view, owner, date_from, date_to):
+        ids, key = view
+        lo = self._day_bound(date_from, NO_DAY) + DAY_SHIFT
+        hi = self._day_bound(date_to, np.iinfo(np.int32).max) + DAY_SHIFT
+        base = np.int64(owner) << 32
+        return ids[np.searchsorted(key, base + lo, "left"):np.searchsorted(key, base + hi, "right")]
+
+    def _ranked(self, t, ids, per, k, by):
+        """Cheapest record per value of `per` (one entry per id), cheapest first, at most k."""
+        if by not in RANK_COLS:
+            raise ValueError(f"by must be one of {sorted(RANK_COLS)}, got {by!r}")
+        price = t[RANK_COLS[by]][ids]
+        order = np.lexsort((ids, price, per))
+        p = per[order]
+        best = order[np.r_[True, p[1:] != p[:-1]]] if len(order) else order
+        best = best[np.lexsort((ids[best], price[best]))]
+        return self._frame(t, ids[best[:k] if k is not None else best])
+
+    def _frame(self, t, ids):
+        rc = t["route"][ids]
+        airport = np.asarray(self._airport_labels, dtype=object)
+        return pd.DataFrame({
+            "origin": airport[self._route_origin[rc]],
+            "destination": airport[self._route_dest[rc]],
+            "route": np.asarray(self._route_labels, dtype=object)[rc],
+            "departure_date": days_to_dates(t["day"][ids]),
+            "airline": np.asarray(self._airline_labels, dtype=object)[t["airline"][ids]],
+            "latest_price": t["latest"][ids],
+            "min_recent_price": t["low"][ids],
+            "observed_at": pd.to_datetime(t["ts"][ids]),
+            "obs_count": t["obs"][ids],
+        })
+
+    def _airline_mask(self, t, ids, airline):
+        ac = self._airlines.get(str(airline).lower(), -1)
+        return ids[t["airline"][ids] == ac]
+
+    def cheapest_destinations(self, origin, k=20, date_from=None, date_to=None, by="latest", airline=None):
+        """Destinations from `origin`, each at its cheapest (departure date, airline) departing
+        within [date_from, date_to], cheapest first. by="latest" ranks on each group's latest
+        price, by="min_recent" on the lowest of its last `recent` prices."""
+        t = self._t   # one published table for the whole query
+        oc = self._origins.get(str(origin).upper().strip(), -1)
+        ids = self._slice(t["by_origin"], oc, date_from, date_to) if oc >= 0 else t["by_origin"][0][:0]
+        if airline is not None:
+            ids = self._airline_mask(t, ids, airline)
+        return self._ranked(t, ids, self._route_dest[t["route"][ids]], k, by)
+
+    def cheapest_airlines(self, route, k=None, date_from=None, date_to=None, by="latest"):
+        """Airlines on `route`, each at its cheapest departure date in [date_from, date_to], cheapest first."""
+        t = self._t
+        rc = self._routes.get(str(route).upper().strip(), -1)
+        ids = self._slice(t["by_route"], rc, date_from, date_to) if rc >= 0 else t["by_route"][0][:0]
+        return self._ranked(t, ids, t["airline"][ids], k, by)
+
+    def query(self, origin=None, route=None, k=20, date_from=None, date_to=None, by="latest", airline=None):
+        """One entry point for both questions (serve.py): a route ranks airlines, an origin destinations."""
+        if route is not None:
+            return self.cheapest_airlines(route, k, date_from, date_to, by)
+        return self.cheapest_destinations(origin, k, date_from, date_to, by, airline)
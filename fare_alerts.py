@@ -0,0 +1,200 @@
+# ============================================
+# STREAMING PRICE ALERT ENGINE (many subscriptions, one pass per chunk)
+# subscription = route + target_price, optional departure_date / airline;
+# fires once, on the first observation with price <= target_price.
+#
+# Index: subscriptions grouped by filter key (route, day-or-any, airline-or-any),
+# target_price ascending inside each key. For a chunk, every key present gets
+# its running minimum price in time order; the subscriptions that fire are then
+# exactly the top of that key's threshold range (target >= chunk min), found by
+# binary search. Fired subscriptions are cut off the range, so cost scales with
+# observations + triggers, not with the number of registered subscriptions.
+#
+# "First hit" = earliest observed_at within the first chunk that crosses the
+# target (chunks are matched in stream order, like the ingest itself).
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+from fare_compact import NO_DAY, dates_to_days, days_to_dates, decode_price, is_compact
+from fare_index import LEVELS
+from fare_store import _ragged_arange, to_epoch_ns
+
+ACTIVE, FIRED, CANCELLED = 0, 1, 2
+ANY_AIRLINE = ""
+TRIGGER_COLS = ["sub_id", "route", "target_price", "triggered_at", "trigger_price", "departure_date", "airline"]
+
+
+def _first_true(check, lo, hi):
+    """Vectorized binary search: per entry, first i in [lo, hi) with check(i) true (hi if none).
+
+    check(mid, sel) gets candidate positions for entries `sel` and must be monotone.
+    """
+    lo, hi = lo.copy(), hi.copy()
+    sel = np.flatnonzero(lo < hi)
+    while len(sel):
+        mid = (lo[sel] + hi[sel]) // 2
+        ok = check(mid, sel)
+        hi[sel[ok]] = mid[ok]
+        lo[sel[~ok]] = mid[~ok] + 1
+        sel = sel[lo[sel] < hi[sel]]
+    return lo
+
+
+def _lower(values):
+    codes, uniq = pd.factorize(pd.Series(values, dtype=object))
+    low = pd.Index(uniq, dtype=object).astype(str).str.lower().to_numpy(dtype=object)
+    return np.append(low, ANY_AIRLINE)[codes]
+
+
+class AlertEngine:
+    def __init__(self):
+        self.subs = pd.DataFrame({
+            "route": pd.Series(dtype=object), "day": pd.Series(dtype=np.int32),
+            "airline": pd.Series(dtype=object), "target_price": pd.Series(dtype=np.float64),
+            "state": pd.Series(dtype=np.int8),
+        })
+        self.subs.index.name = "sub_id"
+        self._next_id = 0
+        self._index = None
+
+    def __len__(self):
+        return int((self.subs["state"] == ACTIVE).sum())
+
+    # -------------------------------
+    # Bulk register / cancel
+    # -------------------------------
+    def register(self, subs):
+        """subs: DataFrame or list of dicts with route, target_price and optionally
+        departure_date, airline, sub_id. Returns the sub_ids."""
+        q = pd.DataFrame(subs)
+        n = len(q)
+        if "sub_id" in q.columns:
+            ids = q["sub_id"].to_numpy(dtype=np.int64)
+        else:
+            ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        if pd.Index(ids).has_duplicates or self.subs.index.isin(ids).any():
+            raise ValueError("sub_id values must be unique")
+
+        col = lambda c: q[c] if c in q.columns else pd.Series([None] * n, index=q.index, dtype=object)
+        new = pd.DataFrame({
+            "route": q["route"].astype(str).str.strip().str.upper().to_numpy(dtype=object),
+            "day": dates_to_days(col("departure_date")),
+            "airline": _lower(col("airline")),
+            "target_price": q["target_price"].to_numpy(dtype=np.float64),
+            "state": np.full(n, ACTIVE, dtype=np.int8),
+        }, index=pd.Index(ids, name="sub_id"))
+
+        self.subs = new if self.subs.empty else pd.concat([self.subs, new])
+        self._next_id = max(self._next_id, int(ids.max()) + 1) if n else self._next_id
+        self._index = None
+        return ids
+
+    def cancel(self, sub_ids):
+        """Cancel active subscriptions; returns how many were still active."""
+        hit = self.subs.index.isin(np.asarray(sub_ids)) & (self.subs["state"] == ACTIVE).to_numpy()
+        self.subs.loc[hit, "state"] = CANCELLED
+        if hit.any():
+            self._index = None
+        return int(hit.sum())
+
+    # -------------------------------
+    # Index (rebuilt lazily after register/cancel)
+    # -------------------------------
+    def _build(self):
+        active = np.flatnonzero((self.subs["state"] == ACTIVE).to_numpy())
+        s = self.subs.iloc[active]
+        key, keys = pd.MultiIndex.from_arrays([s["route"], s["day"], s["airline"]]).factorize()
+        thr = s["target_price"].to_numpy()
+        order = np.lexsort((thr, key))
+        key_sorted = key[order]
+        k = np.arange(len(keys))
+        self._index = {
+            "keys": keys,
+            "routes": pd.Index(keys.get_level_values(0)).unique(),
+            "pos": active[order],                    # row in self.subs
+            "thr": thr[order],
+            "start": np.searchsorted(key_sorted, k, "left"),
+            "end": np.searchsorted(key_sorted, k, "right"),   # shrinks as subscriptions fire
+        }
+
+    # -------------------------------
+    # Matching
+    # -------------------------------
+    def _observations(self, chunk):
+        route = chunk["route"].to_numpy(dtype=object)
+        keep = np.flatnonzero(pd.Index(route).isin(self._index["routes"]))
+        d = chunk.iloc[keep]
+        if is_compact(d):
+            ts, day, price = (d["observed_at"].to_numpy(dtype=np.int64),
+                              d["departure_date"].to_numpy(dtype=np.int32), decode_price(d["price"]))
+            dep = days_to_dates(day)
+        else:
+            ts, dep, price = (to_epoch_ns(d["observed_at"]),
+                              d["departure_date"].to_numpy(dtype=object), d["price"].to_numpy(dtype=np.float64))
+            day = dates_to_days(dep)
+        return (route[keep], ts, day, _lower(d["airline"]), price, dep, d["airline"].to_numpy(dtype=object))
+
+    def process(self, chunk):
+        """Match one chunk of observations (readable or compact fare columns).
+        Returns the subscriptions that fired, one row each."""
+        if self._index is None:
+            self._build()
+        idx = self._index
+        if len(idx["pos"]) == 0 or len(chunk) == 0:
+            return pd.DataFrame(columns=TRIGGER_COLS)
+        route, ts, day, air, price, dep, air_raw = self._observations(chunk)
+        n = len(route)
+
+        fired_pos, fired_obs = [], []
+        for use_day, use_air in LEVELS:
+            q_day = day if use_day else np.full(n, NO_DAY, dtype=np.int32)
+            q_air = air if use_air else np.full(n, ANY_AIRLINE, dtype=object)
+            k = idx["keys"].get_indexer(pd.MultiIndex.from_arrays([route, q_day, q_air]))
+            ok = k >= 0
+            if use_day:
+                ok &= day != NO_DAY
+            if use_air:
+                ok &= air != ANY_AIRLINE
+            obs = np.flatnonzero(ok)
+            if len(obs) == 0:
+                continue
+
+            # observations grouped by key, time order inside (arrival order on ties)
+            order = np.lexsort((ts[obs], k[obs]))
+            obs, ks = obs[order], k[obs][order]
+            runmin = pd.Series(price[obs]).groupby(ks, sort=False).cummin().to_numpy()
+            uk, seg_lo = np.unique(ks, return_index=True)
+            seg_hi = np.append(seg_lo[1:], len(ks))
+            seg_min = runmin[seg_hi - 1]
+
+            # fired = thresholds >= the key's chunk minimum (top of the sorted range)
+            thr = idx["thr"]
+            lo, hi = idx["start"][uk], idx["end"][uk]
+            cut = _first_true(lambda mid, sel: thr[mid] >= seg_min[sel], lo, hi)
+            cnt = hi - cut
+            if cnt.sum() == 0:
+                continue
+            idx["end"][uk] = cut
+
+            pos = np.repeat(cut, cnt) + _ragged_arange(cnt)
+            seg = np.repeat(np.arange(len(uk)), cnt)
+            t = thr[pos]
+            first = _first_true(lambda mid, sel: runmin[mid] <= t[sel], seg_lo[seg], seg_hi[seg])
+            fired_pos.append(idx["pos"][pos])
+            fired_obs.append(obs[first])
+
+        if not fired_pos:
+            return pd.DataFrame(columns=TRIGGER_COLS)
+        pos, o = np.concatenate(fired_pos), np.concatenate(fired_obs)
+        self.subs.iloc[pos, self.subs.columns.get_loc("state")] = FIRED
+        return pd.DataFrame({
+            "sub_id": self.subs.index.to_numpy()[pos],
+            "route": route[o],
+            "target_price": self.subs["target_price"].to_numpy()[pos],
+            "triggered_at": pd.to_datetime(ts[o]),
+            "trigger_price": price[o],
+            "departure_date": dep[o],
+            "airline": air_raw[o],
+        })
@@ -0,0 +1,207 @@
+# ============================================
+# DECISION POLICY BACKTEST (BOOK_NOW / WAIT / HOLD, fare_index.fare_decision)
+# Every observation is a decision point: a traveller asks at that moment,
+# books when the answer is BOOK_NOW, and otherwise keeps asking at each later
+# observation of the same group (route, departure_date, airline); the group's
+# last observation is a forced booking. Scored per decision point:
+#   savings = price when asked - price paid          (vs. booking right away)
+#   regret  = price paid - lowest price from then on (vs. perfect hindsight)
+# Rows are laid out group-contiguous in time order once (Replay). A policy is
+# then a few whole-array passes: decisions, "next booking at or after me" and
+# "lowest price from here on" are reverse running minima that never cross a
+# group boundary (each group's last row books; keys are offset per group).
+# sweep() scores a threshold grid in a process pool.
+# ============================================
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fare_compact import compact_frame, decode_price
+from fare_index import POLICY
+from fare_signals import rolling_signals
+
+HOLD, BOOK_NOW, WAIT = 0, 1, 2
+DECISIONS = np.array(["HOLD", "BOOK_NOW", "WAIT"], dtype=object)
+HOLD_AS = ("wait", "book")   # HOLD keeps asking (default) or books like BOOK_NOW
+
+
+def _reverse_min(x):
+    return np.minimum.accumulate(x[::-1])[::-1]
+
+
+class Replay:
+    """Observation history of many groups, group-contiguous and in time order."""
+
+    def __init__(self, route, route_labels, group_start, ts, price, trend, vol):
+        self.route = route                  # per row: route code
+        self.route_labels = route_labels
+        self.ts, self.price = ts, price
+        self.trend, self.vol = trend, vol
+        sizes = np.diff(np.r_[group_start, len(price)])
+        self.n_groups = len(group_start)
+        self.last = np.zeros(len(price), dtype=bool)
+        self.last[group_start + sizes - 1] = True
+
+        # lowest price at or after each row within its group: ranks offset per group
+        # so the reverse running minimum restarts at every boundary (exact, no float tricks)
+        uniq, rank = np.unique(price, return_inverse=True)
+        gid = np.repeat(np.arange(self.n_groups, dtype=np.int64), sizes)
+        off = gid * len(uniq)
+        self.best = uniq[_reverse_min(off + rank) - off]
+
+    def __len__(self):
+        return len(self.price)
+
+    @classmethod
+    def _build(cls, route, route_labels, day, airline, ts, price, trend=None, vol=None, k=12, min_periods=4):
+        # row id last -> equal timestamps keep table order (as add_signals / FareIndex)
+        order = np.lexsort((np.arange(len(ts)), ts, airline, day, route))
+        route, day, airline = route[order], day[order], airline[order]
+        new = np.r_[True, (route[1:] != route[:-1]) | (day[1:] != day[:-1]) | (airline[1:] != airline[:-1])]
+        start = np.flatnonzero(new) if len(route) else np.zeros(0, dtype=np.int64)
+        price = price[order]
+        if trend is None:
+            sig = rolling_signals(price, np.diff(np.r_[start, len(price)]), k, min_periods)
+            trend, vol = sig["trend_recent_pct"], sig["volatility_recent"]
+        else:
+            trend, vol = trend[order], vol[order]
+        return cls(route, route_labels, start, ts[order], price,
+                   np.asarray(trend, dtype=np.float64), np.asarray(vol, dtype=np.float64))
+
+    @classmethod
+    def from_frame(cls, fare_sig, k=12, min_periods=4):
+        """Replay of a fare_sig (readable or compact). Its trend/volatility columns are used as
+        they are when present (what get_live_fare showed), else computed with k / min_periods."""
+        d = compact_frame(fare_sig)
+        route, airline = d["route"].astype("category"), d["airline"].astype("category")
+        has_sig = "trend_recent_pct" in d.columns and "volatility_recent" in d.columns
+        return cls._build(route.cat.codes.to_numpy().astype(np.int64),
+                          route.cat.categories.to_numpy(dtype=object),
+                          d["departure_date"].to_numpy(dtype=np.int64),
+                          airline.cat.codes.to_numpy().astype(np.int64),
+                          d["observed_at"].to_numpy(dtype=np.int64), decode_price(d["price"]),
+                          d["trend_recent_pct"].to_numpy(dtype=np.float64) if has_sig else None,
+                          d["volatility_recent"].to_numpy(dtype=np.float64) if has_sig else None,
+                          k, min_periods)
+
+    @classmethod
+    def from_log(cls, log, k=12, min_periods=4, routes=None, quantiles=None):
+        """Replay of a FareLog's full history (every stored row, not just the last N per group);
+        signals are computed over that history with k / min_periods. routes= keeps only those
+        routes (e.g. fare_sig's), quantiles= only prices inside their route's trim bounds."""
+        rec = log.records()
+        labels = np.asarray(log.meta["routes"], dtype=object)
+        keep = np.ones(len(rec), dtype=bool)
+        if routes is not None:
+            keep &= pd.Index(labels).isin(list(routes))[rec["route"]]
+        if quantiles is not None and quantiles.trim:
+            keep &= quantiles.keep_mask(pd.Categorical.from_codes(rec["route"], categories=labels),
+                                        decode_price(rec["price"]))
+        if not keep.all():
+            rec = rec[keep]
+        return cls._build(rec["route"].astype(np.int64), labels,
+                          rec["day"].astype(np.int64), rec["airline"].astype(np.int64), rec["ts"].astype(np.int64),
+                          decode_price(rec["price"]), k=k, min_periods=min_periods)
+
+    # -------------------------------
+    # Scoring
+    # -------------------------------
+    def decide(self, policy=POLICY):
+        """fare_decision for every row at once (decision codes HOLD / BOOK_NOW / WAIT)."""
+        d = np.full(len(self), HOLD, dtype=np.int8)
+        up = self.trend > policy["trend_up"]              # NaN compares False, as pd.notna(...) there
+        d[up] = BOOK_NOW
+        d[~up & (self.trend < policy["trend_down"])] = WAIT   # elif: trend up wins when thresholds overlap
+        d[self.vol > policy["vol_max"]] = BOOK_NOW
+        return d
+
+    def score(self, policy=POLICY, hold="wait"):
+        """Per row: decision, price paid following the policy from there, savings and regret."""
+        if hold not in HOLD_AS:
+            raise ValueError(f"hold must be one of {HOLD_AS}, got {hold!r}")
+        d = self.decide(policy)
+        book = (d == BOOK_NOW) | self.last
+        if hold == "book":
+            book |= d == HOLD
+        paid = self.price[_reverse_min(np.where(book, np.arange(len(self)), len(self)))]
+        return d, paid, self.price - paid, paid - self.best
+
+    def totals(self, policy=POLICY, hold="wait"):
+        """One summary row for a policy, over decision points that have a later observation."""
+        d, paid, savings, regret = self.score(policy, hold)
+        s = ~self.last
+        n = int(s.sum())
+        mean = lambda x: float(x[s].mean()) if n else float("nan")
+        return {**policy, "hold": hold, "decisions": n,
+                "book_now_share": mean(d == BOOK_NOW), "wait_share": mean(d == WAIT), "hold_share": mean(d == HOLD),
+                "mean_savings": mean(savings), "mean_savings_pct": mean(savings / self.price),
+                "win_rate": mean(savings > 0), "loss_rate": mean(savings < 0),
+                "mean_regret": mean(regret), "mean_regret_book_now_always": mean(self.price - self.best)}
+
+    def by_route(self, policy=POLICY, hold="wait"):
+        """Savings / regret per route for one policy (decision points with a later observation)."""
+        d, paid, savings, regret = self.score(policy, hold)
+        s = ~self.last
+        rc = self.route[s]
+        n_routes = len(self.route_labels)
+        count = np.bincount(rc, minlength=n_routes)
+        total = lambda w: np.bincount(rc, weights=w[s], minlength=n_routes)
+        out = pd.DataFrame({
+            "route": self.route_labels,
+            "decisions": count,
+            "book_now": total((d == BOOK_NOW).astype(np.float64)).astype(np.int64),
+            "wait": total((d == WAIT).astype(np.float64)).astype(np.int64),
+            "hold": total((d == HOLD).astype(np.float64)).astype(np.int64),
+            "total_savings": total(savings),
+            "mean_savings": total(savings) / np.maximum(count, 1),
+            "win_rate": total((savings > 0).astype(np.float64)) / np.maximum(count, 1),
+            "mean_regret": total(regret) / np.maximum(count, 1),
+            "mean_regret_book_now_always": total(self.price - self.best) / np.maximum(count, 1),
+        })
+        out = out[out["decisions"] > 0]
+        return out.sort_values("total_savings", ascending=False, ignore_index=True)
+
+
+# -------------------------------
+# Threshold sweeps (one Replay per worker process, policies split across them)
+# -------------------------------
+_REPLAY = None
+
+
+def _init_worker(replay):
+    global _REPLAY
+    _REPLAY = replay
+
+
+def _score_policies(policies):
+    return [_REPLAY.totals({k: v for k, v in p.items() if k != "hold"}, p["hold"]) for p in policies]
+
+
+def policy_grid(trend_up=(POLICY["trend_up"],), trend_down=(POLICY["trend_down"],), vol_max=(POLICY["vol_max"],),
+                hold=("wait",)):
+    """Every combination of the given thresholds, as policy dicts."""
+    return [{"trend_up": u, "trend_down": dn, "vol_max": v, "hold": h}
+            for u, dn, v, h in itertools.product(trend_up, trend_down, vol_max, hold)]
+
+
+def sweep(replay, grid, workers=None, per_task=4):
+    """Score every policy of `grid` (policy_grid(...)); best (lowest mean regret) first.
+
+    workers>1 ships the replay to each worker process once and splits the grid
+    into tasks of `per_task` policies.
+    """
+    grid = [{"hold": "wait", **p} for p in grid]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(grid) > 1:
+        tasks = [grid[i:i + per_task] for i in range(0, len(grid), per_task)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(replay,)) as pool:
+            rows = [r for part in pool.map(_score_policies, tasks) for r in part]
+    else:
+        _init_worker(replay)
+        rows = _score_policies(grid)
+    return pd.DataFrame(rows).sort_values(["mean_regret", "mean_savings"], ascending=[True, False],
+                                          ignore_index=True)
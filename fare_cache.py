@@ -0,0 +1,164 @@
+# ============================================
+# PERSISTENT FARE CACHE (columnar, partitioned by route)
+# <root>/<key>/manifest.json
+# <root>/<key>/route=<ROUTE>/part.parquet     (pickle if pyarrow is missing)
+# key = hash(source size + mtime + head/tail bytes, ingest parameters),
+# so a changed itineraries.csv or changed MAX_ROUTES / KEEP_LAST_N / columns
+# is a cache miss automatically; stale entries for the same source are pruned.
+# ============================================
+
+import hashlib
+import json
+import os
+import shutil
+from urllib.parse import quote
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SAMPLE_BYTES = 4 * 1024**2
+
+
+def source_fingerprint(path, full_hash=False):
+    """size + mtime + sha1 of the first/last 4 MB (or the whole file)."""
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        if full_hash:
+            for block in iter(lambda: f.read(SAMPLE_BYTES), b""):
+                h.update(block)
+        else:
+            h.update(f.read(SAMPLE_BYTES))
+            if st.st_size > SAMPLE_BYTES:
+                f.seek(max(st.st_size - SAMPLE_BYTES, SAMPLE_BYTES))
+                h.update(f.read(SAMPLE_BYTES))
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": h.hexdigest()}
+
+
+class FareCache:
+    def __init__(self, root, source_path, params, full_hash=False):
+        self.root = root
+        self.source = source_fingerprint(source_path, full_hash=full_hash)
+        self.params = params
+        blob = json.dumps({"source": self.source, "params": params}, sort_keys=True, default=str)
+        self.key = hashlib.sha1(blob.encode()).hexdigest()[:16]
+        self.path = os.path.join(root, self.key)
+        self._manifest = None
+
+    @classmethod
+    def open(cls, path):
+        """Existing cache entry by directory, without the source file (e.g. a serving process)."""
+        self = cls.__new__(cls)
+        self.root, self.key = os.path.split(os.path.abspath(path).rstrip(os.sep))
+        self.path = os.path.join(self.root, self.key)
+        self._manifest = None
+        self.source, self.params = self.manifest()["source"], self.manifest()["params"]
+        return self
+
+    @classmethod
+    def latest(cls, root):
+        """Most recently written complete entry under `root` (None if there is none)."""
+        entries = [os.path.join(root, name) for name in os.listdir(root)] if os.path.isdir(root) else []
+        entries = [p for p in entries if os.path.exists(os.path.join(p, "manifest.json"))]
+        if not entries:
+            return None
+        return cls.open(max(entries, key=lambda p: os.path.getmtime(os.path.join(p, "manifest.json"))))
+
+    @property
+    def ext(self):
+        return ".parquet" if PYARROW_AVAILABLE else ".pkl"
+
+    def _part_path(self, route, base=None):
+        return os.path.join(base or self.path, f"route={quote(str(route), safe='')}", "part" + self.ext)
+
+    def exists(self):
+        if not os.path.exists(os.path.join(self.path, "manifest.json")):
+            return False
+        # a parquet cache is unreadable without pyarrow -> treat as a miss
+        return self.manifest().get("format") == self.ext.lstrip(".")
+
+    def manifest(self):
+        if self._manifest is None:
+            with open(os.path.join(self.path, "manifest.json")) as f:
+                self._manifest = json.load(f)
+        return self._manifest
+
+    def routes(self):
+        """route -> row count, straight from the manifest (no data read)."""
+        return self.manifest()["routes"]
+
+    # -------------------------------
+    # Write
+    # -------------------------------
+    def save(self, fare_sig):
+        tmp = self.path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        counts = {}
+        for route, part in fare_sig.groupby("route", sort=True):
+            p = self._part_path(route, base=tmp)
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            part = part.reset_index(drop=True)
+            if PYARROW_AVAILABLE:
+                part.to_parquet(p, index=False)
+            else:
+                part.to_pickle(p)
+            counts[str(route)] = int(len(part))
+
+        manifest = {
+            "key": self.key,
+            "source": self.source,
+            "params": self.params,
+            "format": self.ext.lstrip("."),
+            "columns": list(fare_sig.columns),
+            "rows": int(len(fare_sig)),
+            "routes": counts,
+        }
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=1, default=str)
+
+        # atomic-ish publish, then drop older entries built from the same source file
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(tmp, self.path)
+        self._manifest = manifest
+        self.prune_stale()
+        return self.path
+
+    def prune_stale(self):
+        if not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for name in os.listdir(self.root):
+            mpath = os.path.join(self.root, name, "manifest.json")
+            if name == self.key or not os.path.exists(mpath):
+                continue
+            with open(mpath) as f:
+                src = json.load(f).get("source", {}).get("path")
+            if src == self.source["path"]:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+                removed += 1
+        return removed
+
+    # -------------------------------
+    # Read (only the partitions asked for)
+    # -------------------------------
+    def load_route(self, route):
+        p = self._part_path(route)
+        if not os.path.exists(p):
+            return None
+        fmt = self.manifest().get("format", "parquet")
+        return pd.read_parquet(p) if fmt == "parquet" else pd.read_pickle(p)
+
+    def load(self, routes=None):
+        if routes is None:
+            routes = list(self.routes())
+        parts = [p for p in (self.load_route(r) for r in routes) if p is not None]
+        if not parts:
+            return pd.DataFrame(columns=self.manifest()["columns"])
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,101 @@
+# ============================================
+# COMPACT FARE_SIG LAYOUT + MEMORY REPORT
+# route / airline      -> category (dictionary codes + one copy of each string)
+# departure_date       -> int32 days since 1970-01-01 (NO_DAY when missing)
+# observed_at          -> int64 epoch nanoseconds
+# price, signal floats -> float32 (prices decode back to cents)
+# obs_count_in_group   -> int32
+# readable_frame() turns any slice back into the old object/datetime layout.
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+NO_DAY = np.iinfo(np.int32).min
+FLOAT32_COLS = ["price", "price_prev", "pct_change_prev", "volatility_recent", "trend_recent_pct"]
+
+
+def is_compact(df):
+    return "observed_at" in df.columns and df["observed_at"].dtype == np.int64
+
+
+def dates_to_days(values):
+    # parse each distinct value once; most tables repeat a few hundred dates
+    codes, uniq = pd.factorize(pd.Series(values, dtype=object))
+    dt = pd.to_datetime(pd.Series(uniq, dtype=object), errors="coerce").to_numpy(dtype="datetime64[D]")
+    days = np.append(np.where(np.isnat(dt), NO_DAY, dt.view(np.int64)), NO_DAY).astype(np.int32)
+    return days[codes]
+
+
+def days_to_dates(days):
+    days = np.asarray(days, dtype=np.int64)
+    out = np.asarray(days.astype("datetime64[D]").astype(object), dtype=object)
+    out[days == NO_DAY] = pd.NaT
+    return out
+
+
+def decode_price(price):
+    return np.round(np.asarray(price, dtype=np.float64), 2)
+
+
+def compact_frame(df):
+    """Compact copy of a fare_sig frame (no-op for an already compact one)."""
+    if is_compact(df):
+        return df
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for c in df.columns:
+        v = df[c]
+        if c == "observed_at":
+            out[c] = np.asarray(v, dtype="datetime64[ns]").view(np.int64)
+        elif c == "departure_date":
+            out[c] = dates_to_days(v)
+        elif c in ("route", "airline"):
+            out[c] = pd.Categorical(v.astype(str).to_numpy(dtype=object))
+        elif c in FLOAT32_COLS:
+            out[c] = v.to_numpy(dtype=np.float32)
+        elif c == "obs_count_in_group":
+            out[c] = v.to_numpy(dtype=np.int32)
+        else:
+            out[c] = v.to_numpy()
+    return out
+
+
+def readable_frame(df):
+    """Old layout: datetimes, python dates, plain strings, float64 prices."""
+    if not is_compact(df):
+        return df
+    out = df.copy()
+    out["observed_at"] = pd.to_datetime(df["observed_at"].to_numpy())
+    if "departure_date" in df.columns:
+        out["departure_date"] = days_to_dates(df["departure_date"])
+    for c in ("route", "airline"):
+        if c in df.columns:
+            out[c] = df[c].to_numpy(dtype=object)
+    for c in FLOAT32_COLS:
+        if c in df.columns:
+            out[c] = decode_price(df[c]) if c in ("price", "price_prev") else df[c].astype(np.float64)
+    if "obs_count_in_group" in df.columns:
+        out["obs_count_in_group"] = df["obs_count_in_group"].astype(np.int64)
+    return out
+
+
+def memory_report(df, rows=None):
+    """Bytes per column (values vs. category dictionaries), optionally projected to `rows` rows."""
+    n = max(len(df), 1)
+    recs = []
+    for c in df.columns:
+        v = df[c]
+        if isinstance(v.dtype, pd.CategoricalDtype):
+            data = v.cat.codes.memory_usage(index=False, deep=True)
+            dictionary = v.cat.categories.memory_usage(deep=True)
+        else:
+            data, dictionary = v.memory_usage(index=False, deep=True), 0
+        recs.append({"column": c, "dtype": str(v.dtype), "data_bytes": int(data),
+                     "dict_bytes": int(dictionary), "bytes_per_row": data / n})
+    rep = pd.DataFrame(recs).set_index("column")
+    rep.loc["TOTAL"] = ["", rep["data_bytes"].sum(), rep["dict_bytes"].sum(), rep["bytes_per_row"].sum()]
+    rep["total_mb"] = (rep["data_bytes"] + rep["dict_bytes"]) / 1024**2
+    if rows is not None:
+        # values scale with rows; dictionaries stay roughly the size they are now
+        rep["projected_mb"] = (rep["bytes_per_row"] * rows + rep["dict_bytes"]) / 1024**2
+    return rep
@@ -0,0 +1,281 @@
+# ============================================
+# POINT-IN-TIME FARE INDEX (route -> departure_date -> airline)
+# Built once over fare_sig. Each filter level keeps row ids sorted by
+# (key, observed_at), so "latest observation at or before now" is one
+# searchsorted instead of a boolean scan + copy + sort per call.
+# Works on both the readable and the compact fare_sig layout (fare_compact.py);
+# answers and rows() always come back readable.
+# ============================================
+
+import copy
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from fare_compact import days_to_dates, decode_price, is_compact, readable_frame
+from fare_store import to_epoch_ns
+
+# filter levels: (use departure_date, use airline)
+LEVELS = [(False, False), (True, False), (False, True), (True, True)]
+
+# BOOK_NOW / WAIT / HOLD thresholds (fare_backtest.py scores and sweeps them)
+POLICY = {"trend_up": 0.05, "trend_down": -0.05, "vol_max": 0.10}
+
+
+def fare_decision(trend, vol, policy=POLICY):
+    decision = "HOLD"
+    why = []
+
+    if pd.notna(trend):
+        if trend > policy["trend_up"]:
+            decision = "BOOK_NOW"
+            why.append(f"Price trending up (~{trend*100:.1f}% recent).")
+        elif trend < policy["trend_down"]:
+            decision = "WAIT"
+            why.append(f"Price trending down (~{trend*100:.1f}% recent).")
+
+    if pd.notna(vol) and vol > policy["vol_max"]:
+        decision = "BOOK_NOW"
+        why.append("High volatility (big swings).")
+
+    if not why:
+        why.append("Limited recent signal; showing latest observed price.")
+    return decision, " ".join(why)
+
+
+def _timestamps(values, errors="raise"):
+    # each distinct value is parsed on its own (as the scalar path does), so one
+    # batch may mix formats: "2022-05-01", "2022-05-01 10:30", "05/01/2022", Timestamps
+    codes, uniq = pd.factorize(pd.Series(values, dtype=object))
+    parsed = [pd.to_datetime(v, errors=errors) for v in uniq.tolist()]
+    ts = pd.DatetimeIndex(parsed + [pd.NaT]).as_unit("ns")
+    return pd.Series(ts[codes])
+
+
+def _dates(values):
+    return _timestamps(values, errors="coerce").dt.date
+
+
+class FareIndex:
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        d = self.df
+        self.compact = is_compact(d)
+        if self.compact:
+            self.ts = d["observed_at"].to_numpy(dtype=np.int64)
+            dc, days = pd.factorize(d["departure_date"].to_numpy())
+            self.dates = pd.Index(days_to_dates(days), dtype=object)
+        else:
+            self.ts = to_epoch_ns(d["observed_at"])
+            dc, self.dates = pd.factorize(d["departure_date"])
+
+        rc, routes = pd.factorize(d["route"].to_numpy(dtype=object))
+        self.routes = pd.Index(routes, dtype=object)
+        ac, self.airlines = pd.factorize(d["airline"].astype(str).str.lower())
+        self._codes = (rc.astype(np.int64), dc.astype(np.int64), ac.astype(np.int64))
+
+        self.uniq_ts, ts_rank = np.unique(self.ts, return_inverse=True)
+        self._ts_rank = ts_rank.astype(np.int64)
+        self._levels = {}
+        self._dead = None         # masked() views: rows hidden from every lookup
+        self._prev_live = {}
+
+        # scalar-path dictionaries + plain arrays for building answers
+        self._route_code = {r: i for i, r in enumerate(self.routes)}
+        self._date_code = {x: i for i, x in enumerate(self.dates)}
+        self._airline_code = {a: i for i, a in enumerate(self.airlines)}
+        # labels are looked up through the codes (last slot = missing date), never per-row copies
+        opt = lambda c, fill: d[c].to_numpy(dtype=np.float64) if c in d.columns else np.full(len(d), fill)
+        self._route_labels = self.routes.to_numpy(dtype=object)
+        self._date_labels = np.append(self.dates.to_numpy(dtype=object), pd.NaT)
+        airline = d["airline"].astype("category") if self.compact else d["airline"]
+        self._airline_labels = airline.cat.categories.to_numpy(dtype=object) if self.compact else None
+        self._cols = {
+            "airline": airline.cat.codes.to_numpy() if self.compact else airline.to_numpy(dtype=object),
+            "price": decode_price(d["price"]) if self.compact else d["price"].to_numpy(dtype=np.float64),
+            "trend": opt("trend_recent_pct", np.nan),
+            "vol": opt("volatility_recent", np.nan),
+            "obs": opt("obs_count_in_group", 0),
+        }
+
+    def __len__(self):
+        return len(self.df)
+
+    def masked(self, dead):
+        """View that skips the rows flagged in `dead` (bool per row). Level tables are
+        shared with this index, so hiding rows costs one pass per level, not a rebuild."""
+        view = copy.copy(self)
+        view._dead = np.asarray(dead, dtype=bool)
+        view._prev_live = {}
+        return view
+
+    # -------------------------------
+    # Level tables (built lazily)
+    # -------------------------------
+    def _level_code(self, rc, dc, ac, level):
+        use_dep, use_air = level
+        code = rc
+        if use_dep:
+            code = code * len(self.dates) + dc
+        if use_air:
+            code = code * len(self.airlines) + ac
+        return code
+
+    def _level(self, level):
+        if level not in self._levels:
+            lc = self._level_code(*self._codes, level)
+            # row id last -> on equal timestamps the later row in fare_sig wins
+            order = np.lexsort((np.arange(len(lc)), self._ts_rank, lc))
+            m = len(self.uniq_ts) + 1
+            self._levels[level] = (order, lc[order], lc[order] * m + self._ts_rank[order])
+        return self._levels[level]
+
+    def _query_codes(self, route, departure_date, airline):
+        rc = self.routes.get_indexer(pd.Index(route, dtype=object))
+        dc = self.dates.get_indexer(pd.Index(_dates(departure_date), dtype=object))
+        ac = self.airlines.get_indexer(pd.Index(pd.Series(airline, dtype=object).astype(str).str.lower()))
+        return rc.astype(np.int64), dc.astype(np.int64), ac.astype(np.int64)
+
+    def _scalar_codes(self, route, departure_date, airline):
+        rc = self._route_code.get(route, -1)
+        dc = -1
+        if departure_date is not None:
+            dd = pd.to_datetime(departure_date, errors="coerce")
+            dc = -1 if pd.isna(dd) else self._date_code.get(dd.date(), -1)
+        ac = -1 if airline is None else self._airline_code.get(str(airline).lower(), -1)
+        return np.array([rc]), np.array([dc]), np.array([ac])
+
+    def _live_before(self, level):
+        # sorted position -> last position at or before it whose row is not dead (-1 if none)
+        if level not in self._prev_live:
+            live = ~self._dead[self._level(level)[0]]
+            self._prev_live[level] = np.maximum.accumulate(np.where(live, np.arange(len(live)), -1))
+        return self._prev_live[level]
+
+    def _range(self, level, lc):
+        order, lc_sorted, _ = self._level(level)
+        lo = np.searchsorted(lc_sorted, lc, "left")
+        hi = np.searchsorted(lc_sorted, lc, "right")
+        return order, lo, hi
+
+    # -------------------------------
+    # Lookups
+    # -------------------------------
+    def _latest(self, level, rc, dc, ac, now_ns):
+        known = (rc >= 0) & ((dc >= 0) | (not level[0])) & ((ac >= 0) | (not level[1]))
+        lc = self._level_code(rc, dc, ac, level)
+
+        order, lc_sorted, composite = self._level(level)
+        if not len(order):   # empty table (e.g. a live tail before its first rows)
+            return np.full(len(lc), -1, dtype=np.int64)
+        rank = np.searchsorted(self.uniq_ts, now_ns, "right") - 1
+        pos = np.searchsorted(composite, lc * (len(self.uniq_ts) + 1) + rank, "right") - 1
+        if self._dead is not None:
+            pos = np.where(pos >= 0, self._live_before(level)[np.maximum(pos, 0)], -1)
+        hit = known & (rank >= 0) & (pos >= 0)
+        hit[hit] = lc_sorted[pos[hit]] == lc[hit]
+        return np.where(hit, order[np.maximum(pos, 0)], -1)
+
+    def latest_rows(self, route, now, departure_date=None, airline=None):
+        """Vectorized: row id of the latest observation <= now per query, -1 if none.
+
+        `departure_date` / `airline` entries may be None to skip that filter.
+        """
+        route = np.asarray(route, dtype=object)
+        n = len(route)
+        now_ns = to_epoch_ns(_timestamps(now))
+        dep = np.asarray(departure_date if departure_date is not None else [None] * n, dtype=object)
+        air = np.asarray(airline if airline is not None else [None] * n, dtype=object)
+        has_dep = pd.notna(dep) if departure_date is not None else np.zeros(n, bool)
+        has_air = pd.notna(air) if airline is not None else np.zeros(n, bool)
+
+        out = np.full(n, -1, dtype=np.int64)
+        for level in LEVELS:
+            sel = np.flatnonzero((has_dep == level[0]) & (has_air == level[1]))
+            if len(sel):
+                rc, dc, ac = self._query_codes(route[sel], dep[sel], air[sel])
+                out[sel] = self._latest(level, rc, dc, ac, now_ns[sel])
+        return out
+
+    def rows(self, route, departure_date=None, airline=None):
+        """All rows for one filter, sorted by observed_at (row order on ties)."""
+        level = (departure_date is not None, airline is not None)
+        rc, dc, ac = self._scalar_codes(route, departure_date, airline)
+        if rc[0] < 0 or (level[0] and dc[0] < 0) or (level[1] and ac[0] < 0):
+            return readable_frame(self.df.iloc[0:0])
+        order, lo, hi = self._range(level, self._level_code(rc, dc, ac, level))
+        sel = order[lo[0]:hi[0]]
+        if self._dead is not None:
+            sel = sel[~self._dead[sel]]
+        return readable_frame(self.df.iloc[sel])
+
+    # -------------------------------
+    # Live fare answers (same dict schema as before)
+    # -------------------------------
+    def _airline_label(self, r):
+        a = self._cols["airline"][r]
+        return self._airline_labels[a] if self.compact else a
+
+    def _answers(self, rows):
+        c = self._cols
+        rc, dc, _ = self._codes
+        out = []
+        for r in rows.tolist():
+            if r < 0:
+                out.append({"ok": False, "reason": "No observations for that route/time filter."})
+                continue
+            trend, vol = c["trend"][r], c["vol"][r]
+            decision, explanation = fare_decision(trend, vol)
+            out.append({
+                "ok": True,
+                "route": self._route_labels[rc[r]],
+                "departure_date": self._date_labels[dc[r]],
+                "airline": self._airline_label(r),
+                "observed_at": pd.Timestamp(self.ts[r]),
+                "current_price": float(c["price"][r]),
+                "trend_recent_pct": None if np.isnan(trend) else float(trend),
+                "volatility_recent": None if np.isnan(vol) else float(vol),
+                "decision": decision,
+                "explanation": explanation,
+                "obs_count": int(c["obs"][r])
+            })
+        return out
+
+    def latest_row(self, route, now=None, departure_date=None, airline=None):
+        """Scalar latest_rows: row id of the latest observation <= now, -1 if none."""
+        if now is None:
+            now = pd.Timestamp.now()
+        level = (departure_date is not None, airline is not None)
+        now_ns = np.array([pd.Timestamp(now).value], dtype=np.int64)
+        return int(self._latest(level, *self._scalar_codes(route, departure_date, airline), now_ns)[0])
+
+    def get_live_fare(self, route, now=None, departure_date=None, airline=None):
+        return self._answers(np.array([self.latest_row(route, now, departure_date, airline)]))[0]
+
+    def get_live_fares(self, queries):
+        """Batch get_live_fare. `queries`: DataFrame or list of dicts with
+        route, and optionally now, departure_date, airline."""
+        q = pd.DataFrame(queries)
+        n = len(q)
+        if n == 0:
+            return []
+        col = lambda c: q[c].to_numpy(dtype=object, copy=True) if c in q.columns else np.full(n, None, dtype=object)
+        now = col("now")
+        now[pd.isna(now)] = pd.Timestamp.now()
+        return self._answers(self.latest_rows(col("route"), now, col("departure_date"), col("airline")))
+
+
+_INDEXES = {}   # id(frame) -> (weakref to the frame, its FareIndex)
+
+
+def index_for(df):
+    """FareIndex for a frame, built on first use and reused while the frame lives.
+
+    Entries hold the frame weakly and are dropped when it is collected.
+    """
+    hit = _INDEXES.get(id(df))
+    if hit is None or hit[0]() is not df:
+        hit = _INDEXES[id(df)] = (weakref.ref(df), FareIndex(df))
+        weakref.finalize(df, _INDEXES.pop, id(df), None)
+    return hit[1]
@@ -0,0 +1,544 @@
+# ============================================
+# ITINERARIES INGEST (serial + multi-process)
+# spec = detected source columns:
+#   {"time", "origin", "dest", "price", "airline", "dep_dt", "leg"} -> column name or None
+# Both paths run the same per-chunk steps:
+#   add_route -> count routes (Space-Saving) -> keep tracked routes -> parse_chunk -> FareStore
+# fast=True swaps in the typed variants (explicit dtypes, pyarrow reader when
+# installed, categorical airports, integer route codes, per-category date parsing).
+# Parallel mode splits the CSV into newline-aligned byte ranges; each worker
+# builds its own (SpaceSaving, FareStore) and results are merged in file order.
+# metrics=IngestMetrics(...) (ingest_metrics.py) times every step above and
+# counts rows in / dropped per filter / stored, groups created / evicted.
+# quantiles=RouteQuantiles(...) (route_quantiles.py) sketches every tracked
+# route's prices as it streams; with its trim set, rows outside the route's own
+# quantile bounds are dropped before the store.
+# dedup=ObservationDedup(...) (observation_dedup.py) drops repeated
+# (leg, time, price) rows first, before routes are even counted (serial only:
+# one filter has to see the file in order).
+# checkpoint=IngestCheckpoint(...) (ingest_checkpoint.py) saves the loop state
+# every few chunks / ranges; a restarted run resumes from the last one.
+# Hooks (serial only): on_chunk(parsed) sees every clean row, on_stored(rows)
+# only the rows that go into the store (tracked routes, after the trim).
+# ============================================
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fare_store import FareStore
+from heavy_hitters import SpaceSaving
+from ingest_metrics import NULL_METRICS, IngestMetrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DATETIME_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S.%f",
+                    "%m/%d/%Y", "%m/%d/%Y %H:%M"]
+
+
+def use_cols(spec):
+    cols = [spec["time"], spec["origin"], spec["dest"], spec["price"]]
+    if spec.get("airline"): cols.append(spec["airline"])
+    if spec.get("dep_dt"):  cols.append(spec["dep_dt"])
+    if spec.get("leg"):     cols.append(spec["leg"])
+    return cols
+
+
+def dedup_keys(chunk, spec):
+    if not spec.get("leg"):
+        raise ValueError("de-duplication needs the itinerary id column (spec['leg'])")
+    return chunk[[spec["leg"], spec["time"], spec["price"]]]
+
+
+# -------------------------------
+# Cleaning (split so routes can be counted on raw rows before parsing)
+# -------------------------------
+def add_route(chunk, spec):
+    chunk = chunk.rename(columns={
+        spec["origin"]: "origin",
+        spec["dest"]: "dest",
+        spec["time"]: "observed_at",
+        spec["price"]: "price"
+    })
+    if spec.get("airline") and spec["airline"] in chunk.columns:
+        chunk = chunk.rename(columns={spec["airline"]: "airline"})
+    if spec.get("dep_dt") and spec["dep_dt"] in chunk.columns:
+        chunk = chunk.rename(columns={spec["dep_dt"]: "departure_date"})
+
+    chunk["origin"] = chunk["origin"].astype(str).str.upper().str.strip()
+    chunk["dest"]   = chunk["dest"].astype(str).str.upper().str.strip()
+    chunk["route"]  = chunk["origin"] + "-" + chunk["dest"]
+    return chunk
+
+
+def parse_chunk(chunk, metrics=NULL_METRICS):
+    # parse time
+    chunk["observed_at"] = pd.to_datetime(chunk["observed_at"], errors="coerce")
+
+    # price numeric
+    chunk["price"] = (chunk["price"].astype(str).str.replace(r"[^0-9.]", "", regex=True))
+    chunk["price"] = pd.to_numeric(chunk["price"], errors="coerce")
+
+    # optional departure date
+    if "departure_date" in chunk.columns:
+        chunk["departure_date"] = pd.to_datetime(chunk["departure_date"], errors="coerce").dt.date
+    else:
+        chunk["departure_date"] = pd.NaT
+
+    # drop junk
+    n = len(chunk)
+    chunk = chunk.dropna(subset=["observed_at", "price", "origin", "dest"])
+    metrics.count("rows_dropped_unparsed", n - len(chunk))
+    n = len(chunk)
+    chunk = chunk[chunk["price"] > 0]
+    metrics.count("rows_dropped_nonpositive_price", n - len(chunk))
+
+    # If airline missing, fill stable value so grouping works
+    if "airline" not in chunk.columns:
+        chunk["airline"] = "ALL"
+    return chunk
+
+
+def clean_chunk(chunk, spec):
+    return parse_chunk(add_route(chunk, spec))
+
+
+# -------------------------------
+# Typed fast path: explicit dtypes at read time, categorical strings,
+# dates parsed once per distinct value, routes built from airport code pairs.
+# -------------------------------
+def _guess_datetime_format(values):
+    values = pd.Series(values).dropna().astype(str).head(200)
+    for fmt in DATETIME_FORMATS:
+        try:
+            pd.to_datetime(values, format=fmt, errors="raise")
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def sniff_schema(path, spec, nrows=10_000):
+    """Look at the head of the file once: is the price numeric, which date formats, row width."""
+    sample = pd.read_csv(path, usecols=use_cols(spec), nrows=nrows, low_memory=False)
+    with open(path, "rb") as f:
+        head = f.read(1024**2)
+    lines = max(head.count(b"\n") - 1, 1)
+    return {
+        "price_numeric": bool(pd.api.types.is_numeric_dtype(sample[spec["price"]])),
+        "time_format": _guess_datetime_format(sample[spec["time"]]),
+        "dep_format": _guess_datetime_format(sample[spec["dep_dt"]]) if spec.get("dep_dt") else None,
+        "bytes_per_row": len(head) / lines,
+    }
+
+
+def typed_dtypes(spec, schema):
+    dtypes = {spec["time"]: "category", spec["origin"]: "category", spec["dest"]: "category",
+              spec["price"]: "float32" if schema["price_numeric"] else "object"}
+    if spec.get("airline"): dtypes[spec["airline"]] = "category"
+    if spec.get("dep_dt"):  dtypes[spec["dep_dt"]] = "category"
+    if spec.get("leg"):     dtypes[spec["leg"]] = "object"   # ~unique per chunk: hashed as plain strings
+    return dtypes
+
+
+def iter_typed_chunks(path, spec, schema, chunk_rows=250_000, engine="auto"):
+    if engine == "auto":
+        engine = "pyarrow" if PYARROW_AVAILABLE else "pandas"
+    if engine != "pyarrow":
+        yield from pd.read_csv(path, usecols=use_cols(spec), dtype=typed_dtypes(spec, schema),
+                               chunksize=chunk_rows, low_memory=False)
+        return
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=max(int(chunk_rows * schema["bytes_per_row"]), 1 << 20)),
+        convert_options=pa_csv.ConvertOptions(include_columns=use_cols(spec), column_types=_arrow_types(spec, schema)),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _arrow_types(spec, schema):
+    as_dict = pa.dictionary(pa.int32(), pa.string())
+    return {c: (pa.float32() if t == "float32" else pa.string() if t == "object" else as_dict)
+            for c, t in typed_dtypes(spec, schema).items()}
+
+
+def iter_byte_chunks(path, spec, schema=None, chunk_rows=250_000, start=None, engine="auto"):
+    """(chunk, end offset) for ~chunk_rows-row, newline-aligned byte ranges, each parsed on its own.
+
+    The ranges depend only on the file, chunk_rows and start, so a run stopped
+    after any chunk resumes at its end offset and sees the same chunks as an
+    uninterrupted one. schema=None reads like the legacy path (no dtypes).
+    """
+    if engine == "auto":
+        engine = "pyarrow" if PYARROW_AVAILABLE else "pandas"
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(1024**2)
+        step = max(int(chunk_rows * len(head) / max(head.count(b"\n"), 1)), 1 << 16)
+        f.seek(0)
+        f.readline()
+        pos = f.tell() if start is None else start
+        while pos < size:
+            f.seek(pos)
+            buf = f.read(step) + f.readline()   # finish the last line
+            pos += len(buf)
+            if schema is not None and engine == "pyarrow":
+                chunk = pa_csv.read_csv(
+                    io.BytesIO(buf), read_options=pa_csv.ReadOptions(column_names=names),
+                    convert_options=pa_csv.ConvertOptions(include_columns=use_cols(spec),
+                                                          column_types=_arrow_types(spec, schema)),
+                ).to_pandas()
+            else:
+                chunk = pd.read_csv(io.BytesIO(buf), header=None, names=names, usecols=use_cols(spec),
+                                    dtype=typed_dtypes(spec, schema) if schema else None, low_memory=False)
+            yield chunk, pos
+
+
+def _normalized_codes(col):
+    """Categorical -> (codes into normalized labels, labels). Mirrors astype(str).upper().strip()."""
+    cat = col.astype("category")
+    labels = pd.Index(cat.cat.categories.astype(str).str.upper().str.strip())
+    uniq = labels.unique()
+    codes = uniq.get_indexer(labels)[cat.cat.codes.to_numpy()]
+    missing = cat.cat.codes.to_numpy() < 0
+    if missing.any():  # astype(str) turned NaN into "nan"
+        uniq = uniq.append(pd.Index(["NAN"]))
+        codes[missing] = len(uniq) - 1
+    return codes.astype(np.int64), uniq
+
+
+def _parse_by_category(col, fmt):
+    cat = col.astype("category")
+    parsed = pd.to_datetime(pd.Series(cat.cat.categories.astype(str)), format=fmt, errors="coerce").to_numpy()
+    codes = cat.cat.codes.to_numpy()
+    out = np.full(len(codes), np.datetime64("NaT"), dtype=parsed.dtype if len(parsed) else "datetime64[ns]")
+    ok = codes >= 0
+    out[ok] = parsed[codes[ok]]
+    return out
+
+
+def add_route_typed(chunk, spec):
+    chunk = chunk.rename(columns={spec["time"]: "observed_at", spec["price"]: "price"})
+    if spec.get("airline") and spec["airline"] in chunk.columns:
+        chunk = chunk.rename(columns={spec["airline"]: "airline"})
+    if spec.get("dep_dt") and spec["dep_dt"] in chunk.columns:
+        chunk = chunk.rename(columns={spec["dep_dt"]: "departure_date"})
+
+    # one airport dictionary for both ends -> route code = origin * n + dest
+    o_codes, o_lab = _normalized_codes(chunk[spec["origin"]])
+    d_codes, d_lab = _normalized_codes(chunk[spec["dest"]])
+    airports = o_lab.append(d_lab).unique()
+    o = airports.get_indexer(o_lab)[o_codes]
+    d = airports.get_indexer(d_lab)[d_codes]
+    route_code = o * len(airports) + d
+
+    # strings only for the distinct routes of this chunk
+    local, uniq = pd.factorize(route_code)
+    names = [f"{airports[c // len(airports)]}-{airports[c % len(airports)]}" for c in uniq.tolist()]
+    chunk = chunk.drop(columns=[spec["origin"], spec["dest"]])
+    chunk["origin"] = pd.Categorical.from_codes(o, categories=airports)
+    chunk["dest"] = pd.Categorical.from_codes(d, categories=airports)
+    chunk["route"] = pd.Categorical.from_codes(local, categories=pd.Index(names).unique()) \
+        if len(set(names)) == len(names) else pd.Categorical(np.asarray(names, dtype=object)[local])
+    return chunk
+
+
+def parse_chunk_typed(chunk, schema, metrics=NULL_METRICS):
+    chunk["observed_at"] = _parse_by_category(chunk["observed_at"], schema["time_format"])
+
+    # regex fallback only when the price column really is text;
+    # float32 fares are widened and snapped back to cents (exact below ~131k)
+    if schema["price_numeric"]:
+        chunk["price"] = chunk["price"].astype(np.float64).round(2)
+    else:
+        chunk["price"] = pd.to_numeric(
+            chunk["price"].astype(str).str.replace(r"[^0-9.]", "", regex=True), errors="coerce")
+
+    if "departure_date" in chunk.columns:
+        chunk["departure_date"] = pd.Series(
+            _parse_by_category(chunk["departure_date"], schema["dep_format"]), index=chunk.index).dt.date
+    else:
+        chunk["departure_date"] = pd.NaT
+
+    n = len(chunk)
+    chunk = chunk.dropna(subset=["observed_at", "price"])
+    metrics.count("rows_dropped_unparsed", n - len(chunk))
+    n = len(chunk)
+    chunk = chunk[chunk["price"] > 0]
+    metrics.count("rows_dropped_nonpositive_price", n - len(chunk))
+
+    if "airline" not in chunk.columns:
+        chunk["airline"] = "ALL"
+    return chunk
+
+
+def clean_chunk_typed(chunk, spec, schema):
+    return parse_chunk_typed(add_route_typed(chunk, spec), schema)
+
+
+def consume_chunk(chunk, spec, store, route_hh, schema=None, on_chunk=None, metrics=NULL_METRICS,
+                  quantiles=None, dedup=None, on_stored=None):
+    """on_chunk(parsed) sees every clean row of the chunk (all routes), e.g. AlertEngine.process;
+    on_stored(rows) the rows inserted into the store, e.g. FareLog.append."""
+    metrics.count("rows_in", len(chunk))
+    if dedup is not None:
+        with metrics.stage("dedup"):
+            n = len(chunk)
+            chunk = chunk[dedup.keep_mask(dedup_keys(chunk, spec))]
+        metrics.count("rows_dropped_duplicate", n - len(chunk))
+    if spec.get("leg") and spec["leg"] in chunk.columns:
+        chunk = chunk.drop(columns=[spec["leg"]])
+    with metrics.stage("add_route"):
+        chunk = add_route(chunk, spec) if schema is None else add_route_typed(chunk, spec)
+    parse = ((lambda ch: parse_chunk(ch, metrics)) if schema is None
+             else (lambda ch: parse_chunk_typed(ch, schema, metrics)))
+
+    def keep_tracked(ch):
+        with metrics.stage("filter_routes"):
+            n = len(ch)
+            ch = ch[ch["route"].isin(route_hh.tracked())]
+        metrics.count("rows_dropped_untracked_route", n - len(ch))
+        return ch
+
+    # count every row, keep only routes the heavy-hitter summary still tracks
+    with metrics.stage("count_routes"):
+        evicted = route_hh.update(chunk["route"])
+        if len(evicted):
+            metrics.count("groups_evicted", store.evict_routes(evicted))
+            if quantiles is not None:
+                quantiles.evict(evicted)
+    if on_chunk is not None:
+        with metrics.stage("parse"):
+            chunk = parse(chunk)
+        with metrics.stage("on_chunk"):
+            on_chunk(chunk)
+        chunk = keep_tracked(chunk)
+    else:
+        chunk = keep_tracked(chunk)
+        with metrics.stage("parse"):
+            chunk = parse(chunk)
+
+    # the sketch sees every tracked price (this chunk included) before trimming
+    if quantiles is not None:
+        with metrics.stage("route_quantiles"):
+            quantiles.update(chunk["route"], chunk["price"])
+            n = len(chunk)
+            if quantiles.trim:
+                chunk = chunk[quantiles.keep_mask(chunk["route"], chunk["price"])]
+        metrics.count("rows_dropped_price_outlier", n - len(chunk))
+    if on_stored is not None:
+        with metrics.stage("on_stored"):
+            on_stored(chunk)
+
+    # One vectorized insert per chunk (keeps last N per group)
+    groups_before = len(store)
+    with metrics.stage("store_update"):
+        out = store.insert_frame(chunk)
+    metrics.count("rows_stored", len(chunk))
+    metrics.count("groups_created", len(store) - groups_before)
+    metrics.gauge("groups", len(store))
+    return out
+
+
+# -------------------------------
+# Checkpoints (state = store + route counts + sketches / filter + position)
+# -------------------------------
+def _resume(checkpoint, path, params, quantiles, dedup):
+    if checkpoint is None:
+        return None
+    checkpoint.bind(path, {**params, "quantiles": quantiles.params if quantiles is not None else None,
+                           "dedup": [dedup.capacity, dedup.fp_rate] if dedup is not None else None})
+    state = checkpoint.load()
+    if state is not None:
+        # the caller holds these objects, so they take the saved state in place
+        for obj, saved in ((quantiles, state["quantiles"]), (dedup, state["dedup"])):
+            if obj is not None:
+                obj.__dict__.update(saved.__dict__)
+    return state
+
+
+def _checkpoint(checkpoint, metrics, offset, units, store, route_hh, quantiles, dedup, done=False):
+    with metrics.stage("checkpoint"):
+        nbytes = checkpoint.save({"offset": offset, "units": units, "done": done, "store": store,
+                                  "route_hh": route_hh, "quantiles": quantiles, "dedup": dedup})
+    metrics.count("checkpoints")
+    metrics.count("checkpoint_bytes", nbytes)
+
+
+# -------------------------------
+# Serial path
+# -------------------------------
+def ingest_serial(path, spec, chunk_rows=250_000, keep_n=60, hh_capacity=10_000, progress_every=5,
+                  fast=False, on_chunk=None, metrics=NULL_METRICS, quantiles=None, dedup=None, checkpoint=None,
+                  on_stored=None):
+    store = FareStore(keep_last_n=keep_n)
+    route_hh = SpaceSaving(capacity=hh_capacity)
+
+    schema = sniff_schema(path, spec) if fast else None
+    state = _resume(checkpoint, path, {"mode": "serial", "spec": spec, "chunk_rows": chunk_rows, "keep_n": keep_n,
+                                       "hh_capacity": hh_capacity, "fast": fast}, quantiles, dedup)
+    units = 0
+    if state is not None:
+        store, route_hh, units = state["store"], state["route_hh"], state["units"]
+        if progress_every:
+            print(f"  resuming after chunk {units} (byte {state['offset']:,}) | groups stored: {len(store)}")
+        if state["done"]:
+            return store, route_hh
+    # with metrics on, read through our own handle so bytes_read is the file position
+    src = open(path, "rb") if metrics.enabled and checkpoint is None else path
+    read_pos = state["offset"] if state is not None else 0
+    try:
+        if checkpoint is not None:
+            # fixed byte ranges: the end of every chunk is a resume point
+            reader = iter_byte_chunks(path, spec, schema, chunk_rows, state["offset"] if state is not None else None)
+        elif fast:
+            reader = ((ch, None) for ch in iter_typed_chunks(src, spec, schema, chunk_rows))
+        else:
+            reader = ((ch, None) for ch in pd.read_csv(src, usecols=use_cols(spec), chunksize=chunk_rows,
+                                                       low_memory=False))
+        for units, (ch, end) in enumerate(metrics.timed_iter(reader, "read"), start=units + 1):
+            consume_chunk(ch, spec, store, route_hh, schema, on_chunk, metrics, quantiles, dedup, on_stored)
+            if checkpoint is not None and checkpoint.due(units):
+                _checkpoint(checkpoint, metrics, end, units, store, route_hh, quantiles, dedup)
+            if metrics.enabled:
+                pos = end if end is not None else src.tell()
+                metrics.count("bytes_read", pos - read_pos)
+                read_pos = pos
+                metrics.end_chunk(rows=len(ch))
+            if progress_every and units % progress_every == 0:
+                print(f"  processed chunks: {units} | groups stored: {len(store)}")
+    finally:
+        if src is not path:
+            src.close()
+    if checkpoint is not None:
+        _checkpoint(checkpoint, metrics, os.path.getsize(path), units, store, route_hh, quantiles, dedup, done=True)
+    return store, route_hh
+
+
+# -------------------------------
+# Parallel path
+# -------------------------------
+def split_byte_ranges(path, n_parts):
+    """[(start, end), ...] covering the data rows, each starting at a line start.
+
+    Assumes no quoted field contains a newline (true for itineraries.csv).
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        cuts = [data_start]
+        step = max((size - data_start) // max(n_parts, 1), 1)
+        for k in range(1, n_parts):
+            f.seek(max(data_start + k * step, cuts[-1]))
+            f.readline()
+            pos = min(f.tell(), size)
+            if pos > cuts[-1]:
+                cuts.append(pos)
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+
+def read_range(path, start, end, usecols, chunk_rows, dtype=None):
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    with open(path, "rb") as f:
+        f.seek(start)
+        buf = f.read(end - start)
+    return pd.read_csv(io.BytesIO(buf), header=None, names=names, usecols=usecols, dtype=dtype,
+                       chunksize=chunk_rows, low_memory=False)
+
+
+def _ingest_range(args):
+    path, start, end, spec, chunk_rows, keep_n, hh_capacity, schema, with_metrics, quantiles = args
+    store = FareStore(keep_last_n=keep_n, initial_groups=256)
+    route_hh = SpaceSaving(capacity=hh_capacity)
+    metrics = IngestMetrics() if with_metrics else NULL_METRICS   # totals only; the parent exports
+    dtype = typed_dtypes(spec, schema) if schema else None
+    for ch in metrics.timed_iter(read_range(path, start, end, use_cols(spec), chunk_rows, dtype), "read"):
+        consume_chunk(ch, spec, store, route_hh, schema, metrics=metrics, quantiles=quantiles)
+    metrics.count("bytes_read", end - start)
+    return store, route_hh, metrics, quantiles
+
+
+def merge_results(store, route_hh, part_store, part_hh, quantiles=None, part_q=None):
+    """Fold one worker result into the running totals (parts must come in file order)."""
+    evicted = route_hh.merge(part_hh)
+    store.merge(part_store)
+    # anything no longer tracked after the merge leaves the store
+    untracked = set(store.routes) - set(route_hh.tracked())
+    store.evict_routes(untracked | set(evicted))
+    if quantiles is not None:
+        quantiles.merge(part_q)
+        quantiles.evict((set(quantiles.routes()) - set(route_hh.tracked())) | set(evicted))
+
+
+def ingest_parallel(path, spec, workers=None, mem_cap_mb=2048, chunk_rows=250_000,
+                    keep_n=60, hh_capacity=10_000, progress_every=1, fast=False, metrics=NULL_METRICS,
+                    quantiles=None, dedup=None, checkpoint=None):
+    """Same result as ingest_serial when the file has <= hh_capacity distinct routes
+    (with quantiles.trim, workers trim against their own range's sketch, so the
+    rows kept can differ slightly). dedup is refused: a worker's store has taken
+    its rows (and evicted older ones for them) before the earlier ranges' keys
+    are known, so repeats across ranges could not be dropped afterwards.
+
+    mem_cap_mb bounds the raw bytes in flight: every worker holds one byte range
+    (~4x its size once parsed), so ranges are sized to mem_cap / (4 * workers).
+    """
+    if dedup is not None:
+        raise ValueError("dedup needs workers=1 (one filter has to see every range in file order)")
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    range_bytes = max(int(mem_cap_mb * 1024**2 / (4 * workers)), 1024**2)
+    n_parts = max(workers, int(np.ceil(size / range_bytes)))
+    ranges = split_byte_ranges(path, n_parts)
+    schema = sniff_schema(path, spec) if fast else None
+    tasks = [(path, a, b, spec, chunk_rows, keep_n, hh_capacity, schema, metrics.enabled,
+              quantiles.empty_like() if quantiles is not None else None) for a, b in ranges]
+
+    store = FareStore(keep_last_n=keep_n)
+    route_hh = SpaceSaving(capacity=hh_capacity)
+    state = _resume(checkpoint, path, {"mode": "parallel", "spec": spec, "ranges": ranges, "chunk_rows": chunk_rows,
+                                       "keep_n": keep_n, "hh_capacity": hh_capacity, "fast": fast},
+                    quantiles, None)
+    done = 0
+    if state is not None:
+        # ranges are merged in file order, so the first `units` are already in the state
+        store, route_hh, done = state["store"], state["route_hh"], state["units"]
+        if progress_every:
+            print(f"  resuming after range {done}/{len(tasks)} | groups stored: {len(store)}")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields in submission order -> merges happen in file order
+        for i, (part_store, part_hh, part_metrics, part_q) in enumerate(
+                pool.map(_ingest_range, tasks[done:]), start=done + 1):
+            with metrics.stage("merge"):
+                merge_results(store, route_hh, part_store, part_hh, quantiles, part_q)
+            if checkpoint is not None and (checkpoint.due(i) or i == len(tasks)):
+                _checkpoint(checkpoint, metrics, ranges[i - 1][1], i, store, route_hh, quantiles, None,
+                            done=i == len(tasks))
+            metrics.merge(part_metrics)
+            metrics.gauge("groups", len(store))
+            metrics.end_chunk(range=i, of=len(tasks))
+            if progress_every and i % progress_every == 0:
+                print(f"  merged ranges: {i}/{len(tasks)} | groups stored: {len(store)}")
+    return store, route_hh
+
+
+def ingest(path, spec, workers=1, **kw):
+    if workers and workers > 1:
+        for hook in ("on_chunk", "on_stored"):
+            if kw.pop(hook, None) is not None:
+                raise ValueError(f"{hook} needs workers=1 (parallel chunks are parsed inside worker processes)")
+        return ingest_parallel(path, spec, workers=workers, **kw)
+    kw.pop("mem_cap_mb", None)
+    return ingest_serial(path, spec, **kw)
@@ -0,0 +1,286 @@
+# ============================================
+# APPEND-ONLY FARE LOG (full history on disk, memory-mapped reads)
+# Every clean observation is one fixed-width 24-byte record:
+#   route code int32 | departure day int32 | airline code int32 | observed_at int64 ns | price float32
+# append() writes a chunk sorted by (group, observed_at), so each group lands
+# in one contiguous extent per append; extents.bin indexes them
+# (group, first record, count). compact() rewrites the log with one extent
+# per group, after which history() is a zero-copy np.memmap slice.
+# meta.json is written last (atomically) and is the commit point: readers
+# never look past its record count, so a torn append is simply not there.
+# Group = (route, departure_date, airline), as in fare_store.py.
+# ============================================
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from fare_compact import dates_to_days, days_to_dates, decode_price
+from fare_store import _ragged_arange, to_epoch_ns
+
+LOG_VERSION = 1
+RECORD_DTYPE = np.dtype([("route", "<i4"), ("day", "<i4"), ("airline", "<i4"), ("ts", "<i8"), ("price", "<f4")])
+EXTENT_DTYPE = np.dtype([("group", "<i4"), ("start", "<i8"), ("count", "<i8")])
+GROUP_DTYPE = np.dtype([("route", "<i4"), ("day", "<i4"), ("airline", "<i4")])
+
+
+def _write_at(path, arr, n_committed):
+    # bytes past the last commit (a torn append) are cut off before writing
+    with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+        f.truncate(n_committed * arr.dtype.itemsize)
+        f.seek(n_committed * arr.dtype.itemsize)
+        f.write(arr.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _read_array(path, dtype, n):
+    if n == 0 or not os.path.exists(path):
+        return np.zeros(0, dtype=dtype)
+    return np.fromfile(path, dtype=dtype, count=n)
+
+
+class FareLog:
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self._path("meta.json")):
+            with open(self._path("meta.json")) as f:
+                self.meta = json.load(f)
+            if self.meta.get("version") != LOG_VERSION:
+                raise ValueError(f"{root}: fare log version {self.meta.get('version')}, expected {LOG_VERSION}")
+        else:
+            self.meta = {"version": LOG_VERSION, "generation": 0, "records": 0, "extents": 0, "groups": 0,
+                         "routes": [], "airlines": []}
+        self.routes = {r: i for i, r in enumerate(self.meta["routes"])}
+        self.airlines = {a: i for i, a in enumerate(self.meta["airlines"])}
+        self._airline_lower = None
+        groups = _read_array(self._path("groups.bin"), GROUP_DTYPE, self.meta["groups"])
+        self.groups = {(int(r), int(d), int(a)): g for g, (r, d, a) in enumerate(groups.tolist())}
+        self._group_arr = groups
+        self._mm = None
+        self._extents = None
+
+    @classmethod
+    def create(cls, root):
+        """Empty log at `root` (an existing one there is removed)."""
+        if os.path.isdir(root):
+            for name in os.listdir(root):
+                if name == "meta.json" or name.endswith(".bin"):
+                    os.remove(os.path.join(root, name))
+        return cls(root)
+
+    @staticmethod
+    def exists(root):
+        return os.path.exists(os.path.join(root, "meta.json"))
+
+    def __len__(self):
+        return self.meta["records"]
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    @property
+    def records_path(self):
+        return self._path(f"records.{self.meta['generation']}.bin")
+
+    @property
+    def extents_path(self):
+        return self._path(f"extents.{self.meta['generation']}.bin")
+
+    def _commit(self):
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._path("meta.json"))
+        self._mm = self._extents = None
+
+    # -------------------------------
+    # Append
+    # -------------------------------
+    def _codes(self, values, table, key):
+        codes, uniq = pd.factorize(pd.Series(values, dtype=object).astype(str))
+        lut = np.empty(len(uniq), dtype=np.int32)
+        for j, v in enumerate(uniq.tolist()):
+            c = table.get(v)
+            if c is None:
+                c = table[v] = len(table)
+                self.meta[key].append(v)
+            lut[j] = c
+        return lut[codes]
+
+    def append(self, df):
+        """Parsed observations (observed_at, route, departure_date, airline, price) -> the log.
+
+        Fits ingest(..., on_stored=log.append): it sees every row that reaches the store
+        (tracked routes, after the per-route trim).
+        """
+        if not len(df):
+            return 0
+        rc = self._codes(df["route"], self.routes, "routes")
+        ac = self._codes(df["airline"], self.airlines, "airlines")
+        self._airline_lower = None
+        day = dates_to_days(df["departure_date"])
+
+        local, uniq = pd.factorize(pd.MultiIndex.from_arrays([rc, day, ac]))
+        gcode = np.empty(len(uniq), dtype=np.int32)
+        new = []
+        for j, key in enumerate(uniq.tolist()):
+            g = self.groups.get(key)
+            if g is None:
+                g = self.groups[key] = len(self.groups)
+                new.append(key)
+            gcode[j] = g
+        group = gcode[local]
+
+        ts = to_epoch_ns(df["observed_at"])
+        order = np.lexsort((ts, group))   # stable: arrival order on equal timestamps
+        rec = np.empty(len(df), dtype=RECORD_DTYPE)
+        rec["route"], rec["day"], rec["airline"] = rc[order], day[order], ac[order]
+        rec["ts"] = ts[order]
+        rec["price"] = df["price"].to_numpy(dtype=np.float32)[order]
+
+        g_sorted = group[order]
+        starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+        ext = np.empty(len(starts), dtype=EXTENT_DTYPE)
+        ext["group"] = g_sorted[starts]
+        ext["start"] = self.meta["records"] + starts
+        ext["count"] = np.diff(np.r_[starts, len(g_sorted)])
+
+        _write_at(self.records_path, rec, self.meta["records"])
+        _write_at(self.extents_path, ext, self.meta["extents"])
+        if new:
+            new = np.array(new, dtype=GROUP_DTYPE)
+            _write_at(self._path("groups.bin"), new, self.meta["groups"])
+            self._group_arr = np.concatenate([self._group_arr, new])
+        self.meta["records"] += len(rec)
+        self.meta["extents"] += len(ext)
+        self.meta["groups"] = len(self.groups)
+        self._commit()
+        return len(rec)
+
+    def truncate(self, n_records):
+        """Roll back to the first n_records (an append boundary, e.g. a checkpoint's len(log)); 0 empties the log."""
+        if n_records == 0:
+            fresh = FareLog.create(self.root)
+            self.__dict__.update(fresh.__dict__)
+            return
+        if n_records >= self.meta["records"]:
+            return
+        ext = _read_array(self.extents_path, EXTENT_DTYPE, self.meta["extents"])
+        keep = int(np.searchsorted(ext["start"], n_records))   # extents are in file order
+        if keep and ext["start"][keep - 1] + ext["count"][keep - 1] != n_records:
+            raise ValueError(f"{n_records} is not an append boundary of {self.root}")
+        # codes are handed out in first-seen order, so the dictionaries at the
+        # checkpoint are the prefixes that the kept extents / groups reach
+        n_groups = int(ext["group"][:keep].max()) + 1
+        kept = self._group_arr[:n_groups]
+        n_routes, n_airlines = int(kept["route"].max()) + 1, int(kept["airline"].max()) + 1
+        self.meta["routes"] = self.meta["routes"][:n_routes]
+        self.meta["airlines"] = self.meta["airlines"][:n_airlines]
+        self.routes = {r: i for r, i in self.routes.items() if i < n_routes}
+        self.airlines = {a: i for a, i in self.airlines.items() if i < n_airlines}
+        self.groups = {k: g for k, g in self.groups.items() if g < n_groups}
+        self._group_arr, self._airline_lower = kept, None
+        self.meta["records"], self.meta["extents"], self.meta["groups"] = int(n_records), keep, n_groups
+        self._commit()   # drops the cached memmap / extents; bytes past the commit are cut by the next append
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def records(self):
+        """All committed records as a read-only np.memmap (no copy)."""
+        if self._mm is None:
+            n = self.meta["records"]
+            self._mm = (np.memmap(self.records_path, dtype=RECORD_DTYPE, mode="r", shape=(n,)) if n
+                        else np.zeros(0, dtype=RECORD_DTYPE))
+        return self._mm
+
+    def _extent_index(self):
+        if self._extents is None:
+            ext = _read_array(self.extents_path, EXTENT_DTYPE, self.meta["extents"])
+            ext = ext[np.argsort(ext["group"], kind="stable")]   # file order within a group = time order of appends
+            bounds = np.searchsorted(ext["group"], np.arange(len(self.groups) + 1))
+            self._extents = (ext, bounds)
+        return self._extents
+
+    def group_codes(self, route, departure_date=None, airline=None):
+        rc = self.routes.get(route)
+        if rc is None or not len(self._group_arr):
+            return np.zeros(0, dtype=np.int64)
+        keep = self._group_arr["route"] == rc
+        if departure_date is not None:
+            keep &= self._group_arr["day"] == dates_to_days([departure_date])[0]
+        if airline is not None:
+            if self._airline_lower is None:
+                self._airline_lower = np.array([a.lower() for a in self.meta["airlines"]], dtype=object)
+            keep &= self._airline_lower[self._group_arr["airline"]] == str(airline).lower()
+        return np.flatnonzero(keep)
+
+    def history(self, group):
+        """Records of one group in observed_at order; a zero-copy view when it has one extent."""
+        ext, bounds = self._extent_index()
+        parts = ext[bounds[group]:bounds[group + 1]]
+        mm = self.records()
+        if len(parts) == 1:
+            s = int(parts["start"][0])
+            return mm[s:s + int(parts["count"][0])]
+        if not len(parts):
+            return mm[0:0]
+        out = np.concatenate([mm[s:s + c] for s, c in zip(parts["start"].tolist(), parts["count"].tolist())])
+        return out[np.argsort(out["ts"], kind="stable")]
+
+    def rows(self, route, departure_date=None, airline=None):
+        """Full history for a filter as a readable frame, sorted by observed_at (FareIndex.rows layout)."""
+        groups = self.group_codes(route, departure_date, airline)
+        rec = [self.history(g) for g in groups.tolist()]
+        rec = np.concatenate(rec) if rec else np.zeros(0, dtype=RECORD_DTYPE)
+        rec = rec[np.argsort(rec["ts"], kind="stable")]
+        airlines = np.asarray(self.meta["airlines"], dtype=object)
+        return pd.DataFrame({
+            "observed_at": pd.to_datetime(rec["ts"]),
+            "route": np.full(len(rec), route, dtype=object),
+            "departure_date": days_to_dates(rec["day"]),
+            "airline": airlines[rec["airline"]] if len(airlines) else np.zeros(0, dtype=object),
+            "price": decode_price(rec["price"]),
+        })
+
+    # -------------------------------
+    # Compaction (one extent per group -> every history() is a view)
+    # -------------------------------
+    def compact(self, block_records=4_000_000):
+        """Rewrite the log grouped by (group, observed_at); needs ~30 bytes of RAM per record for the sort."""
+        ext, _ = self._extent_index()
+        if len(ext) == len(self.groups):
+            return False
+        mm = self.records()
+        group = np.repeat(ext["group"], ext["count"])
+        src = np.repeat(ext["start"], ext["count"]) + _ragged_arange(ext["count"])
+        order = src[np.lexsort((mm["ts"][src], group))]
+        del src
+
+        gen = self.meta["generation"] + 1
+        rec_path, ext_path = self._path(f"records.{gen}.bin"), self._path(f"extents.{gen}.bin")
+        with open(rec_path, "wb") as f:
+            for i in range(0, len(order), block_records):
+                f.write(mm[order[i:i + block_records]].tobytes())
+        counts = np.bincount(group, minlength=len(self.groups))
+        new_ext = np.empty(int((counts > 0).sum()), dtype=EXTENT_DTYPE)
+        present = np.flatnonzero(counts)
+        new_ext["group"] = present
+        new_ext["count"] = counts[present]
+        new_ext["start"] = np.cumsum(counts[present]) - counts[present]
+        with open(ext_path, "wb") as f:
+            f.write(new_ext.tobytes())
+
+        old = [self.records_path, self.extents_path]
+        self.meta["generation"], self.meta["extents"] = gen, len(new_ext)
+        self._commit()
+        for p in old:   # open memmaps of the old generation stay valid until closed
+            os.remove(p)
+        return True
+
+    def nbytes_on_disk(self):
+        return sum(os.path.getsize(self._path(n)) for n in os.listdir(self.root))
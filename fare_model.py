@@ -0,0 +1,252 @@
+# ============================================
+# FARE FORECAST MODEL: shared features + batch scoring
+# engineer_features() is the one feature function: the notebook
+# (price-predict-priya.ipynb) builds its training frame with it, and
+# FarePredictor scores requests with it, so train and serve cannot drift.
+# FarePredictor loads the joblib artifact once and scores requests in fixed-size
+# chunks: each distinct request in a chunk is featurized and scored once, dates
+# are parsed once per distinct value, and scored rows are kept in a bounded LRU
+# so repeated route/date queries across batches skip the model entirely.
+# ============================================
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MODEL_PATH = "/kaggle/working/flight_price_predictor_FINAL.pkl"
+
+CATEGORICAL_FEATURES = ["startingAirport", "destinationAirport", "route", "segmentsAirlineName",
+                        "segmentsCabinCode", "booking_window_category"]
+NUMERICAL_FEATURES = ["days_to_departure", "duration_minutes", "search_month", "search_day_of_week",
+                      "flight_month", "flight_day_of_week", "elapsedDays", "seatsRemaining",
+                      "totalTravelDistance", "booking_urgency", "duration_efficiency"]
+BOOLEAN_FEATURES = ["isBasicEconomy", "isRefundable", "isNonStop", "search_is_weekend", "flight_is_weekend",
+                    "is_peak_season", "has_connection", "seats_scarcity"]
+FEATURE_COLUMNS = CATEGORICAL_FEATURES + NUMERICAL_FEATURES + BOOLEAN_FEATURES
+
+PEAK_MONTHS = [6, 7, 8, 12]
+MAX_HORIZON_DAYS = 365
+DURATION_RE = r"PT(?:(\d+)H)?(?:(\d+)M)?"
+# notebook's forecast_booking_horizon fallbacks when a route has no history
+DEFAULT_FILL = {"duration_minutes": 180.0, "totalTravelDistance": 800.0, "segmentsAirlineName": "Delta"}
+
+# request field -> (itinerary column, default); None = from the route profile / fill values
+REQUEST_FIELDS = {
+    "origin":           ("startingAirport", None),
+    "destination":      ("destinationAirport", None),
+    "flight_date":      ("flightDate", None),
+    "search_date":      ("searchDate", None),        # None = today
+    "airline":          ("segmentsAirlineName", None),
+    "cabin":            ("segmentsCabinCode", "coach"),
+    "is_nonstop":       ("isNonStop", True),
+    "is_basic_economy": ("isBasicEconomy", False),
+    "is_refundable":    ("isRefundable", False),
+    "seats_remaining":  ("seatsRemaining", 7),
+    "elapsed_days":     ("elapsedDays", 0),
+    "duration_minutes": ("duration_minutes", None),
+    "distance":         ("totalTravelDistance", None),
+}
+
+
+# -------------------------------
+# Feature engineering (training + serving)
+# -------------------------------
+def to_dates(values):
+    """datetime64[ns], parsed once per distinct value (NaT where unparseable)."""
+    codes, uniq = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Series(uniq), errors="coerce").dt.normalize().to_numpy(dtype="datetime64[ns]")
+    out = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[ns]")
+    ok = codes >= 0
+    out[ok] = parsed[codes[ok]]
+    return out
+
+
+def parse_duration_minutes(values):
+    """ISO 'PT2H29M' -> 149.0, once per distinct string; NaN where the notebook's parser failed."""
+    codes, uniq = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    s = pd.Series(uniq, dtype=object).astype(str)
+    parts = s.str.extract(DURATION_RE)
+    mins = pd.to_numeric(parts[0]).fillna(0) * 60 + pd.to_numeric(parts[1]).fillna(0)
+    mins = mins.where(s.str.fullmatch(DURATION_RE)).to_numpy(dtype=np.float64)
+    out = np.full(len(codes), np.nan)
+    ok = codes >= 0
+    out[ok] = mins[codes[ok]]
+    return out
+
+
+def booking_window_category(days):
+    days = np.asarray(days)
+    return np.select([days <= 3, days <= 7, days <= 14, days <= 30],
+                     ["last_minute", "one_week", "two_weeks", "one_month"], "advance")
+
+
+def engineer_features(df, fill_values=None):
+    """Raw itinerary columns -> the same frame plus every model feature (no rows dropped).
+
+    Missing durations / distances take fill_values (the training medians stored in
+    the artifact); without them, this frame's own medians, as the notebook did.
+    """
+    search = to_dates(df["searchDate"])
+    flight = to_dates(df["flightDate"])
+    days = (flight - search).astype("timedelta64[D]").astype(np.float64)
+    days[np.isnat(search) | np.isnat(flight)] = np.nan
+    s_idx, f_idx = pd.DatetimeIndex(search), pd.DatetimeIndex(flight)
+
+    if "duration_minutes" in df.columns:
+        duration = pd.to_numeric(df["duration_minutes"], errors="coerce").to_numpy(dtype=np.float64)
+    else:
+        duration = parse_duration_minutes(df["travelDuration"])
+    distance = pd.to_numeric(df["totalTravelDistance"], errors="coerce").to_numpy(dtype=np.float64)
+    fill = fill_values or {"duration_minutes": np.nanmedian(duration) if np.isfinite(duration).any() else np.nan,
+                           "totalTravelDistance": np.nanmedian(distance) if np.isfinite(distance).any() else np.nan}
+    duration = np.where(np.isnan(duration), fill["duration_minutes"], duration)
+    distance = np.where(np.isnan(distance), fill["totalTravelDistance"], distance)
+
+    nonstop = df["isNonStop"].astype(bool).to_numpy()
+    flight_month = f_idx.month.to_numpy()
+    return df.assign(
+        searchDate=search,
+        flightDate=flight,
+        days_to_departure=days,
+        search_month=s_idx.month.to_numpy(),
+        search_day_of_week=s_idx.dayofweek.to_numpy(),
+        search_is_weekend=(s_idx.dayofweek >= 5).astype(int),
+        flight_month=flight_month,
+        flight_day_of_week=f_idx.dayofweek.to_numpy(),
+        flight_is_weekend=(f_idx.dayofweek >= 5).astype(int),
+        route=df["startingAirport"].astype(str) + "_" + df["destinationAirport"].astype(str),
+        duration_minutes=duration,
+        totalTravelDistance=distance,
+        booking_urgency=np.exp(-days / 10),
+        duration_efficiency=distance / (duration + 1),
+        booking_window_category=booking_window_category(days),
+        is_peak_season=np.isin(flight_month, PEAK_MONTHS).astype(int),
+        has_connection=(~nonstop).astype(int),
+        seats_scarcity=(pd.to_numeric(df["seatsRemaining"], errors="coerce") <= 5).astype(int).to_numpy(),
+    )
+
+
+def valid_rows(features):
+    """Rows the model may be trained on: both dates parsed, 0 <= days_to_departure <= 365."""
+    d = features["days_to_departure"]
+    return d.notna() & (d >= 0) & (d <= MAX_HORIZON_DAYS)
+
+
+def fill_values_from(features):
+    return {"duration_minutes": float(features["duration_minutes"].median()),
+            "totalTravelDistance": float(features["totalTravelDistance"].median())}
+
+
+def build_route_profiles(features):
+    """Per route: median duration / distance and the most frequent airline (request defaults)."""
+    g = features.groupby("route", sort=True)
+    top = (features.groupby(["route", "segmentsAirlineName"], sort=False).size()
+           .sort_values(ascending=False, kind="stable").reset_index()
+           .drop_duplicates("route").set_index("route")["segmentsAirlineName"])
+    return pd.DataFrame({"duration_minutes": g["duration_minutes"].median(),
+                         "totalTravelDistance": g["totalTravelDistance"].median(),
+                         "segmentsAirlineName": top})
+
+
+# -------------------------------
+# Batch scoring
+# -------------------------------
+class FarePredictor:
+    def __init__(self, artifact, route_profiles=None, cache_size=200_000):
+        self.artifact = artifact
+        self.model = artifact["model"]
+        self.preprocessor = artifact.get("preprocessor")
+        self.scaler = artifact.get("scaler")
+        self.feature_columns = list(artifact.get("feature_columns", FEATURE_COLUMNS))
+        self.log_transform = artifact.get("log_transform", True)
+        self.fill = {**DEFAULT_FILL, **artifact.get("fill_values", {})}
+        profiles = route_profiles if route_profiles is not None else artifact.get("route_profiles")
+        self.profiles = pd.DataFrame(profiles) if profiles is not None else None
+        self.cache_size = cache_size
+        self._cache = OrderedDict()   # request key -> predicted price
+        self.hits = self.misses = 0
+
+    @classmethod
+    def load(cls, path=MODEL_PATH, **kw):
+        import joblib
+        return cls(joblib.load(path), **kw)
+
+    def request_frame(self, requests):
+        """Requests (dicts / DataFrame with REQUEST_FIELDS names) -> raw itinerary columns, defaults filled."""
+        req = pd.DataFrame(requests).reset_index(drop=True)
+        missing = {"origin", "destination", "flight_date"} - set(req.columns)
+        if missing:
+            raise ValueError(f"requests need {sorted(missing)}")
+        out = pd.DataFrame(index=req.index)
+        for field, (col, default) in REQUEST_FIELDS.items():
+            v = req[field] if field in req.columns else pd.Series(default, index=req.index, dtype=object)
+            out[col] = v.where(v.notna(), default) if default is not None else v
+        out["startingAirport"] = out["startingAirport"].astype(str).str.upper().str.strip()
+        out["destinationAirport"] = out["destinationAirport"].astype(str).str.upper().str.strip()
+        today = np.datetime64(pd.Timestamp.today().normalize(), "ns")
+        search_given = out["searchDate"].notna().to_numpy()
+        out["flightDate"] = to_dates(out["flightDate"])
+        out["searchDate"] = np.where(search_given, to_dates(out["searchDate"]), today)
+        # an unparseable date would be scored with a NaN days_to_departure: refuse it instead
+        for field, col in (("flight_date", "flightDate"), ("search_date", "searchDate")):
+            bad = np.flatnonzero(np.isnat(out[col].to_numpy(dtype="datetime64[ns]")))
+            if len(bad):
+                shown = req[field].iloc[bad[:5]].tolist() if field in req.columns else []
+                raise ValueError(f"{len(bad)} request(s) with a missing or unparseable {field}, e.g. {shown}")
+
+        # route defaults: profile of the route, else the global fill values
+        route = out["startingAirport"] + "_" + out["destinationAirport"]
+        prof = (self.profiles.reindex(route.to_numpy()) if self.profiles is not None
+                else pd.DataFrame(index=route.to_numpy(), columns=list(DEFAULT_FILL)))
+        for col in DEFAULT_FILL:
+            given = out[col]
+            fallback = prof[col].to_numpy(dtype=object)
+            fallback = np.where(pd.isna(fallback), self.fill[col], fallback)
+            out[col] = np.where(given.isna().to_numpy(), fallback, given.to_numpy(dtype=object))
+        for col in ("duration_minutes", "totalTravelDistance", "seatsRemaining", "elapsedDays"):
+            out[col] = pd.to_numeric(out[col], errors="coerce")
+        for col in ("isNonStop", "isBasicEconomy", "isRefundable"):
+            out[col] = out[col].astype(bool)
+        return out
+
+    def features(self, requests):
+        return engineer_features(self.request_frame(requests), self.fill)[self.feature_columns]
+
+    def _score(self, X):
+        if self.preprocessor is not None:
+            X = self.preprocessor.transform(X)
+            if self.scaler is not None:
+                X = self.scaler.transform(X)
+        pred = np.asarray(self.model.predict(X), dtype=np.float64)
+        return np.expm1(pred) if self.log_transform else pred
+
+    def predict_fares(self, requests, chunk_rows=50_000):
+        """Predicted fare per request (same order); memory is bounded by chunk_rows."""
+        req = pd.DataFrame(requests).reset_index(drop=True)
+        out = np.empty(len(req))
+        for start in range(0, len(req), chunk_rows):
+            raw = self.request_frame(req.iloc[start:start + chunk_rows])
+            codes, uniq = pd.factorize(pd.MultiIndex.from_frame(raw))
+            keys = uniq.tolist()
+            prices = np.empty(len(keys))
+            todo = []
+            for i, k in enumerate(keys):
+                p = self._cache.get(k)
+                if p is None:
+                    todo.append(i)
+                else:
+                    self._cache.move_to_end(k)
+                    prices[i] = p
+            self.hits += len(keys) - len(todo)
+            self.misses += len(todo)
+            if todo:
+                rows = pd.DataFrame([keys[i] for i in todo], columns=raw.columns).astype(raw.dtypes.to_dict())
+                prices[todo] = self._score(engineer_features(rows, self.fill)[self.feature_columns])
+                if self.cache_size:
+                    for i in todo:
+                        self._cache[keys[i]] = prices[i]
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            out[start:start + len(raw)] = prices[codes]
+        return out
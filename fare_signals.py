@@ -0,0 +1,120 @@
+# ============================================
+# TREND / VOLATILITY SIGNALS (vectorized)
+# Same columns as the old groupby-rolling add_signals:
+#   price_prev, pct_change_prev, volatility_recent, trend_recent_pct, obs_count_in_group
+# Rows are laid out group-contiguous once; every rolling feature is then a
+# handful of shifted array ops (k shifts, k=12), no per-window Python calls.
+# ============================================
+
+import numpy as np
+
+from fare_store import GROUP_COLS, _ragged_arange
+
+SIGNAL_COLS = ["price_prev", "pct_change_prev", "volatility_recent", "trend_recent_pct", "obs_count_in_group"]
+
+
+def rolling_signals(price, sizes, k=12, min_periods=4):
+    """Signals for group-contiguous `price` (each group in time order, lengths `sizes`).
+
+    Window sums are taken over explicit shifts instead of a global cumsum, so
+    the std does not lose precision on long tables.
+    """
+    price = np.asarray(price, dtype=np.float64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    n = len(price)
+    pos = _ragged_arange(sizes)
+    cnt = np.minimum(pos + 1, k)           # rows in the rolling window ending here
+    lo = np.arange(n) - cnt + 1            # first row of that window
+
+    prev = np.full(n, np.nan)
+    prev[1:] = price[:-1]
+    prev[pos == 0] = np.nan
+
+    s1 = np.zeros(n)
+    for j in range(k):
+        m = cnt > j
+        s1[j:][m[j:]] += price[:n - j][m[j:]]
+    mean = s1 / cnt
+
+    s2 = np.zeros(n)
+    for j in range(k):
+        m = cnt > j
+        d = price[:n - j][m[j:]] - mean[j:][m[j:]]
+        s2[j:][m[j:]] += d * d
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(s2 / (cnt - 1))
+        ok = cnt >= min_periods
+        first = price[lo]
+        return {
+            "price_prev": prev,
+            "pct_change_prev": (price - prev) / prev,
+            "volatility_recent": np.where(ok, std / mean, np.nan),
+            "trend_recent_pct": np.where(ok, (price - first) / first, np.nan),
+            "obs_count_in_group": np.repeat(sizes, sizes),
+        }
+
+
+def add_signals(df, k=12, min_periods=4):
+    """Drop-in for the old add_signals: rows keep their order, groups use row order as time."""
+    df = df.copy()
+    gid = df.groupby(GROUP_COLS, sort=False, dropna=False).ngroup().to_numpy()
+    order = np.argsort(gid, kind="stable")
+    sizes = np.bincount(gid)
+    sizes = sizes[sizes > 0]
+
+    sig = rolling_signals(df["price"].to_numpy(dtype=np.float64)[order], sizes, k, min_periods)
+    for col in SIGNAL_COLS:
+        out = np.empty(len(df), dtype=sig[col].dtype)
+        out[order] = sig[col]
+        df[col] = out
+    return df
+
+
+# -------------------------------
+# Incremental mode: signals live next to the FareStore slots
+# -------------------------------
+class IncrementalSignals:
+    """Per-slot signal arrays for a FareStore; update() recomputes only the given groups."""
+
+    def __init__(self, store, k=12, min_periods=4):
+        self.store = store
+        self.k = k
+        self.min_periods = min_periods
+        self.cols = {c: np.full((0, store.n), np.nan) for c in SIGNAL_COLS[:-1]}
+        self._grow()
+
+    def _grow(self):
+        cap, n = self.store.capacity, self.store.n
+        for c, arr in self.cols.items():
+            if len(arr) < cap:
+                new = np.full((cap, n), np.nan)
+                new[:len(arr)] = arr
+                self.cols[c] = new
+
+    def update(self, groups=None):
+        st = self.store
+        self._grow()
+        if groups is None:
+            groups = np.flatnonzero(st.count[:len(st.keys)] > 0)
+        groups = np.asarray(groups, dtype=np.int64)
+        cnt = st.count[groups]
+        rows, pos = np.repeat(groups, cnt), _ragged_arange(cnt)
+
+        sig = rolling_signals(st.price[rows, pos], cnt, self.k, self.min_periods)
+        for c, arr in self.cols.items():
+            arr[rows, pos] = sig[c]
+        return len(rows)
+
+    def to_frame(self, groups=None):
+        st = self.store
+        if groups is None:
+            groups = np.flatnonzero(st.count[:len(st.keys)] > 0)
+        groups = np.asarray(groups, dtype=np.int64)
+        cnt = st.count[groups]
+        rows, pos = np.repeat(groups, cnt), _ragged_arange(cnt)
+
+        df = st.to_frame(groups)
+        for c, arr in self.cols.items():
+            df[c] = arr[rows, pos]
+        df["obs_count_in_group"] = np.repeat(cnt.astype(np.int64), cnt)
+        return df
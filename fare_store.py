@@ -0,0 +1,235 @@
+# ============================================
+# BOUNDED FARE STORE (last N observations per group)
+# Group = (route, departure_date, airline).
+# Every group owns a fixed block of N slots inside preallocated NumPy arrays
+# (int64 epoch-ns timestamps + float64 prices), kept sorted by observed_at.
+# A whole cleaned chunk is merged in one vectorized pass: no per-group
+# DataFrames, no per-group concat/sort.
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+GROUP_COLS = ["route", "departure_date", "airline"]
+STORE_COLS = ["observed_at", "route", "departure_date", "airline", "price"]
+
+
+def _ragged_arange(counts):
+    # [0..c0-1, 0..c1-1, ...] without a Python loop
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.arange(total, dtype=np.int64) - starts
+
+
+def to_epoch_ns(values):
+    return np.asarray(values, dtype="datetime64[ns]").view(np.int64)
+
+
+class FareStore:
+    """Keeps the last `keep_last_n` observations (by observed_at) per group.
+
+    Ties on observed_at are broken by arrival order, so the result is
+    deterministic (the old dict store used an unstable sort there).
+    """
+
+    def __init__(self, keep_last_n=60, initial_groups=4096):
+        self.n = int(keep_last_n)
+        self.keys = []      # code -> (route, departure_date, airline), None once evicted
+        self.codes = {}     # (route, departure_date, airline) -> code
+        self.routes = {}    # route -> route code
+        self._free = []     # evicted group codes, reused first
+        self.count = np.zeros(0, dtype=np.int32)
+        self.group_route = np.zeros(0, dtype=np.int32)
+        self.ts = np.zeros((0, self.n), dtype=np.int64)
+        self.price = np.zeros((0, self.n), dtype=np.float64)
+        self._grow(initial_groups)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def capacity(self):
+        return len(self.count)
+
+    def _grow(self, needed):
+        cap = self.capacity
+        if needed <= cap:
+            return
+        new_cap = max(int(needed), cap * 2, 16)
+        count = np.zeros(new_cap, dtype=np.int32)
+        group_route = np.full(new_cap, -1, dtype=np.int32)
+        ts = np.zeros((new_cap, self.n), dtype=np.int64)
+        price = np.zeros((new_cap, self.n), dtype=np.float64)
+        count[:cap] = self.count
+        group_route[:cap] = self.group_route
+        ts[:cap] = self.ts
+        price[:cap] = self.price
+        self.count, self.group_route, self.ts, self.price = count, group_route, ts, price
+
+    # -------------------------------
+    # Group codes (dictionary encoding of the group key)
+    # -------------------------------
+    def group_codes(self, df):
+        # Rows with a missing key get -1 (same as groupby(dropna=True) skipping them).
+        rc, ru = pd.factorize(df["route"])
+        dc, du = pd.factorize(df["departure_date"])
+        ac, au = pd.factorize(df["airline"])
+        valid = (rc >= 0) & (dc >= 0) & (ac >= 0)
+
+        combo = (rc.astype(np.int64) * len(du) + dc) * len(au) + ac
+        local, uniq = pd.factorize(combo[valid])
+
+        na, nd = len(au), len(du)
+        local_to_code = np.empty(len(uniq), dtype=np.int64)
+        for j, c in enumerate(uniq.tolist()):
+            r, rem = divmod(c, nd * na)
+            d, a = divmod(rem, na)
+            key = (ru[r], du[d], au[a])
+            code = self.codes.get(key)
+            if code is None:
+                code = self._new_group(key)
+            local_to_code[j] = code
+
+        out = np.full(len(df), -1, dtype=np.int64)
+        out[valid] = local_to_code[local]
+        return out
+
+    def _new_group(self, key):
+        if self._free:
+            code = self._free.pop()
+            self.keys[code] = key
+        else:
+            code = len(self.keys)
+            self.keys.append(key)
+            if code >= len(self.count):
+                self._grow(code + 1)
+        self.codes[key] = code
+        self.group_route[code] = self.routes.setdefault(key[0], len(self.routes))
+        return code
+
+    # -------------------------------
+    # Eviction (e.g. routes that dropped out of the heavy-hitter set)
+    # -------------------------------
+    def evict_routes(self, routes):
+        rcodes = [self.routes[r] for r in routes if r in self.routes]
+        if not rcodes:
+            return 0
+        groups = np.flatnonzero(np.isin(self.group_route[:len(self.keys)], rcodes))
+        for g in groups.tolist():
+            del self.codes[self.keys[g]]
+            self.keys[g] = None
+            self._free.append(g)
+        self.count[groups] = 0
+        self.group_route[groups] = -1
+        return len(groups)
+
+    # -------------------------------
+    # Vectorized insert
+    # -------------------------------
+    def insert(self, codes, ts, price):
+        codes = np.asarray(codes, dtype=np.int64)
+        keep = codes >= 0
+        codes, ts, price = codes[keep], np.asarray(ts)[keep], np.asarray(price)[keep]
+        if len(codes) == 0:
+            return codes
+
+        touched = np.unique(codes)
+        old_n = self.count[touched]
+        old_rows = np.repeat(touched, old_n)
+        old_pos = _ragged_arange(old_n)
+
+        # stored rows go first so that, on equal timestamps, arrival order wins
+        all_g = np.concatenate([old_rows, codes])
+        all_t = np.concatenate([self.ts[old_rows, old_pos], ts.astype(np.int64)])
+        all_p = np.concatenate([self.price[old_rows, old_pos], price.astype(np.float64)])
+
+        order = np.lexsort((all_t, all_g))  # stable
+        all_g, all_t, all_p = all_g[order], all_t[order], all_p[order]
+
+        sizes = np.bincount(np.searchsorted(touched, all_g), minlength=len(touched))
+        pos = _ragged_arange(sizes)
+        drop = np.repeat(np.maximum(sizes - self.n, 0), sizes)
+        sel = pos >= drop
+
+        rows, slots = all_g[sel], (pos - drop)[sel]
+        self.ts[rows, slots] = all_t[sel]
+        self.price[rows, slots] = all_p[sel]
+        self.count[touched] = np.minimum(sizes, self.n)
+        return touched
+
+    def insert_frame(self, df):
+        codes = self.group_codes(df)
+        return self.insert(codes, to_epoch_ns(df["observed_at"]), df["price"].to_numpy(dtype=np.float64))
+
+    def merge(self, other):
+        """Fold another store in; its rows count as later arrivals (merge parts in file order)."""
+        groups = np.flatnonzero(other.count[:len(other.keys)] > 0)
+        if len(groups) == 0:
+            return np.zeros(0, dtype=np.int64)
+        mapped = np.empty(len(groups), dtype=np.int64)
+        for j, g in enumerate(groups.tolist()):
+            key = other.keys[g]
+            code = self.codes.get(key)
+            mapped[j] = self._new_group(key) if code is None else code
+        cnt = other.count[groups]
+        rows, pos = np.repeat(groups, cnt), _ragged_arange(cnt)
+        return self.insert(np.repeat(mapped, cnt), other.ts[rows, pos], other.price[rows, pos])
+
+    # -------------------------------
+    # Export (same columns as the old per-group frames)
+    # -------------------------------
+    def to_frame(self, groups=None):
+        if groups is None:
+            groups = np.flatnonzero(self.count[:len(self.keys)] > 0)
+        groups = np.asarray(groups, dtype=np.int64)
+        cnt = self.count[groups]
+        rows = np.repeat(groups, cnt)
+        pos = _ragged_arange(cnt)
+
+        keys = [self.keys[g] for g in groups.tolist()]
+        per_group = [np.array([k[i] for k in keys], dtype=object) for i in range(3)]
+        route, dep, airline = (np.repeat(a, cnt) for a in per_group)
+
+        return pd.DataFrame({
+            "observed_at": pd.to_datetime(self.ts[rows, pos]),
+            "route": route,
+            "departure_date": dep,
+            "airline": airline,
+            "price": self.price[rows, pos],
+        })
+
+    # -------------------------------
+    # Pickling ships only live slots (worker results, checkpoints)
+    # -------------------------------
+    def __getstate__(self):
+        used = len(self.keys)
+        cnt = self.count[:used]
+        rows, pos = np.repeat(np.arange(used), cnt), _ragged_arange(cnt)
+        return {
+            "n": self.n, "keys": self.keys, "routes": self.routes, "free": self._free,
+            "count": cnt.copy(), "group_route": self.group_route[:used].copy(),
+            "ts": self.ts[rows, pos], "price": self.price[rows, pos],
+        }
+
+    def __setstate__(self, state):
+        self.n = state["n"]
+        self.keys, self.routes, self._free = state["keys"], state["routes"], state["free"]
+        self.codes = {k: g for g, k in enumerate(self.keys) if k is not None}
+        used = len(self.keys)
+        self.count = np.zeros(0, dtype=np.int32)
+        self.group_route = np.zeros(0, dtype=np.int32)
+        self.ts = np.zeros((0, self.n), dtype=np.int64)
+        self.price = np.zeros((0, self.n), dtype=np.float64)
+        self._grow(max(used, 16))
+        cnt = state["count"]
+        self.count[:used] = cnt
+        self.group_route[:used] = state["group_route"]
+        rows, pos = np.repeat(np.arange(used), cnt), _ragged_arange(cnt)
+        self.ts[rows, pos] = state["ts"]
+        self.price[rows, pos] = state["price"]
+
+    def nbytes(self):
+        return int(self.count.nbytes + self.group_route.nbytes + self.ts.nbytes + self.price.nbytes)
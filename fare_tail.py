@@ -0,0 +1,418 @@
+# ============================================
+# LIVE TAIL (new fare CSV bytes -> store -> signals -> alerts -> queries)
+# Sources: one growing CSV, or a directory where new *.csv files are dropped.
+# Every poll reads only the complete lines appended since the last one (one
+# byte offset per file; a file that shrank or was replaced is read again from
+# its start) and runs them through the batch ingest's consume_chunk: route
+# counts (Space-Saving) -> parse -> per-route trim / de-duplication (when the
+# batch's RouteQuantiles / ObservationDedup are passed) -> FareStore (last N
+# per group). Seeded with the batch's route counts and max_routes, the stored
+# routes stay the top max_routes by count, as in 1.py's batch. Signals are
+# recomputed only for the groups a poll touched (IncrementalSignals), and the
+# same stored rows go through AlertEngine.process (a trimmed fare fires nothing).
+# Queries read a LiveSnapshot: the base FareIndex with the rows of every group
+# touched since it was built masked out (FareIndex.masked), plus a small delta
+# FareIndex holding those groups' current rows; an answer is the later of the
+# two. A poll publishes a new snapshot by swapping one reference, so a reader
+# holding `tail.snapshot` sees one consistent state while the writer moves on.
+# Once the delta outgrows rebase_fraction of the base, both become one base.
+# With deals=True a DealIndex over the store is refreshed for the same groups.
+# ============================================
+
+import glob
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from deal_index import DealIndex
+from fare_compact import NO_DAY, dates_to_days, readable_frame
+from fare_index import FareIndex
+from fare_ingest import consume_chunk, use_cols
+from fare_signals import IncrementalSignals
+from fare_store import STORE_COLS, FareStore, _ragged_arange
+from heavy_hitters import SpaceSaving
+
+NO_ROWS = {"ok": False, "reason": "No observations for that route/time filter."}
+
+
+def _group_order(idx, r):
+    # fare_sig order of a row's group (route, departure_date with NaT last, airline)
+    rc, dc, _ = idx._codes
+    day = idx._date_labels[dc[r]]
+    return idx._route_labels[rc[r]], pd.isna(day), day if not pd.isna(day) else None, str(idx._airline_label(r))
+
+
+class LiveSnapshot:
+    """Read-only view of the tail at one poll; same query methods as FareIndex."""
+
+    def __init__(self, base, delta=None, rows=None, version=0, offsets=None):
+        self.base, self.delta = base, delta   # base: masked FareIndex, delta: FareIndex or None
+        self.n_rows = len(base) if rows is None else rows
+        self.version = version
+        self.offsets = offsets or {}          # path -> bytes folded in
+        self.published = time.perf_counter()
+        self._routes = None
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def routes(self):
+        if self._routes is None:
+            routes = self.base.routes if self.delta is None else self.base.routes.append(self.delta.routes)
+            self._routes = routes.unique()
+        return self._routes
+
+    def _pick(self, rb, rd):
+        """Per query: True where the delta row wins (later observed_at; on ties the later group in fare_sig)."""
+        if self.delta is None:
+            return np.zeros(len(rb), dtype=bool)
+        tb = np.where(rb >= 0, self.base.ts[np.maximum(rb, 0)], np.iinfo(np.int64).min)
+        td = np.where(rd >= 0, self.delta.ts[np.maximum(rd, 0)], np.iinfo(np.int64).min)
+        use = (rd >= 0) & (td >= tb)
+        for i in np.flatnonzero(use & (rb >= 0) & (td == tb)).tolist():
+            use[i] = _group_order(self.delta, rd[i]) > _group_order(self.base, rb[i])
+        return use
+
+    def _answers(self, rb, rd):
+        use = self._pick(rb, rd)
+        out = self.base._answers(np.where(use, -1, rb))
+        if use.any():
+            for i, a in zip(np.flatnonzero(use).tolist(), self.delta._answers(rd[use])):
+                out[i] = a
+        return out
+
+    def get_live_fare(self, route, now=None, departure_date=None, airline=None):
+        now = pd.Timestamp.now() if now is None else now
+        rb = self.base.latest_row(route, now, departure_date, airline)
+        rd = self.delta.latest_row(route, now, departure_date, airline) if self.delta is not None else -1
+        return self._answers(np.array([rb]), np.array([rd]))[0]
+
+    def get_live_fares(self, queries):
+        q = pd.DataFrame(queries)
+        if self.delta is None or not len(q):
+            return self.base.get_live_fares(q)
+        n = len(q)
+        col = lambda c: q[c].to_numpy(dtype=object, copy=True) if c in q.columns else np.full(n, None, dtype=object)
+        now = col("now")
+        now[pd.isna(now)] = pd.Timestamp.now()
+        args = (col("route"), now, col("departure_date"), col("airline"))
+        return self._answers(self.base.latest_rows(*args), self.delta.latest_rows(*args))
+
+    def rows(self, route, departure_date=None, airline=None):
+        d = self.base.rows(route, departure_date, airline)
+        if self.delta is None:
+            return d
+        d = pd.concat([d, self.delta.rows(route, departure_date, airline)], ignore_index=True)
+        return d.sort_values(["observed_at", "route", "departure_date", "airline"], kind="stable",
+                             ignore_index=True)
+
+
+class FareTail:
+    def __init__(self, spec, keep_n=60, hh_capacity=10_000, signal_k=12, alerts=None, on_alert=None,
+                 quantiles=None, dedup=None, max_routes=None, rebase_fraction=0.25, max_read_mb=64, deals=False):
+        """spec as in fare_ingest; alerts=AlertEngine(...) is matched against every new row
+        and on_alert(fired) gets each non-empty result. max_routes: only the top routes by
+        count stay stored (None: every tracked route). deals=True keeps tail.deals
+        (deal_index.DealIndex) current."""
+        self.spec = spec
+        self.store = FareStore(keep_last_n=keep_n)
+        self.route_hh = SpaceSaving(capacity=hh_capacity)
+        self.signals = IncrementalSignals(self.store, k=signal_k)
+        self.deals = DealIndex.from_store(self.store, recent=signal_k) if deals else None
+        self.alerts, self.on_alert = alerts, on_alert
+        self.quantiles, self.dedup = quantiles, dedup
+        self.max_routes = max_routes
+        self.rebase_fraction = rebase_fraction
+        self.max_read = int(max_read_mb * 1024**2)
+
+        self.sources = []      # (path, pattern) - pattern None for a single file
+        self.files = {}        # path -> {"offset", "names", "ino"}
+        self._hot = np.zeros(0, dtype=bool)        # store group code -> touched since the base was built
+        self._dead = np.zeros(0, dtype=bool)       # base row -> superseded by the delta (or evicted)
+        self._base_start = np.zeros(0, dtype=np.int64)   # store group code -> its first base row (-1: none)
+        self._base_count = np.zeros(0, dtype=np.int32)   # ... and its number of base rows
+        self._base_groups = np.zeros(0, dtype=np.int64)  # groups in the base, in base row order
+        self._gday = np.zeros(0, dtype=np.int32)   # store group code -> departure day / airline code
+        self._gair = np.zeros(0, dtype=np.int64)
+        self._gkey = []                            # key each code was encoded for (codes are reused)
+        self._airlines = {}
+        self._lock = threading.Lock()
+        self._published = threading.Condition()
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_error = None
+        self.stats = {"polls": 0, "rows_read": 0, "groups_touched": 0, "alerts": 0, "rebases": 0,
+                      "read_s": 0.0, "ingest_s": 0.0, "signals_s": 0.0, "publish_s": 0.0}
+        self.snapshot = None
+        self._rebase(version=0)
+
+    @classmethod
+    def from_frame(cls, fare_sig, spec, route_hh=None, **kw):
+        """Tail seeded with an existing fare_sig (e.g. FareCache.load()), which becomes the first base.
+
+        route_hh: the batch's SpaceSaving route counts, carried on (without them the
+        counts start from fare_sig's stored rows, which undercount every route).
+        """
+        self = cls(spec, **kw)
+        d = readable_frame(fare_sig)
+        if route_hh is not None:
+            self.route_hh = route_hh
+        else:
+            self.route_hh.update(d["route"])
+        self.store.insert_frame(d[STORE_COLS])
+        self.signals.update()
+        if self.deals is not None:
+            self.deals.update()
+        self._encode(self._live_groups())
+        self._rebase(version=0)
+        return self
+
+    # -------------------------------
+    # Sources
+    # -------------------------------
+    def watch(self, path, pattern="*.csv", from_end=False):
+        """A directory (new files matching `pattern` are picked up) or one growing file.
+        from_end=True skips what is already there, like tail -f."""
+        self.sources.append((path, pattern if os.path.isdir(path) else None))
+        if from_end:
+            for p in self._paths():
+                if p in self.files:
+                    continue
+                f, size = self._header(p)
+                if f is not None:   # skip to the end of the last complete line
+                    with open(p, "rb") as fh:
+                        fh.seek(max(size - (1 << 20), f["offset"]))
+                        tail = fh.read()
+                    f["offset"] = size - len(tail) + tail.rfind(b"\n") + 1
+        return self
+
+    def _paths(self):
+        out = []
+        for path, pattern in self.sources:
+            if pattern is None:
+                out += [path] if os.path.exists(path) else []
+            else:   # oldest drop first, so later files win ties on observed_at
+                out.extend(sorted(glob.glob(os.path.join(path, pattern)), key=lambda p: (os.path.getmtime(p), p)))
+        return out
+
+    def _header(self, path):
+        st = os.stat(path)
+        f = self.files.get(path)
+        if f is None or st.st_size < f["offset"] or st.st_ino != f["ino"]:
+            f = self.files[path] = {"offset": 0, "names": None, "ino": st.st_ino}
+        if f["names"] is None:
+            with open(path, "rb") as fh:
+                line = fh.readline()
+            if not line.endswith(b"\n"):
+                return None, st.st_size
+            f["names"] = pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist()
+            f["offset"] = len(line)
+        return f, st.st_size
+
+    def _read_new(self, path):
+        """Complete lines appended since the last poll, parsed with the file's header; None if none."""
+        f, size = self._header(path)
+        if f is None or size <= f["offset"]:
+            return None
+        with open(path, "rb") as fh:
+            fh.seek(f["offset"])
+            buf = fh.read(min(size - f["offset"], self.max_read))
+        end = buf.rfind(b"\n") + 1   # a half-written last line waits for the next poll
+        if end == 0:
+            return None
+        f["offset"] += end
+        return pd.read_csv(io.BytesIO(buf[:end]), header=None, names=f["names"], usecols=use_cols(self.spec),
+                           low_memory=False)
+
+    # -------------------------------
+    # One poll: read -> consume -> signals -> publish
+    # -------------------------------
+    def _on_stored(self, rows):
+        fired = self.alerts.process(rows)
+        if len(fired):
+            self.stats["alerts"] += len(fired)
+            if self.on_alert is not None:
+                self.on_alert(fired)
+
+    def poll(self):
+        """Fold in everything new; returns rows read (0 = nothing new, snapshot unchanged)."""
+        with self._lock:
+            st = self.stats
+            t = time.perf_counter()
+            chunks = [ch for ch in (self._read_new(p) for p in self._paths()) if ch is not None and len(ch)]
+            n_read = sum(len(ch) for ch in chunks)
+            st["read_s"] += time.perf_counter() - t
+            if not n_read:
+                return 0
+
+            t = time.perf_counter()
+            tracked = set(self.route_hh.tracked()) if len(self.route_hh) >= self.route_hh.capacity else None
+            touched = [consume_chunk(ch, self.spec, self.store, self.route_hh,
+                                     quantiles=self.quantiles, dedup=self.dedup,
+                                     on_stored=self._on_stored if self.alerts is not None else None)
+                       for ch in chunks]
+            touched = np.unique(np.concatenate(touched))
+            evicted = tracked - set(self.route_hh.tracked()) if tracked is not None else set()
+            if self.max_routes is not None:   # stored routes = top max_routes by count, as the batch keeps
+                extra = set(self.route_hh.tracked()) - set(self.route_hh.top(self.max_routes))
+                if self.store.evict_routes(extra):
+                    evicted |= extra
+            touched = touched[self.store.count[touched] > 0]   # groups evicted since they were written
+            st["ingest_s"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            self.signals.update(touched)
+            if self.deals is not None:   # evicted routes: every group is re-checked
+                self.deals.update(None if evicted else touched)
+            self._encode(touched)
+            st["signals_s"] += time.perf_counter() - t
+
+            t = time.perf_counter()
+            self._publish(touched, evicted)
+            st["publish_s"] += time.perf_counter() - t
+            st["polls"] += 1
+            st["rows_read"] += n_read
+            st["groups_touched"] += len(touched)
+            return n_read
+
+    def _live_groups(self):
+        return np.flatnonzero(self.store.count[:len(self.store.keys)] > 0)
+
+    def _encode(self, groups):
+        """Day / airline codes of new (or reused) store groups; only touched groups can be new."""
+        st = self.store
+        n = len(st.keys)
+        if len(self._gday) < n:
+            grow = max(n, 2 * len(self._gday)) - len(self._gday)
+            self._gday = np.append(self._gday, np.full(grow, NO_DAY, dtype=np.int32))
+            self._gair = np.append(self._gair, np.full(grow, -1, dtype=np.int64))
+            self._gkey.extend([None] * grow)
+        new = [g for g in np.asarray(groups).tolist() if self._gkey[g] is not st.keys[g]]
+        if not new:
+            return
+        keys = [st.keys[g] for g in new]
+        self._gday[new] = dates_to_days([k[1] for k in keys])
+        self._gair[new] = [self._airlines.setdefault(str(k[2]), len(self._airlines)) for k in keys]
+        for g, k in zip(new, keys):
+            self._gkey[g] = k
+
+    def _table(self, groups):
+        """(groups in row order, their compact fare_sig rows), built straight from the store slots.
+
+        Groups are laid out in 1.py's fare_sig order (route, departure_date, airline),
+        so ties on observed_at resolve as in the batch table.
+        """
+        st = self.store
+        route_names = pd.Index(list(st.routes), dtype=object)
+        air_names = pd.Index(list(self._airlines), dtype=object)
+        rank = lambda names: np.argsort(np.argsort(names.to_numpy(), kind="stable"))
+        rc = rank(route_names)[st.group_route[groups]]
+        ac = rank(air_names)[self._gair[groups]] if len(air_names) else np.zeros(len(groups), dtype=np.int64)
+        day = self._gday[groups]
+        order = np.lexsort((ac, np.where(day == NO_DAY, np.iinfo(np.int32).max, day), rc))   # NaT last
+        groups = groups[order]
+        cnt = st.count[groups]
+        rows, pos = np.repeat(groups, cnt), _ragged_arange(cnt)
+        rep = lambda a: np.repeat(a[order], cnt)
+
+        out = pd.DataFrame({
+            "observed_at": st.ts[rows, pos],
+            "route": pd.Categorical.from_codes(rep(rc), categories=route_names.sort_values()),
+            "departure_date": rep(day),
+            "airline": pd.Categorical.from_codes(rep(ac), categories=air_names.sort_values()),
+            "price": st.price[rows, pos].astype(np.float32),
+        })
+        for c, arr in self.signals.cols.items():
+            out[c] = arr[rows, pos].astype(np.float32)
+        out["obs_count_in_group"] = np.repeat(cnt, cnt).astype(np.int32)
+        return groups, out
+
+    def _rebase(self, version):
+        """Everything stored becomes the new base; the delta starts empty."""
+        groups, table = self._table(self._live_groups())
+        cnt = self.store.count[groups]
+        start = np.full(self.store.capacity, -1, dtype=np.int64)
+        start[groups] = np.cumsum(cnt) - cnt
+        self._base_start, self._base_count, self._base_groups = start, self.store.count.copy(), groups
+        self._hot = np.zeros(self.store.capacity, dtype=bool)
+        self._dead = np.zeros(len(table), dtype=bool)
+        self._publish_snapshot(LiveSnapshot(FareIndex(table).masked(self._dead), version=version,
+                                            offsets=self._offsets()))
+
+    def _offsets(self):
+        return {p: f["offset"] for p, f in self.files.items()}
+
+    def _publish(self, touched, evicted=()):
+        st, snap = self.store, self.snapshot
+        if len(self._hot) < st.capacity:
+            self._hot = np.append(self._hot, np.zeros(st.capacity - len(self._hot), dtype=bool))
+        # base rows of newly touched groups (and of evicted routes) are superseded
+        new = touched[~self._hot[touched]]
+        self._hot[touched] = True
+        gone = self._base_groups[st.group_route[self._base_groups] < 0] if evicted else new[:0]
+        hide = np.concatenate([new[new < len(self._base_start)], gone])
+        hide = hide[self._base_start[hide] >= 0]
+        dead = self._dead.copy()   # the previous snapshot keeps its own mask
+        cnt = self._base_count[hide]
+        dead[np.repeat(self._base_start[hide], cnt) + _ragged_arange(cnt)] = True
+        self._dead = dead
+
+        rows = int(st.count[:len(st.keys)].sum())
+        hot = np.flatnonzero(self._hot[:len(st.keys)] & (st.count[:len(st.keys)] > 0))
+        delta_rows = int(st.count[hot].sum())
+        if delta_rows > self.rebase_fraction * max(rows - delta_rows, 1):
+            self.stats["rebases"] += 1
+            return self._rebase(snap.version + 1)
+        delta = FareIndex(self._table(hot)[1]) if len(hot) else None
+        self._publish_snapshot(LiveSnapshot(snap.base.masked(dead), delta, rows, snap.version + 1, self._offsets()))
+
+    def _publish_snapshot(self, snap):
+        with self._published:
+            self.snapshot = snap   # one reference swap; readers keep whatever they already hold
+            self._published.notify_all()
+
+    # -------------------------------
+    # Background polling
+    # -------------------------------
+    def wait_for(self, path, offset, timeout=None):
+        """Block until the published snapshot covers `path` up to byte `offset`; returns it (None on timeout)."""
+        path = os.path.abspath(path)
+        done = lambda: any(os.path.abspath(p) == path and o >= offset for p, o in self.snapshot.offsets.items())
+        with self._published:
+            return self.snapshot if self._published.wait_for(done, timeout) else None
+
+    def start(self, interval=0.05):
+        """Poll on a daemon thread; `interval` is the idle sleep between polls that found nothing."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    n = self.poll()
+                except Exception as e:   # a bad drop must not stop the tail; keep the last error
+                    self.last_error, n = e, 0
+                if not n:
+                    self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="fare-tail", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def summary(self):
+        snap = self.snapshot
+        return {**{k: round(v, 4) if isinstance(v, float) else v for k, v in self.stats.items()},
+                "version": snap.version, "rows": len(snap), "delta_rows": len(snap.delta) if snap.delta is not None else 0,
+                "files": len(self.files), "last_error": repr(self.last_error) if self.last_error else None}
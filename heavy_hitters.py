@@ -0,0 +1,110 @@
+# ============================================
+# STREAMING HEAVY HITTERS (Space-Saving, bounded memory)
+# Tracks at most `capacity` items. For every tracked item:
+#   count - error <= true count <= count
+# Batches are merged as exact per-chunk counts (mergeable-summary style),
+# so the whole chunk is one vectorized update, not one Python step per row.
+# save()/load() keep the counts with the fare cache, so 1.py's live tail
+# continues from the batch's route counts.
+# ============================================
+
+import numpy as np
+import pandas as pd
+
+
+def _rank(count):
+    # count desc, ties by item name -> deterministic across runs / worker merges
+    return count.sort_index(kind="stable").sort_values(ascending=False, kind="stable")
+
+
+class SpaceSaving:
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.count = pd.Series(dtype=np.int64)
+        self.error = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    def __len__(self):
+        return len(self.count)
+
+    def floor(self):
+        # upper bound on the true count of any untracked item
+        return int(self.count.min()) if len(self.count) >= self.capacity else 0
+
+    def tracked(self):
+        return self.count.index
+
+    def _combine(self, count, error):
+        ranked = _rank(count)
+        keep = ranked.index[:self.capacity]
+        dropped = ranked.index[self.capacity:]
+        self.count = count.loc[keep].astype(np.int64)
+        self.error = error.loc[keep].astype(np.int64)
+        return dropped
+
+    def update(self, items):
+        """Count one batch of items (e.g. a chunk's route column). Returns items evicted."""
+        return self.update_counts(pd.Series(items).value_counts(sort=False))
+
+    def update_counts(self, counts):
+        counts = counts[counts > 0].astype(np.int64)
+        if isinstance(counts.index, pd.CategoricalIndex):
+            counts.index = counts.index.astype(object)
+        self.total += int(counts.sum())
+        fl = self.floor()
+
+        new_items = counts.index.difference(self.count.index)
+        count = self.count.add(counts, fill_value=0)
+        error = self.error.reindex(count.index, fill_value=0)
+        if fl and len(new_items):
+            count.loc[new_items] += fl
+            error.loc[new_items] = fl
+        return self._combine(count, error)
+
+    def merge(self, other):
+        """Fold another summary into this one (associative). Returns items evicted."""
+        self.total += other.total
+        f1, f2 = self.floor(), other.floor()
+        idx = self.count.index.union(other.count.index)
+        count = self.count.reindex(idx, fill_value=f1) + other.count.reindex(idx, fill_value=f2)
+        error = self.error.reindex(idx, fill_value=f1) + other.error.reindex(idx, fill_value=f2)
+        return self._combine(count, error)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def top(self, k):
+        return _rank(self.count).index[:k].tolist()
+
+    def summary(self, k):
+        """Top-k with bounds. `guaranteed` = surely in the true top-k."""
+        ranked = _rank(self.count)
+        out = pd.DataFrame({
+            "count": ranked,
+            "error": self.error.reindex(ranked.index),
+        }).head(k)
+        out["lower_bound"] = out["count"] - out["error"]
+        # best possible count of anything outside the reported top-k
+        outside = int(ranked.iloc[k]) if len(ranked) > k else self.floor()
+        out["guaranteed"] = out["lower_bound"] >= outside
+        return out
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez_compressed(f, capacity=self.capacity, total=self.total,
+                                items=np.array(self.count.index.tolist(), dtype=str),
+                                count=self.count.to_numpy(), error=self.error.to_numpy())
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            self = cls(int(z["capacity"]))
+            items = pd.Index(z["items"].tolist(), dtype=object)
+            self.count = pd.Series(z["count"].astype(np.int64), index=items)
+            self.error = pd.Series(z["error"].astype(np.int64), index=items)
+            self.total = int(z["total"])
+        return self
@@ -0,0 +1,86 @@
+# ============================================
+# INGEST CHECKPOINTS (resume a killed ingest instead of starting over)
+# Every `every` chunks (serial) or merged byte ranges (parallel) the ingest
+# loop pickles its whole state to one file: how far into the CSV it got, the
+# Space-Saving route counts, the FareStore (live slots only, see its
+# __getstate__) and the optional quantile sketches / dedup filter. The file is
+# written to a temp name and os.replace'd, so the one on disk is always a
+# complete checkpoint. It is stamped with a run key (source fingerprint +
+# ingest parameters); a checkpoint of another file or other settings is
+# ignored. Serial checkpointed runs read fixed newline-aligned byte ranges
+# (fare_ingest.iter_byte_chunks), so a resumed run sees exactly the chunks an
+# uninterrupted one would.
+# ============================================
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from fare_cache import source_fingerprint
+
+CHECKPOINT_VERSION = 1
+
+
+class IngestCheckpoint:
+    def __init__(self, path, every=20):
+        self.path = path
+        self.every = max(int(every), 1)
+        self.key = None
+        self._attached = {}
+        self.stats = {"saves": 0, "save_s": 0.0, "last_mb": 0.0, "resumed_at_byte": None, "resumed_at_unit": None}
+
+    def attach(self, name, get, restore, initial=0):
+        """State owned outside ingest (e.g. a FareLog fed by on_stored): get() is saved with every
+        checkpoint, restore(saved) runs on resume and restore(initial) on a fresh start."""
+        self._attached[name] = (get, restore, initial)
+
+    def bind(self, source_path, params):
+        blob = json.dumps({"source": source_fingerprint(source_path), "params": params}, sort_keys=True, default=str)
+        self.key = hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def due(self, unit):
+        return unit % self.every == 0
+
+    def load(self):
+        """Saved state of this run (bind() first), else None. Attached state is restored either way."""
+        state = None
+        if self.exists():
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+            if saved.get("version") == CHECKPOINT_VERSION and saved.get("key") == self.key:
+                state = saved["state"]
+        for name, (_, restore, initial) in self._attached.items():
+            restore(state["attached"][name] if state is not None else initial)
+        if state is not None:
+            self.stats["resumed_at_byte"], self.stats["resumed_at_unit"] = state.get("offset"), state["units"]
+        return state
+
+    def save(self, state):
+        t = time.perf_counter()
+        state = {**state, "attached": {name: get() for name, (get, _, _) in self._attached.items()}}
+        tmp = self.path + ".tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": CHECKPOINT_VERSION, "key": self.key, "state": state}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.stats["saves"] += 1
+        self.stats["save_s"] += time.perf_counter() - t
+        self.stats["last_mb"] = os.path.getsize(self.path) / 1024**2
+        return os.path.getsize(self.path)
+
+    def clear(self):
+        """Drop the checkpoint once its results are safe elsewhere (e.g. in the fare cache)."""
+        for p in (self.path, self.path + ".tmp"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def summary(self):
+        return {**self.stats, "save_s": round(self.stats["save_s"], 3), "last_mb": round(self.stats["last_mb"], 2)}
@@ -0,0 +1,154 @@
+# ============================================
+# INGEST INSTRUMENTATION (per-stage timers + counters)
+# One IngestMetrics per run: stage("parse") times a block, count("rows_in", n)
+# adds to a counter, gauge("rss_mb", x) records a level. end_chunk() closes a
+# chunk: its per-stage seconds and the running totals go out as one JSON line,
+# and the Prometheus text file (textfile-collector format) is rewritten.
+# Disabled (NULL_METRICS, the default everywhere) every call returns at once
+# and stage() hands back one shared no-op context manager.
+# ============================================
+
+import contextlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from dataset_loader import peak_rss_mb
+
+PROM_PREFIX = "fare_ingest"
+_NOOP = contextlib.nullcontext()
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+class _StageTimer:
+    __slots__ = ("m", "name", "t")
+
+    def __init__(self, m, name):
+        self.m, self.name = m, name
+
+    def __enter__(self):
+        self.t = time.perf_counter()
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t
+        self.m.chunk_seconds[self.name] = self.m.chunk_seconds.get(self.name, 0.0) + dt
+        self.m.seconds[self.name] = self.m.seconds.get(self.name, 0.0) + dt
+        return False
+
+
+class IngestMetrics:
+    def __init__(self, jsonl_path=None, prom_path=None, enabled=True):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.seconds = {}         # stage -> total seconds
+        self.chunk_seconds = {}   # stage -> seconds in the current chunk
+        self.counters = {}
+        self.gauges = {}
+        self.chunks = 0
+        self.t0 = time.perf_counter()
+        self._timers = {}
+        if enabled and jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+            open(jsonl_path, "w").close()
+
+    @classmethod
+    def to_path(cls, path):
+        """'.prom' -> Prometheus text file, anything else -> JSON lines; None -> disabled."""
+        if not path:
+            return NULL_METRICS
+        return cls(prom_path=path) if path.endswith(".prom") else cls(jsonl_path=path)
+
+    # -------------------------------
+    # Recording
+    # -------------------------------
+    def stage(self, name):
+        if not self.enabled:
+            return _NOOP
+        if name not in self._timers:
+            self._timers[name] = _StageTimer(self, name)
+        return self._timers[name]
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def gauge(self, name, value):
+        if self.enabled:
+            self.gauges[name] = value
+
+    def timed_iter(self, iterable, name="read"):
+        """Yields from iterable, charging the time spent waiting on it to `name`."""
+        if not self.enabled:
+            yield from iterable
+            return
+        it = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(it, None)
+            if item is None:
+                return
+            yield item
+
+    def merge(self, other):
+        """Fold a worker's totals in (parallel ingest); gauges keep the larger value."""
+        if not (self.enabled and other.enabled):
+            return
+        for src, dst in ((other.seconds, self.chunk_seconds), (other.seconds, self.seconds),
+                         (other.counters, self.counters)):
+            for k, v in src.items():
+                dst[k] = dst.get(k, 0) + v
+        for k, v in other.gauges.items():
+            self.gauges[k] = max(self.gauges.get(k, v), v)
+
+    # -------------------------------
+    # Export
+    # -------------------------------
+    def end_chunk(self, **fields):
+        if not self.enabled:
+            return
+        self.chunks += 1
+        self.gauge("rss_mb", round(rss_mb(), 1))
+        if self.jsonl_path:
+            rec = {"chunk": self.chunks, "elapsed_s": round(time.perf_counter() - self.t0, 4), **fields,
+                   "stage_s": {k: round(v, 6) for k, v in self.chunk_seconds.items()},
+                   "counters": dict(self.counters), "gauges": dict(self.gauges)}
+            with open(self.jsonl_path, "a") as f:
+                f.write(json.dumps(rec) + "\n")
+        if self.prom_path:
+            self.write_prometheus(self.prom_path)
+        self.chunk_seconds = {}
+
+    def prometheus_text(self):
+        p = PROM_PREFIX
+        lines = [f"# TYPE {p}_stage_seconds_total counter"]
+        lines += [f'{p}_stage_seconds_total{{stage="{k}"}} {v:.6f}' for k, v in sorted(self.seconds.items())]
+        for k, v in sorted(self.counters.items()):
+            lines += [f"# TYPE {p}_{k}_total counter", f"{p}_{k}_total {v}"]
+        for k, v in sorted(self.gauges.items()):
+            lines += [f"# TYPE {p}_{k} gauge", f"{p}_{k} {v}"]
+        lines += [f"# TYPE {p}_chunks_total counter", f"{p}_chunks_total {self.chunks}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        tmp = path + ".tmp"   # collectors must never see a half-written file
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def summary(self):
+        """Per-stage seconds and share of the run, largest first."""
+        s = pd.Series(self.seconds, dtype=float).sort_values(ascending=False)
+        return pd.DataFrame({"seconds": s.round(3), "share_%": (s / s.sum() * 100).round(1) if len(s) else s})
+
+
+NULL_METRICS = IngestMetrics(enabled=False)
@@ -0,0 +1,186 @@
+# ============================================
+# PER-ROUTE PRICE QUANTILES (streaming, mergeable sketches)
+# One log-bucket histogram per route (DDSketch style): bucket i holds prices in
+# (min_value * g^(i-1), min_value * g^i] with g = (1 + rel_err) / (1 - rel_err),
+# so every quantile comes back within rel_err of a true price of that rank.
+# A chunk is one vectorized update (unique (route, bucket) pairs), merging two
+# sketches is adding counts, and memory is n_buckets int32 per route
+# (~2.3 KB at rel_err=0.01 over 1..100k), independent of rows seen.
+# With trim=(lo, hi) ingest drops rows outside the route's own [lo, hi]
+# quantiles before they reach the FareStore (fare_ingest.consume_chunk).
+# ============================================
+
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class RouteQuantiles:
+    def __init__(self, rel_err=0.01, min_value=1.0, max_value=100_000.0, trim=None, min_count=200):
+        """trim=(0.005, 0.995) filters each route once it has min_count prices (the bounds are noise before)."""
+        if not 0 < rel_err < 1:
+            raise ValueError(f"rel_err must be in (0, 1), got {rel_err}")
+        self.params = {"rel_err": rel_err, "min_value": min_value, "max_value": max_value,
+                       "trim": list(trim) if trim else None, "min_count": min_count}
+        self.trim, self.min_count = (tuple(trim) if trim else None), min_count
+        self.min_value = float(min_value)
+        self.log_gamma = np.log((1 + rel_err) / (1 - rel_err))
+        self.n_buckets = int(np.ceil(np.log(max_value / min_value) / self.log_gamma)) + 1
+        # bucket -> estimate (midpoint in relative terms); bucket 0 collects everything <= min_value
+        gamma = np.exp(self.log_gamma)
+        self.values = self.min_value * 2 * gamma ** np.arange(self.n_buckets) / (gamma + 1)
+        self.values[0] = self.min_value
+        self.index = {}   # route -> row
+        self._free = []
+        self.counts = np.zeros((0, self.n_buckets), dtype=np.int32)
+        self.total = np.zeros(0, dtype=np.int64)
+
+    def empty_like(self):
+        return RouteQuantiles(**self.params)
+
+    def __len__(self):
+        return len(self.index)
+
+    def routes(self):
+        return list(self.index)
+
+    def _bucket(self, prices):
+        p = np.asarray(prices, dtype=np.float64)
+        b = np.ceil(np.log(np.maximum(p, self.min_value) / self.min_value) / self.log_gamma)
+        return np.clip(b, 0, self.n_buckets - 1).astype(np.int64)
+
+    def _row(self, route):
+        row = self.index.get(route)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self.index)
+                if row == len(self.counts):
+                    cap = max(2 * len(self.counts), 64)
+                    self.counts = np.concatenate([self.counts, np.zeros((cap - len(self.counts), self.n_buckets),
+                                                                        dtype=np.int32)])
+                    self.total = np.concatenate([self.total, np.zeros(cap - len(self.total), dtype=np.int64)])
+            self.index[route] = row
+        return row
+
+    def _rows(self, routes, create=False):
+        """(per-value codes, row per distinct route); -1 rows for unknown routes unless create."""
+        codes, uniq = pd.factorize(pd.Series(routes))
+        names = np.asarray(uniq, dtype=object).tolist()
+        if create:
+            rows = np.array([self._row(r) for r in names], dtype=np.int64)
+        else:
+            rows = np.array([self.index.get(r, -1) for r in names], dtype=np.int64)
+        return codes, rows
+
+    # -------------------------------
+    # Updates
+    # -------------------------------
+    def update(self, routes, prices):
+        """Add one chunk of (route, price) observations."""
+        if not len(routes):
+            return
+        codes, rows = self._rows(routes, create=True)
+        pairs, n = np.unique(codes * self.n_buckets + self._bucket(prices), return_counts=True)
+        r = rows[pairs // self.n_buckets]
+        self.counts[r, pairs % self.n_buckets] += n.astype(np.int32)
+        np.add.at(self.total, r, n)
+
+    def merge(self, other):
+        """Fold another sketch with the same parameters into this one (associative, commutative)."""
+        if other.params != self.params:
+            raise ValueError("can only merge sketches built with the same parameters")
+        if not len(other):
+            return
+        names = list(other.index)
+        rows = np.array([self._row(r) for r in names], dtype=np.int64)
+        src = np.array([other.index[r] for r in names], dtype=np.int64)
+        self.counts[rows] += other.counts[src]
+        self.total[rows] += other.total[src]
+
+    def evict(self, routes):
+        rows = [self.index.pop(r) for r in routes if r in self.index]
+        if rows:
+            self.counts[rows] = 0
+            self.total[rows] = 0
+            self._free.extend(rows)
+        return len(rows)
+
+    # -------------------------------
+    # Queries
+    # -------------------------------
+    def _quantile_buckets(self, rows, q):
+        """Bucket of the q-quantile per row (rows >= 0, non-empty), shape (len(rows), len(q))."""
+        cum = np.cumsum(self.counts[rows], axis=1, dtype=np.int64)
+        rank = np.floor(np.asarray(q, dtype=np.float64)[None, :] * (cum[:, -1:] - 1))
+        return (cum[:, :, None] <= rank[:, None, :]).sum(axis=1)
+
+    def count(self, routes):
+        single = isinstance(routes, str)
+        codes, rows = self._rows([routes] if single else routes)
+        n = np.zeros(len(rows), dtype=np.int64)
+        n[rows >= 0] = self.total[rows[rows >= 0]]
+        n = n[codes]
+        return int(n[0]) if single else n
+
+    def quantiles(self, routes, q):
+        """Price at quantile(s) q for each route (NaN for routes never seen).
+
+        A single route and a scalar q give a float; otherwise an array of shape
+        (len(routes),) or (len(routes), len(q)).
+        """
+        single, scalar = isinstance(routes, str), np.ndim(q) == 0
+        codes, rows = self._rows([routes] if single else routes)
+        qs = np.atleast_1d(q)
+        out = np.full((len(rows), len(qs)), np.nan)
+        ok = rows >= 0
+        ok[ok] = self.total[rows[ok]] > 0
+        if ok.any():
+            out[ok] = self.values[self._quantile_buckets(rows[ok], qs)]
+        out = out[codes]
+        if scalar:
+            out = out[:, 0]
+        return out[0] if single else out
+
+    def keep_mask(self, routes, prices, trim=None):
+        """True for prices inside their route's [lo, hi] quantile buckets (or routes below min_count)."""
+        lo_q, hi_q = trim or self.trim
+        codes, rows = self._rows(routes)
+        lo = np.zeros(len(rows), dtype=np.int64)
+        hi = np.full(len(rows), self.n_buckets - 1, dtype=np.int64)
+        active = rows >= 0
+        active[active] = self.total[rows[active]] >= max(self.min_count, 1)
+        if active.any():
+            b = self._quantile_buckets(rows[active], [lo_q, hi_q])
+            lo[active], hi[active] = b[:, 0], b[:, 1]
+        b = self._bucket(prices)
+        return (b >= lo[codes]) & (b <= hi[codes])
+
+    def summary(self, q=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        names = self.routes()
+        out = pd.DataFrame(self.quantiles(names, list(q)), index=pd.Index(names, name="route"),
+                           columns=[f"p{round(x * 100, 1):g}" for x in q])
+        out.insert(0, "count", self.total[[self.index[r] for r in names]] if names else [])
+        return out.sort_index()
+
+    # -------------------------------
+    # Persistence
+    # -------------------------------
+    def save(self, path):
+        names = self.routes()
+        rows = np.array([self.index[r] for r in names], dtype=np.int64)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, params=json.dumps(self.params), routes=np.array(names, dtype=str),
+                                counts=self.counts[rows], total=self.total[rows])
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            self = cls(**json.loads(str(z["params"])))
+            names = z["routes"].tolist()
+            self.counts, self.total = z["counts"].astype(np.int32), z["total"].astype(np.int64)
+        self.index = {r: i for i, r in enumerate(names)}
+        return self
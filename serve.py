@@ -0,0 +1,341 @@
+# ============================================
+# LOCAL BACKEND API (asyncio, stdlib only, fully offline)
+#   GET /fare?route=BOS-EWR[&now=...][&departure_date=...][&airline=...]  -> get_live_fare
+#   GET /deals?origin=ATL[&k=20][&date_from=...][&date_to=...][&by=min_recent][&airline=...]
+#   GET /deals?route=ATL-BOS[&k=...][&date_from=...][&date_to=...]        -> cheapest destinations / airlines
+#   GET /track?airport=ORD&airline=AA&month=7                              -> track_flight_card
+#   GET /health                                                            -> sizes, batch stats, sample keys
+# --tail DIR keeps folding new fare CSV drops into /fare while serving (fare_tail.py).
+# Tables are loaded once at startup: fare_sig from the fare cache written by 1.py,
+# the delay risk tables from track_demo.py. Concurrent requests to an endpoint
+# are collected into micro-batches and answered by one vectorized call on a
+# worker thread, so the event loop only parses and writes HTTP.
+# Usage: python serve.py --fare-cache /kaggle/working/fare_cache --port 8080
+#        python benchmarks/load_serve.py --port 8080   (p50/p99/QPS)
+# ============================================
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from deal_index import DealIndex
+from fare_cache import FareCache
+from fare_compact import compact_frame
+from fare_index import FareIndex
+from fare_tail import FareTail
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+def _json_default(o):
+    if isinstance(o, (pd.Timestamp, dt.date, dt.datetime)):
+        return None if pd.isna(o) else o.isoformat()
+    if isinstance(o, np.generic):
+        return o.item()
+    if o is pd.NaT:
+        return None
+    return str(o)
+
+
+def to_json(obj):
+    return json.dumps(obj, default=_json_default).encode()
+
+
+# -------------------------------
+# Micro-batching
+# -------------------------------
+class MicroBatcher:
+    """Collects concurrent calls into one `batch_fn(items) -> results` call.
+
+    A batch closes at `max_batch` items or `max_wait_ms` after its first item,
+    whichever comes first, and runs on `executor` (off the event loop). If the
+    batch call raises, its items are retried one by one, so only the failing
+    item gets the error.
+    """
+
+    def __init__(self, batch_fn, executor, max_batch=256, max_wait_ms=2.0):
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, item):
+        fut = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            items = [b[0] for b in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+            except Exception as e:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(e)
+                    continue
+                # one bad item must not fail its neighbours: answer each on its own
+                results = []
+                for item in items:
+                    try:
+                        results.append((await loop.run_in_executor(self.executor, self.batch_fn, [item]))[0])
+                    except Exception as item_error:
+                        results.append(item_error)
+            self.batches += 1
+            self.items += len(items)
+            for (_, fut), res in zip(batch, results):
+                if fut.done():
+                    continue
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+
+# -------------------------------
+# Backends (loaded once)
+# -------------------------------
+class FareBackend:
+    def __init__(self, cache_root=None, cache_path=None, tail=None, tail_interval_ms=50.0):
+        cache = FareCache.open(cache_path) if cache_path else FareCache.latest(cache_root)
+        if cache is None:
+            raise FileNotFoundError(f"no fare cache under {cache_root!r}; run 1.py once to build it")
+        self.cache = cache
+        fare_sig = compact_frame(cache.load())
+        self.tail = None
+        if tail:
+            # new CSV drops under `tail` are folded in on a background thread (fare_tail.py)
+            p = cache.params
+            self.tail = FareTail.from_frame(fare_sig, p["columns"], keep_n=p.get("KEEP_LAST_N_PER_ROUTE", 60),
+                                            hh_capacity=p.get("HH_CAPACITY", 10_000), signal_k=p.get("SIGNAL_K", 12),
+                                            deals=True)
+            self.tail.watch(tail).start(interval=tail_interval_ms / 1e3)
+        else:
+            self._index = FareIndex(fare_sig)
+            self._deals = DealIndex.from_frame(fare_sig, recent=cache.params.get("SIGNAL_K", 12))
+
+    @property
+    def index(self):
+        # with a tail: the snapshot of its last poll, so one batch is answered from one state
+        return self.tail.snapshot if self.tail is not None else self._index
+
+    @property
+    def deals(self):
+        return self.tail.deals if self.tail is not None else self._deals
+
+    def parse(self, q):
+        if not q.get("route"):
+            raise ValueError("route is required")
+        out = {"route": q["route"].upper().strip(), "now": None, "departure_date": None, "airline": q.get("airline")}
+        for name in ("now", "departure_date"):
+            if q.get(name):
+                try:
+                    out[name] = pd.Timestamp(q[name])
+                except ValueError:
+                    raise ValueError(f"{name} is not a date/time: {q[name]!r}")
+                if pd.isna(out[name]):
+                    raise ValueError(f"{name} is not a date/time: {q[name]!r}")
+        if out["departure_date"] is not None:
+            out["departure_date"] = out["departure_date"].date()
+        return out
+
+    def batch(self, items):
+        index = self.index
+        if len(items) == 1:  # scalar path is cheaper than the vectorized setup
+            return [index.get_live_fare(**items[0])]
+        return index.get_live_fares(items)
+
+
+class DealBackend:
+    """/deals on the fare backend's DealIndex; each query is a few ms, so a batch is a loop."""
+
+    def __init__(self, fare):
+        self.fare = fare
+
+    def parse(self, q):
+        if not q.get("origin") and not q.get("route"):
+            raise ValueError("origin or route is required")
+        if q.get("by", "latest") not in ("latest", "min_recent"):
+            raise ValueError("by must be latest or min_recent")
+        try:
+            k = int(q["k"]) if q.get("k") else (None if q.get("route") else 20)
+        except ValueError:
+            raise ValueError("k must be an integer")
+        return {"origin": q.get("origin"), "route": q["route"].upper().strip() if q.get("route") else None, "k": k,
+                "date_from": q.get("date_from"), "date_to": q.get("date_to"), "by": q.get("by", "latest"),
+                "airline": q.get("airline")}
+
+    def batch(self, items):
+        deals = self.fare.deals
+        out = []
+        for it in items:
+            try:
+                out.append({"ok": True, "deals": deals.query(**it).to_dict("records")})
+            except ValueError as e:   # e.g. a date_from that is not a date
+                out.append({"ok": False, "reason": str(e)})
+        return out
+
+
+class TrackBackend:
+    def __init__(self):
+        import track_demo  # builds the risk tables on import
+        self.td = track_demo
+
+    def parse(self, q):
+        try:
+            item = {"origin_airport": q["airport"], "airline_code": q["airline"], "month": int(q["month"])}
+        except (KeyError, ValueError):
+            raise ValueError("airport, airline and integer month are required")
+        if not 1 <= item["month"] <= 12:
+            raise ValueError(f"month must be 1..12, got {item['month']}")
+        return item
+
+    def batch(self, items):
+        req = pd.DataFrame(items)
+        return self.td.track_flight_cards(req, with_text=True).to_dict("records")
+
+
+# -------------------------------
+# HTTP
+# -------------------------------
+class FareServer:
+    def __init__(self, backends, max_batch=256, max_wait_ms=2.0):
+        self.backends = backends
+        self.executor = ThreadPoolExecutor(max_workers=max(len(backends), 1))
+        self.batchers = {name: MicroBatcher(b.batch, self.executor, max_batch, max_wait_ms)
+                         for name, b in backends.items()}
+        self.started = time.time()
+        self.requests = 0
+
+    def health(self):
+        out = {"ok": True, "uptime_s": round(time.time() - self.started, 1), "requests": self.requests,
+               "endpoints": sorted("/" + n for n in self.backends)}
+        for name, b in self.batchers.items():
+            out[f"{name}_batches"] = b.batches
+            out[f"{name}_mean_batch"] = round(b.items / b.batches, 2) if b.batches else 0
+        if "fare" in self.backends:
+            idx = self.backends["fare"].index
+            out["fare_rows"] = len(idx)
+            out["sample_routes"] = list(idx.routes[:200])
+            if self.backends["fare"].tail is not None:
+                out["fare_tail"] = self.backends["fare"].tail.summary()
+        if "track" in self.backends:
+            td = self.backends["track"].td
+            out["sample_airports"] = td.airport_risk["airport"].head(200).tolist()
+            out["sample_airlines"] = td.airline_risk["carrier"].head(200).tolist()
+        return out
+
+    async def route(self, method, target):
+        url = urlsplit(target)
+        name = url.path.strip("/")
+        if method != "GET":
+            return 400, {"ok": False, "reason": "only GET is supported"}
+        if name == "health":
+            return 200, self.health()
+        if name not in self.backends:
+            return 404, {"ok": False, "reason": f"unknown endpoint /{name}"}
+        try:
+            item = self.backends[name].parse(dict(parse_qsl(url.query)))
+        except ValueError as e:
+            return 400, {"ok": False, "reason": str(e)}
+        return 200, await self.batchers[name].submit(item)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if int(headers.get("content-length", 0)):
+                    await reader.readexactly(int(headers["content-length"]))
+
+                self.requests += 1
+                try:
+                    code, payload = await self.route(method, target)
+                except Exception as e:
+                    code, payload = 500, {"ok": False, "reason": repr(e)}
+                body = to_json(payload)
+                keep = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write(
+                    f"HTTP/1.1 {code} {REASONS.get(code, '')}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep else 'close'}\r\n\r\n"
+                    .encode() + body)
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        for b in self.batchers.values():
+            b.start()
+        server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        print(f"✅ Serving {sorted('/' + n for n in self.backends)} on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--fare-cache", default="/kaggle/working/fare_cache", help="cache root written by 1.py")
+    ap.add_argument("--fare-cache-entry", default=None, help="one specific cache entry directory")
+    ap.add_argument("--tail", default=None, help="directory of new fare CSV drops (or one growing CSV) to fold in live")
+    ap.add_argument("--tail-interval-ms", type=float, default=50.0)
+    ap.add_argument("--no-fare", action="store_true")
+    ap.add_argument("--no-track", action="store_true")
+    ap.add_argument("--max-batch", type=int, default=256)
+    ap.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = ap.parse_args()
+
+    t = time.perf_counter()
+    backends = {}
+    if not args.no_fare:
+        backends["fare"] = FareBackend(args.fare_cache, args.fare_cache_entry, args.tail, args.tail_interval_ms)
+        print(f"✅ Fare index: {len(backends['fare'].index):,} rows from {backends['fare'].cache.path}")
+        backends["deals"] = DealBackend(backends["fare"])
+        print(f"✅ Deal index: {len(backends['fare'].deals):,} groups")
+        if args.tail:
+            print(f"✅ Tailing {args.tail} for new fare rows")
+    if not args.no_track:
+        backends["track"] = TrackBackend()
+        print(f"✅ Risk tables: {len(backends['track'].td.airport_risk):,} airports")
+    print(f"✅ Startup {time.perf_counter() - t:.2f}s")
+
+    asyncio.run(FareServer(backends, args.max_batch, args.max_wait_ms).serve(args.host, args.port))
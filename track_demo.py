@@ -4,15 +4,28 @@
 # What it DOESN'T: realtime GPS / flight-number live status
 # ============================================================
 
+import os
+import time
+_T0 = time.perf_counter()   # startup clock (reported once the tables are ready)
+
 import pandas as pd
 import numpy as np
 
+from cause_cube import CauseCube
+from dataset_loader import read_pruned, sniff_header, startup_report
+from fare_cache import source_fingerprint
+from risk_index import FALLBACK_CAUSE_MIX, RiskIndex
+
 # -----------------------------
 # 0) Load same datasets (Kaggle paths)
 # -----------------------------
 ECONOMY_PATH  = "/kaggle/input/indian-airlines-ticket-price-analysis/economy.csv"
 BUSINESS_PATH = "/kaggle/input/indian-airlines-ticket-price-analysis/business.csv"
 DELAY_PATH    = "/kaggle/input/airline-on-time-statistics-and-delay-causes-bts/Airline_Delay_Cause.csv"
+DELAY_CUBE_PATH = "/kaggle/working/delay_cube.parquet"   # prebuilt (airport, carrier, month) cube
+# offline runs (benchmarks/run_suite.py) point the tracker at other files
+DELAY_PATH      = os.environ.get("TRACKER_DELAY_PATH", DELAY_PATH)
+DELAY_CUBE_PATH = os.environ.get("TRACKER_CUBE_PATH", DELAY_CUBE_PATH)
 
 def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -25,12 +38,30 @@ def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
     )
     return df
 
-tickets_economy  = standardize_columns(pd.read_csv(ECONOMY_PATH))
-tickets_business = standardize_columns(pd.read_csv(BUSINESS_PATH))
-delay_df         = standardize_columns(pd.read_csv(DELAY_PATH))
-
-# Show schema quickly (helps you prove what data supports in PPT)
-print("Delay dataset columns:\n", list(delay_df.columns))
+# Ticket tables are not used by the tracker itself: they are read on first
+# access (track_demo.tickets_economy / ticket_table("economy")), not at import.
+TICKET_PATHS = {"economy": ECONOMY_PATH, "business": BUSINESS_PATH}
+_tickets = {}
+
+def ticket_table(kind: str) -> pd.DataFrame:
+    if kind not in _tickets:
+        _tickets[kind] = standardize_columns(pd.read_csv(TICKET_PATHS[kind]))
+    return _tickets[kind]
+
+def __getattr__(name):
+    if name in ("tickets_economy", "tickets_business"):
+        return ticket_table(name.split("_", 1)[1])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Warm start: the saved cube already holds everything the tracker needs,
+# so the BTS CSV is only read when the cube is missing or the CSV changed.
+delay_cube = CauseCube.load(DELAY_CUBE_PATH, source_path=DELAY_PATH)
+delay_df = None
+if delay_cube is None:
+    # header only for now; the columns the schema needs are read after detection
+    delay_header = sniff_header(DELAY_PATH)
+    # Show schema quickly (helps you prove what data supports in PPT)
+    print("Delay dataset columns:\n", list(delay_header))
 
 # -----------------------------
 # 1) Robust column helpers
@@ -49,145 +80,172 @@ def get_numeric_series(df: pd.DataFrame, col: str, default_value=0.0) -> pd.Seri
 def safe_upper_str_series(df: pd.DataFrame, col: str) -> pd.Series:
     if col is None or col not in df.columns:
         return pd.Series(["UNKNOWN"] * len(df), index=df.index)
-    return df[col].astype(str).str.upper().str.strip()
+    s = df[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # normalize each distinct code once; missing -> "NAN" like astype(str) below
+        cats = s.cat.categories.astype(str).str.upper().str.strip().to_numpy(dtype=object)
+        return pd.Series(np.append(cats, "NAN")[s.cat.codes.to_numpy()], index=df.index)
+    return s.astype(str).str.upper().str.strip()
 
 # -----------------------------
 # 2) Detect BTS aggregated fields
 # -----------------------------
-AIRPORT_COL = pick_first_existing_col(delay_df, ["airport", "origin", "origin_airport", "airport_code"])
-CARRIER_COL = pick_first_existing_col(delay_df, ["carrier", "unique_carrier", "airline", "airline_code"])
-YEAR_COL    = pick_first_existing_col(delay_df, ["year"])
-MONTH_COL   = pick_first_existing_col(delay_df, ["month"])
-
-FLIGHTS_COL       = pick_first_existing_col(delay_df, ["arr_flights", "flights"])
-ARR_DELAY_MIN_COL = pick_first_existing_col(delay_df, ["arr_delay", "arr_delay_minutes"])
-DEP_DELAY_MIN_COL = pick_first_existing_col(delay_df, ["dep_delay", "dep_delay_minutes"])
-
-CANCELLED_COL = pick_first_existing_col(delay_df, ["arr_cancelled", "cancelled"])
-DIVERTED_COL  = pick_first_existing_col(delay_df, ["arr_diverted", "diverted"])
-
-CAUSE_MAP = {
-    "late_aircraft": pick_first_existing_col(delay_df, ["late_aircraft_ct", "late_aircraft_delay"]),
-    "carrier":       pick_first_existing_col(delay_df, ["carrier_ct", "carrier_delay"]),
-    "nas":           pick_first_existing_col(delay_df, ["nas_ct", "nas_delay"]),
-    "weather":       pick_first_existing_col(delay_df, ["weather_ct", "weather_delay"]),
-    "security":      pick_first_existing_col(delay_df, ["security_ct", "security_delay"]),
-}
-
-print("\nDetected schema:", {
-    "AIRPORT_COL": AIRPORT_COL,
-    "CARRIER_COL": CARRIER_COL,
-    "FLIGHTS_COL": FLIGHTS_COL,
-    "ARR_DELAY_MIN_COL": ARR_DELAY_MIN_COL,
-    "DEP_DELAY_MIN_COL": DEP_DELAY_MIN_COL,
-    "CANCELLED_COL": CANCELLED_COL,
-    "DIVERTED_COL": DIVERTED_COL,
-    "CAUSE_MAP": CAUSE_MAP
-})
+def detect_schema(df: pd.DataFrame) -> dict:
+    return {
+        "AIRPORT_COL": pick_first_existing_col(df, ["airport", "origin", "origin_airport", "airport_code"]),
+        "CARRIER_COL": pick_first_existing_col(df, ["carrier", "unique_carrier", "airline", "airline_code"]),
+        "YEAR_COL":    pick_first_existing_col(df, ["year"]),
+        "MONTH_COL":   pick_first_existing_col(df, ["month"]),
+
+        "FLIGHTS_COL":       pick_first_existing_col(df, ["arr_flights", "flights"]),
+        "ARR_DELAY_MIN_COL": pick_first_existing_col(df, ["arr_delay", "arr_delay_minutes"]),
+        "DEP_DELAY_MIN_COL": pick_first_existing_col(df, ["dep_delay", "dep_delay_minutes"]),
+
+        "CANCELLED_COL": pick_first_existing_col(df, ["arr_cancelled", "cancelled"]),
+        "DIVERTED_COL":  pick_first_existing_col(df, ["arr_diverted", "diverted"]),
+
+        "CAUSE_MAP": {
+            "late_aircraft": pick_first_existing_col(df, ["late_aircraft_ct", "late_aircraft_delay"]),
+            "carrier":       pick_first_existing_col(df, ["carrier_ct", "carrier_delay"]),
+            "nas":           pick_first_existing_col(df, ["nas_ct", "nas_delay"]),
+            "weather":       pick_first_existing_col(df, ["weather_ct", "weather_delay"]),
+            "security":      pick_first_existing_col(df, ["security_ct", "security_delay"]),
+        },
+    }
+
+SCHEMA = (detect_schema(pd.DataFrame(columns=list(delay_header))) if delay_cube is None
+          else delay_cube.meta["schema"])
+AIRPORT_COL, CARRIER_COL = SCHEMA["AIRPORT_COL"], SCHEMA["CARRIER_COL"]
+YEAR_COL, MONTH_COL      = SCHEMA["YEAR_COL"], SCHEMA["MONTH_COL"]
+FLIGHTS_COL       = SCHEMA["FLIGHTS_COL"]
+ARR_DELAY_MIN_COL = SCHEMA["ARR_DELAY_MIN_COL"]
+DEP_DELAY_MIN_COL = SCHEMA["DEP_DELAY_MIN_COL"]
+CANCELLED_COL, DIVERTED_COL = SCHEMA["CANCELLED_COL"], SCHEMA["DIVERTED_COL"]
+CAUSE_MAP = SCHEMA["CAUSE_MAP"]
+
+print("\nDetected schema:", {k: v for k, v in SCHEMA.items() if k not in ("YEAR_COL", "MONTH_COL")})
 
 # -----------------------------
 # 3) Normalize fields into analysis-ready columns
+# Per-row totals, not per-row averages: the tables in 4) divide summed
+# minutes / cancellations by summed flights, so every flight weighs the same
+# and stats from different files can simply be added.
 # -----------------------------
-delay_df["airport_std"] = safe_upper_str_series(delay_df, AIRPORT_COL)
-delay_df["carrier_std"] = safe_upper_str_series(delay_df, CARRIER_COL)
-delay_df["year"]  = get_numeric_series(delay_df, YEAR_COL, default_value=np.nan)
-delay_df["month"] = get_numeric_series(delay_df, MONTH_COL, default_value=np.nan)
-
-flights = get_numeric_series(delay_df, FLIGHTS_COL, default_value=0)
-
-arr_delay_total = get_numeric_series(delay_df, ARR_DELAY_MIN_COL, default_value=0)
-dep_delay_total = get_numeric_series(delay_df, DEP_DELAY_MIN_COL, default_value=0)
-if dep_delay_total.sum() == 0 and arr_delay_total.sum() > 0:
-    dep_delay_total = arr_delay_total.copy()
-
-# avg minutes per flight (aggregated BTS)
-delay_df["avg_arr_delay_min"] = np.where(flights > 0, arr_delay_total / flights, np.nan)
-delay_df["avg_dep_delay_min"] = np.where(flights > 0, dep_delay_total / flights, np.nan)
-
-cancelled_cnt = get_numeric_series(delay_df, CANCELLED_COL, default_value=0)
-diverted_cnt  = get_numeric_series(delay_df, DIVERTED_COL, default_value=0)
-
-delay_df["cancel_rate"] = np.where(flights > 0, cancelled_cnt / flights, 0.0)
-delay_df["divert_rate"] = np.where(flights > 0, diverted_cnt / flights, 0.0)
-
-# If delay minutes not provided, create a proxy from cause counts (still useful)
-cause_proxy = (
-    get_numeric_series(delay_df, CAUSE_MAP["late_aircraft"], 0) +
-    get_numeric_series(delay_df, CAUSE_MAP["carrier"], 0) +
-    get_numeric_series(delay_df, CAUSE_MAP["nas"], 0) +
-    get_numeric_series(delay_df, CAUSE_MAP["weather"], 0) +
-    get_numeric_series(delay_df, CAUSE_MAP["security"], 0)
-)
-if np.nan_to_num(delay_df["avg_arr_delay_min"]).sum() == 0:
-    delay_df["avg_arr_delay_min"] = np.where(flights > 0, (cause_proxy / np.maximum(flights, 1)) * 10.0, np.nan)
-if np.nan_to_num(delay_df["avg_dep_delay_min"]).sum() == 0:
-    delay_df["avg_dep_delay_min"] = delay_df["avg_arr_delay_min"].copy()
+def normalize_delay_df(delay_df: pd.DataFrame) -> pd.DataFrame:
+    delay_df["airport_std"] = safe_upper_str_series(delay_df, AIRPORT_COL)
+    delay_df["carrier_std"] = safe_upper_str_series(delay_df, CARRIER_COL)
+    delay_df["year"]  = get_numeric_series(delay_df, YEAR_COL, default_value=np.nan)
+    delay_df["month"] = get_numeric_series(delay_df, MONTH_COL, default_value=np.nan)
+
+    flights = get_numeric_series(delay_df, FLIGHTS_COL, default_value=0)
+    has_flights = flights > 0
+
+    arr_delay_total = get_numeric_series(delay_df, ARR_DELAY_MIN_COL, default_value=0)
+    dep_delay_total = get_numeric_series(delay_df, DEP_DELAY_MIN_COL, default_value=0)
+    if dep_delay_total.sum() == 0 and arr_delay_total.sum() > 0:
+        dep_delay_total = arr_delay_total.copy()
+
+    # cause counts, numeric once (the cube sums these)
+    for k, col in CAUSE_MAP.items():
+        delay_df[f"cause_{k}"] = get_numeric_series(delay_df, col, 0)
+
+    # If delay minutes not provided, create a proxy from cause counts (still useful)
+    cause_proxy = delay_df[[f"cause_{k}" for k in CAUSE_MAP]].sum(axis=1)
+    if arr_delay_total[has_flights].sum() == 0:
+        arr_delay_total = cause_proxy * 10.0
+    if dep_delay_total[has_flights].sum() == 0:
+        dep_delay_total = arr_delay_total.copy()
+
+    # only rows that report flights count toward the per-flight ratios
+    delay_df["flights"]       = flights.where(has_flights, 0.0)
+    delay_df["arr_delay_min"] = arr_delay_total.where(has_flights, 0.0)
+    delay_df["dep_delay_min"] = dep_delay_total.where(has_flights, 0.0)
+    delay_df["cancelled"] = get_numeric_series(delay_df, CANCELLED_COL, default_value=0).where(has_flights, 0.0)
+    delay_df["diverted"]  = get_numeric_series(delay_df, DIVERTED_COL, default_value=0).where(has_flights, 0.0)
+    return delay_df
 
 # -----------------------------
 # 4) Build "tracking sensors" (airport / airline / seasonal tables)
+# Sufficient statistics are summed once into the (airport, carrier, month)
+# cube; the tables are roll-ups of it (per-flight rates = summed counts /
+# summed flights), and the scores are recomputed from those.
 # -----------------------------
-airport_risk = (
-    delay_df.groupby("airport_std")
-    .agg(
-        avg_arr_delay=("avg_arr_delay_min", "mean"),
-        avg_dep_delay=("avg_dep_delay_min", "mean"),
-        cancel_rate=("cancel_rate", "mean"),
-        divert_rate=("divert_rate", "mean"),
-        volume=("airport_std", "size"),
-        flights_total=(FLIGHTS_COL if FLIGHTS_COL in delay_df.columns else "cancel_rate", "sum")
+STAT_COLS = ["flights", "arr_delay_min", "dep_delay_min", "cancelled", "diverted"]
+
+def build_delay_cube(delay_df: pd.DataFrame) -> CauseCube:
+    m = {"rows": np.ones(len(delay_df))}
+    for c in STAT_COLS + [f"cause_{k}" for k in CAUSE_MAP]:
+        m[c] = delay_df[c]
+    return CauseCube.from_frame(delay_df["airport_std"], delay_df["carrier_std"], delay_df["month"],
+                                pd.DataFrame(m, index=delay_df.index), list(CAUSE_MAP), FALLBACK_CAUSE_MIX,
+                                meta={"schema": SCHEMA})
+
+def risk_table(cube: CauseCube, dims, stats, out_names):
+    r = cube.rollup(dims)
+    if dims == ("month",):
+        r = r[r.index.notna()]
+    flights = r["flights"].to_numpy()
+    has_flights = flights > 0
+    per_flight = lambda c: r[c].to_numpy() / np.where(has_flights, flights, 1)
+    out = pd.DataFrame(index=r.index)
+    for c, name in zip(stats, out_names):
+        # no flights -> unknown delay, but zero cancel / divert rate
+        out[name] = np.where(has_flights, per_flight(c), np.nan if c.endswith("_min") else 0.0)
+    out["volume"] = r["rows"].astype(np.int64)
+    out["flights_total"] = flights
+    return out.reset_index()
+
+def build_risk_tables(cube: CauseCube):
+    airport_risk = risk_table(cube, ("airport",),
+                              ["arr_delay_min", "dep_delay_min", "cancelled", "diverted"],
+                              ["avg_arr_delay", "avg_dep_delay", "cancel_rate", "divert_rate"])
+
+    airport_risk["congestion_score"] = (
+        airport_risk["avg_dep_delay"].fillna(0) * 0.45 +
+        airport_risk["avg_arr_delay"].fillna(0) * 0.45 +
+        airport_risk["cancel_rate"].fillna(0) * 100.0 * 0.10
     )
-    .reset_index()
-    .rename(columns={"airport_std": "airport"})
-)
-
-airport_risk["congestion_score"] = (
-    airport_risk["avg_dep_delay"].fillna(0) * 0.45 +
-    airport_risk["avg_arr_delay"].fillna(0) * 0.45 +
-    airport_risk["cancel_rate"].fillna(0) * 100.0 * 0.10
-)
-
-airline_risk = (
-    delay_df.groupby("carrier_std")
-    .agg(
-        avg_arr_delay=("avg_arr_delay_min", "mean"),
-        cancel_rate=("cancel_rate", "mean"),
-        volume=("carrier_std", "size"),
-        flights_total=(FLIGHTS_COL if FLIGHTS_COL in delay_df.columns else "cancel_rate", "sum")
-    )
-    .reset_index()
-    .rename(columns={"carrier_std": "carrier"})
-)
-
-airline_risk["reliability_index"] = (
-    airline_risk["avg_arr_delay"].fillna(0) * 1.0 +
-    airline_risk["cancel_rate"].fillna(0) * 100.0 * 2.0
-)
-
-seasonal_risk = (
-    delay_df.dropna(subset=["month"])
-    .groupby("month")
-    .agg(
-        avg_arr_delay=("avg_arr_delay_min", "mean"),
-        avg_dep_delay=("avg_dep_delay_min", "mean"),
-        cancel_rate=("cancel_rate", "mean"),
-        volume=("month", "size"),
-        flights_total=(FLIGHTS_COL if FLIGHTS_COL in delay_df.columns else "cancel_rate", "sum")
+
+    airline_risk = risk_table(cube, ("carrier",), ["arr_delay_min", "cancelled"], ["avg_arr_delay", "cancel_rate"])
+
+    airline_risk["reliability_index"] = (
+        airline_risk["avg_arr_delay"].fillna(0) * 1.0 +
+        airline_risk["cancel_rate"].fillna(0) * 100.0 * 2.0
     )
-    .reset_index()
-)
+
+    seasonal_risk = risk_table(cube, ("month",),
+                               ["arr_delay_min", "dep_delay_min", "cancelled"],
+                               ["avg_arr_delay", "avg_dep_delay", "cancel_rate"])
+    return airport_risk, airline_risk, seasonal_risk
+
+def schema_columns(schema: dict) -> list:
+    cols = [v for k, v in schema.items() if k != "CAUSE_MAP"] + list(schema["CAUSE_MAP"].values())
+    return [c for c in cols if c is not None]
+
+def read_delay_file(path: str, header=None) -> pd.DataFrame:
+    # only the detected columns; airport / carrier codes as categoricals
+    delay_df = read_pruned(path, schema_columns(SCHEMA), header=header, categorical=[AIRPORT_COL, CARRIER_COL])
+    return normalize_delay_df(delay_df)
+
+if delay_cube is None:
+    delay_df = read_delay_file(DELAY_PATH, header=delay_header)
+    delay_cube = build_delay_cube(delay_df)
+    try:
+        delay_cube.save(DELAY_CUBE_PATH, source_path=DELAY_PATH)
+    except OSError as e:
+        print("⚠️ Could not save delay cube:", e)
+print(f"✅ Delay cube: {len(delay_cube):,} (airport, carrier, month) cells")
+
+airport_risk, airline_risk, seasonal_risk = build_risk_tables(delay_cube)
 
 # -----------------------------
 # 5) Cause mix for explanation ("why likely delayed")
 # -----------------------------
-def compute_cause_mix(df_slice: pd.DataFrame):
-    totals = {}
-    for k, col in CAUSE_MAP.items():
-        totals[k] = float(get_numeric_series(df_slice, col, 0).sum()) if col is not None else 0.0
-    s = sum(totals.values())
-    if s <= 0:
-        # fallback (matches your pie chart style)
-        return {"late_aircraft": 0.38, "carrier": 0.31, "nas": 0.25, "weather": 0.05, "security": 0.01}
-    return {k: totals[k] / s for k in totals}
+def compute_cause_mix(airport=None, carrier=None, month=None):
+    # O(1) cube lookup; leave any of the three as None to roll that dimension up
+    airport = None if airport is None else str(airport).upper().strip()
+    carrier = None if carrier is None else str(carrier).upper().strip()
+    return delay_cube.cause_mix(airport, carrier, month)
 
 # -----------------------------
 # 6) Confidence scoring (makes tracker feel "real")
@@ -204,129 +262,53 @@ def confidence_label(n: float):
 
 # -----------------------------
 # 7) Tracking Card Generator (THIS is your "flight tracking" output)
+# The risk layer is compiled once (risk_index.py): hash lookups by airport /
+# carrier / month, percentile ranks via searchsorted, cause totals pre-summed
+# per airport+airline+month, so a card is a few array reads, not table scans.
 # -----------------------------
+risk_index = RiskIndex(airport_risk, airline_risk, seasonal_risk, delay_cube)
+
+STARTUP = startup_report(_T0)
+print(f"✅ Tracker ready in {STARTUP['startup_s']:.2f}s | peak RSS {STARTUP['peak_rss_mb']:.0f} MB")
+
 def track_flight_card(origin_airport: str, airline_code: str, month: int):
-    origin_airport = str(origin_airport).upper().strip()
-    airline_code   = str(airline_code).upper().strip()
-
-    arow = airport_risk[airport_risk["airport"] == origin_airport]
-    arow = arow.iloc[0] if len(arow) else None
-
-    crow = airline_risk[airline_risk["carrier"] == airline_code]
-    crow = crow.iloc[0] if len(crow) else None
-
-    mrow = seasonal_risk[seasonal_risk["month"] == month]
-    mrow = mrow.iloc[0] if len(mrow) else None
-
-    # slice for causes (airport+airline+month)
-    df_slice = delay_df[
-        (delay_df["airport_std"] == origin_airport) &
-        (delay_df["carrier_std"] == airline_code) &
-        (delay_df["month"] == month)
-    ]
-    cause_mix = compute_cause_mix(df_slice)
-
-    # percentile-based risk scoring (robust across scaling)
-    def pct_rank(value, series):
-        if value is None or series.isna().all():
-            return 0.5
-        return float((series <= value).mean())
-
-    airport_p = pct_rank(arow["congestion_score"] if arow is not None else None, airport_risk["congestion_score"])
-    airline_p = pct_rank(crow["reliability_index"] if crow is not None else None, airline_risk["reliability_index"])
-    month_p   = pct_rank(mrow["avg_dep_delay"] if mrow is not None else None, seasonal_risk["avg_dep_delay"])
-
-    score = (airport_p * 0.45 + airline_p * 0.35 + month_p * 0.20) * 100.0
-    score = float(np.clip(score, 0, 100))
-
-    if score < 33:
-        risk = "LOW"
-    elif score < 66:
-        risk = "MEDIUM"
-    else:
-        risk = "HIGH"
-
-    # expected delay minutes + cancellation probability
-    vals, canc = [], []
-    if arow is not None:
-        vals.append(arow["avg_dep_delay"])
-        canc.append(arow["cancel_rate"])
-    if crow is not None:
-        vals.append(crow["avg_arr_delay"])
-        canc.append(crow["cancel_rate"])
-    if mrow is not None:
-        vals.append(mrow["avg_dep_delay"])
-        canc.append(mrow["cancel_rate"])
-
-    expected_delay = float(np.nanmean(vals)) if len(vals) else np.nan
-    cancel_prob    = float(np.nanmean(canc)) if len(canc) else np.nan
-
-    # top causes (2)
-    top_causes = sorted(cause_mix.items(), key=lambda x: x[1], reverse=True)[:2]
-    cause_text = ", ".join([f"{k.replace('_',' ')} ({v*100:.1f}%)" for k, v in top_causes if v > 0])
-
-    # confidence (use flights_total when available)
-    conf_inputs = []
-    if arow is not None:
-        conf_inputs.append(arow["flights_total"] if "flights_total" in arow else arow["volume"])
-    if crow is not None:
-        conf_inputs.append(crow["flights_total"] if "flights_total" in crow else crow["volume"])
-    if mrow is not None:
-        conf_inputs.append(mrow["flights_total"] if "flights_total" in mrow else mrow["volume"])
-    conf_n = np.nanmean(conf_inputs) if len(conf_inputs) else np.nan
-    conf = confidence_label(conf_n)
-
-    # action guidance
-    if risk == "HIGH":
-        action = [
-            "Add a big buffer (connections +2 to 3 hours).",
-            "Avoid tight layovers; consider early departures.",
-            "Keep a backup option (alternate flight/airport)."
-        ]
-    elif risk == "MEDIUM":
-        action = [
-            "Add buffer (connections +1 to 2 hours).",
-            "Avoid the shortest connection times.",
-        ]
-    else:
-        action = [
-            "Normal buffer is fine.",
-            "Standard check-in timing should work.",
-        ]
-
-    card = f"""
-==================== FLIGHT TRACKING CARD ====================
-Route Context:  {airline_code}  |  ORIGIN: {origin_airport}  |  MONTH: {month}
-
-Operational Risk Level:   {risk}   (Score: {score:.1f}/100)   | Confidence: {conf}
-
-Expected Delay:           {("~ " + str(round(expected_delay,1)) + " min") if not np.isnan(expected_delay) else "N/A"}
-Cancellation Probability: {(str(round(cancel_prob*100,2)) + "%") if not np.isnan(cancel_prob) else "N/A"}
-
-Likely Root Causes:       {cause_text if cause_text else "Not available in this schema"}
-
-Recommended Actions:
-- {action[0]}
-- {action[1]}
-{("- " + action[2]) if len(action) > 2 else ""}
-
-(Static tracking = disruption-risk tracking based on historical operations)
-==============================================================
-""".strip("\n")
+    return risk_index.cards([origin_airport], [airline_code], [month], with_text=True)[0]
 
-    return {
-        "airport": origin_airport,
-        "airline": airline_code,
-        "month": int(month),
-        "risk_score": round(score, 1),
-        "risk_level": risk,
-        "confidence": conf,
-        "expected_delay_min": None if np.isnan(expected_delay) else round(expected_delay, 1),
-        "cancel_prob_%": None if np.isnan(cancel_prob) else round(cancel_prob * 100, 2),
-        "top_causes": cause_text,
-        "actions": action,
-        "card_text": card
-    }
+def track_flight_cards(requests: pd.DataFrame, with_text: bool = False) -> pd.DataFrame:
+    # requests: one row per (airport, airline, month); origin_airport / airline_code also accepted
+    req = pd.DataFrame(requests).rename(columns={"origin_airport": "airport", "airline_code": "airline"})
+    cards = risk_index.cards(req["airport"], req["airline"], req["month"], with_text=with_text)
+    return pd.DataFrame(cards, index=req.index)
+
+# -----------------------------
+# 7b) New monthly BTS drops
+# A new Airline_Delay_Cause file is read, normalized and summed on its own,
+# then added into the cube: the cost follows the new rows (plus one pass
+# over the cube's cells), never a re-read of the original CSV. Appended
+# files are recorded in the saved cube so a warm start keeps them.
+# -----------------------------
+def append_delay_file(path: str, save: bool = True) -> int:
+    global airport_risk, airline_risk, seasonal_risk, risk_index
+    fp = source_fingerprint(path)
+    if any(a["sha1"] == fp["sha1"] and a["size"] == fp["size"] for a in delay_cube.meta.get("appended", [])):
+        print("ℹ️ Already appended:", path)
+        return 0
+    header = sniff_header(path)
+    if detect_schema(pd.DataFrame(columns=list(header))) != SCHEMA:
+        raise ValueError(f"{path} does not have the same columns as {DELAY_PATH}")
+
+    new_rows = read_delay_file(path, header=header)
+    delay_cube.merge(build_delay_cube(new_rows))
+    delay_cube.meta.setdefault("appended", []).append(fp)
+
+    airport_risk, airline_risk, seasonal_risk = build_risk_tables(delay_cube)
+    risk_index = RiskIndex(airport_risk, airline_risk, seasonal_risk, delay_cube)
+    if save:
+        try:
+            delay_cube.save(DELAY_CUBE_PATH, source_path=DELAY_PATH)
+        except OSError as e:
+            print("⚠️ Could not save delay cube:", e)
+    return len(new_rows)
 
 # -----------------------------
 # 8) Batch mode (for PPT screenshots + insights)
@@ -340,10 +322,12 @@ def top_hotspots(month=7, top_k=10):
 
 # -----------------------------
 # 9) Demo run (change inputs to your case)
+# (skipped when imported, e.g. by serve.py, which only needs the tables above)
 # -----------------------------
-print("\n--- Example tracking card ---")
-demo = track_flight_card(origin_airport="ORD", airline_code="AA", month=7)
-print(demo["card_text"])
+if __name__ == "__main__":
+    print("\n--- Example tracking card ---")
+    demo = track_flight_card(origin_airport="ORD", airline_code="AA", month=7)
+    print(demo["card_text"])
 
-print("\n--- Top hotspots (for alerts list) ---")
-print(top_hotspots(month=7, top_k=10).to_string(index=False))
+    print("\n--- Top hotspots (for alerts list) ---")
+    print(top_hotspots(month=7, top_k=10).to_string(index=False))
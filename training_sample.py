@@ -0,0 +1,275 @@
+# ============================================
+# TRAINING-SET BUILDER (one pass over itineraries.csv -> Parquet)
+# Every row gets a uniform random key; the sample is the valid rows with the
+# smallest keys (`size` overall, or `per_route` per route with strata="route"),
+# i.e. a uniform sample of the whole file rather than of its head. Keyed
+# samples merge by keeping the smallest keys again, so byte ranges of the file
+# can be sampled in separate processes and folded together in the parent.
+# Each chunk is first cut to the rows whose key beats the current threshold;
+# only those get the validity filter, date parsing, days_to_departure and
+# duration parsing. The sample is written to Parquet in row groups, optionally
+# run through fare_model.engineer_features on the way (in the pool too).
+# ============================================
+
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from fare_ingest import read_range, split_byte_ranges
+from fare_model import MAX_HORIZON_DAYS, engineer_features, fill_values_from, parse_duration_minutes, to_dates
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# the notebook's COLUMNS_TO_KEEP
+SAMPLE_COLUMNS = ["legId", "searchDate", "flightDate", "startingAirport", "destinationAirport",
+                  "travelDuration", "elapsedDays", "isBasicEconomy", "isRefundable", "isNonStop",
+                  "baseFare", "totalFare", "seatsRemaining", "totalTravelDistance",
+                  "segmentsAirlineName", "segmentsAirlineCode", "segmentsCabinCode",
+                  "segmentsDurationInSeconds", "fareBasisCode"]
+FLOAT32_COLUMNS = ["baseFare", "totalFare", "totalTravelDistance"]
+# read as text everywhere so every byte range yields the same column types
+STRING_COLUMNS = ["legId", "searchDate", "flightDate", "startingAirport", "destinationAirport", "travelDuration",
+                  "segmentsAirlineName", "segmentsAirlineCode", "segmentsCabinCode", "segmentsDurationInSeconds",
+                  "fareBasisCode"]
+MIN_BUFFER_ROWS = 200_000
+
+
+# -------------------------------
+# Keyed reservoir
+# -------------------------------
+class KeyedReservoir:
+    """Valid rows with the smallest keys: `size` overall, or `per_route` for every route."""
+
+    def __init__(self, size=None, per_route=None):
+        if (size is None) == (per_route is None):
+            raise ValueError("give exactly one of size / per_route")
+        self.size, self.per_route = size, per_route
+        self.parts, self.buffered = [], 0
+        self.compact_at = MIN_BUFFER_ROWS
+        self.threshold = np.inf
+        self.route_threshold = pd.Series(dtype=np.float64)
+        self.stats = {"rows_read": 0, "rows_considered": 0, "rows_valid": 0}
+
+    def offer(self, chunk, rng):
+        """Raw CSV chunk in; the rows that could still make the sample are kept."""
+        n = len(chunk)
+        self.stats["rows_read"] += n
+        keys = rng.random(n)
+        if self.per_route:
+            routes = chunk["startingAirport"].astype(str) + "_" + chunk["destinationAirport"].astype(str)
+            cand = keys < routes.map(self.route_threshold).fillna(np.inf).to_numpy()
+        else:
+            routes = None
+            cand = keys < self.threshold
+        c = chunk[cand]
+        self.stats["rows_considered"] += len(c)
+        if not len(c):
+            return
+
+        fare = pd.to_numeric(c["totalFare"], errors="coerce")
+        search, flight = to_dates(c["searchDate"]), to_dates(c["flightDate"])
+        days = (flight - search).astype("timedelta64[D]").astype(np.float64)
+        days[np.isnat(search) | np.isnat(flight)] = np.nan
+        ok = (fare.notna() & (fare > 0)).to_numpy() & (days >= 0) & (days <= MAX_HORIZON_DAYS)
+        if not ok.any():
+            return
+        c = c[ok].assign(searchDate=search[ok], flightDate=flight[ok],
+                         days_to_departure=days[ok].astype(np.int16), _key=keys[cand][ok])
+        if "travelDuration" in c.columns:
+            c["duration_minutes"] = parse_duration_minutes(c["travelDuration"]).astype(np.float32)
+        if routes is not None:
+            c["_route"] = routes[cand][ok].to_numpy()
+        self.stats["rows_valid"] += len(c)
+        self._add(c)
+
+    def _add(self, df):
+        self.parts.append(df)
+        self.buffered += len(df)
+        if self.buffered >= self.compact_at:
+            self.compact()
+
+    def compact(self):
+        if not self.parts:
+            return
+        df = pd.concat(self.parts, ignore_index=True) if len(self.parts) > 1 else self.parts[0]
+        if self.per_route:
+            df = df.sort_values("_key", kind="stable")
+            df = df[df.groupby("_route", sort=False).cumcount() < self.per_route]
+            g = df.groupby("_route", sort=False)["_key"]
+            full = g.size() >= self.per_route
+            self.route_threshold = g.max()[full]
+        elif len(df) > self.size:
+            keep = np.argpartition(df["_key"].to_numpy(), self.size - 1)[:self.size]
+            df = df.iloc[keep]
+            self.threshold = float(df["_key"].max())
+        self.parts, self.buffered = [df], len(df)
+        self.compact_at = 2 * len(df) + MIN_BUFFER_ROWS
+
+    def merge(self, other):
+        for k, v in other.stats.items():
+            self.stats[k] += v
+        for part in other.parts:
+            self._add(part)
+
+    def frame(self):
+        """The sample in key order (a random permutation), without the helper columns."""
+        if not self.parts:
+            return pd.DataFrame()
+        self.compact()
+        df = self.parts[0].sort_values("_key", kind="stable")
+        return df.drop(columns=[c for c in ("_key", "_route") if c in df.columns]).reset_index(drop=True)
+
+
+def iter_chunks(path, columns, chunk_rows=250_000, start=None, end=None, engine="auto"):
+    """DataFrames of `columns` from the whole file or one byte range of it (fare_ingest.split_byte_ranges)."""
+    if engine == "auto":
+        engine = "pyarrow" if PYARROW_AVAILABLE else "pandas"
+    dtype = {**{c: str for c in STRING_COLUMNS if c in columns},
+             **{c: np.float32 for c in FLOAT32_COLUMNS if c in columns}}
+    whole = start is None
+    if engine != "pyarrow":
+        if whole:
+            yield from pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunk_rows, low_memory=False)
+        else:
+            yield from read_range(path, start, end, columns, chunk_rows, dtype)
+        return
+
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    read_opts = pa_csv.ReadOptions(block_size=max(chunk_rows * _bytes_per_row(path), 1 << 20),
+                                   column_names=None if whole else names)
+    types = {c: pa.float32() if t is np.float32 else pa.string() for c, t in dtype.items()}
+    conv = pa_csv.ConvertOptions(include_columns=columns, column_types=types)
+    if whole:
+        source = path
+    else:
+        with open(path, "rb") as f:
+            f.seek(start)
+            source = io.BytesIO(f.read(end - start))
+    for batch in pa_csv.open_csv(source, read_options=read_opts, convert_options=conv):
+        yield batch.to_pandas()
+
+
+def _bytes_per_row(path, sample_bytes=1 << 20):
+    with open(path, "rb") as f:
+        head = f.read(sample_bytes)
+    return max(len(head) // max(head.count(b"\n"), 1), 1)
+
+
+def _sample_range(args):
+    path, start, end, columns, chunk_rows, size, per_route, seed, engine = args
+    res = KeyedReservoir(size, per_route)
+    rng = np.random.default_rng(seed)
+    for ch in iter_chunks(path, columns, chunk_rows, start, end, engine):
+        res.offer(ch, rng)
+    res.compact()
+    return res
+
+
+def _empty_sample(columns):
+    # zero-row frame for an empty sample: float32 fare columns as iter_chunks reads them, text otherwise
+    dtype = lambda c: np.float32 if c in FLOAT32_COLUMNS else object
+    return pd.DataFrame({c: pd.Series(dtype=dtype(c)) for c in columns})
+
+
+def _engineer(args):
+    part, fill = args
+    return engineer_features(part, fill)
+
+
+# -------------------------------
+# Build
+# -------------------------------
+def write_parquet(parts, out_path, empty=None):
+    """Frames -> one Parquet file, one row group per frame (whole frame at once without pyarrow).
+
+    With no frames at all, `empty` (a zero-row frame) is written so the file still exists with its schema.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    if not PYARROW_AVAILABLE:
+        parts = list(parts)
+        if not parts:
+            if empty is None:
+                raise ValueError(f"nothing to write to {out_path} (no frames and no empty schema)")
+            parts = [empty]
+        df = pd.concat(parts, ignore_index=True)
+        df.to_parquet(out_path, index=False)
+        return len(df)
+    writer, rows = None, 0
+    try:
+        for part in parts:
+            table = pa.Table.from_pandas(part, preserve_index=False,
+                                         schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, table.schema, compression="snappy")
+            writer.write_table(table)
+            rows += len(part)
+        if writer is None:
+            if empty is None:
+                raise ValueError(f"nothing to write to {out_path} (no frames and no empty schema)")
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), out_path, compression="snappy")
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def build_training_set(path, out_path, size=100_000, strata=None, per_route=None, columns=None,
+                       workers=1, seed=42, chunk_rows=250_000, features=False, mem_cap_mb=2048,
+                       row_group_rows=250_000, engine="auto"):
+    """One pass over `path`; writes the sample to `out_path` and returns the run stats.
+
+    strata=None   -> `size` rows, uniform over all valid rows of the file
+    strata="route" -> up to `per_route` rows from every route
+    Valid = totalFare > 0, both dates parse, 0 <= days_to_departure <= 365 (the notebook's filters).
+    The sample depends on (seed, workers, mem_cap_mb) through the byte ranges, and on the
+    reader's batch boundaries (engine, chunk_rows) only through the order keys are drawn in.
+    """
+    if strata not in (None, "route"):
+        raise ValueError(f"strata must be None or 'route', got {strata!r}")
+    if strata == "route" and not per_route:
+        raise ValueError("strata='route' needs per_route")
+    t0 = time.perf_counter()
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in (columns or SAMPLE_COLUMNS) if c in header]
+    size, per_route = (None, per_route) if strata else (size, None)
+
+    if workers and workers > 1:
+        file_size = os.path.getsize(path)
+        range_bytes = max(int(mem_cap_mb * 1024**2 / (4 * workers)), 1024**2)
+        ranges = split_byte_ranges(path, max(workers, int(np.ceil(file_size / range_bytes))))
+        tasks = [(path, a, b, columns, chunk_rows, size, per_route, [seed, i], engine)
+                 for i, (a, b) in enumerate(ranges)]
+        res = KeyedReservoir(size, per_route)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_sample_range, tasks):
+                res.merge(part)
+    else:
+        res = _sample_range((path, None, None, columns, chunk_rows, size, per_route, seed, engine))
+    sample = res.frame()
+    t_sample = time.perf_counter() - t0
+
+    slices = [sample.iloc[i:i + row_group_rows] for i in range(0, len(sample), row_group_rows)]
+    if features and len(sample):
+        fill = fill_values_from(sample)
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                rows = write_parquet(pool.map(_engineer, [(s, fill) for s in slices]), out_path)
+        else:
+            rows = write_parquet((engineer_features(s, fill) for s in slices), out_path)
+    else:
+        rows = write_parquet(slices, out_path, empty=sample.iloc[:0] if len(sample.columns) else _empty_sample(columns))
+
+    return {**res.stats, "rows_sampled": rows,
+            "routes": int((sample["startingAirport"].astype(str) + "_" + sample["destinationAirport"].astype(str))
+                          .nunique()) if len(sample) else 0,
+            "sample_s": round(t_sample, 3), "total_s": round(time.perf_counter() - t0, 3)}